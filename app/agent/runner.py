@@ -2,12 +2,14 @@
 
 import asyncio
 import json
+import time
 
-from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from app.agent.prompt import SYSTEM_PROMPT
 from app.agent.tools import build_tools
+from app.constants import UpstreamPriority
+from app.core import metrics, upstream
 from app.core.config import settings
 from app.schemas import AskResponse
 
@@ -21,6 +23,8 @@ def _make_client(client):
     """Return the injected client, or build one pointed at the configured LLM proxy."""
     if client is not None:
         return client
+    from openai import AsyncOpenAI  # on the first question, not at startup
+
     return AsyncOpenAI(api_key=settings.LLM_API_KEY, base_url=settings.LLM_BASE_URL)
 
 
@@ -43,10 +47,17 @@ async def _dispatch_one(dispatch, name, raw_args, trace):
     fn = dispatch.get(name)  # look up outside the try so a tool-internal KeyError isn't misreported
     if fn is None:
         return _to_json({"error": f"unknown tool {name}"})
+    start, outcome = time.perf_counter(), "ok"
     try:
-        return _to_json(await fn(**args))
+        # Behind API requests, but ahead of the crons
+        with upstream.priority(UpstreamPriority.AGENT):
+            result = await fn(**args)
+        return _to_json(result)
     except Exception as e:  # tool failure fed back to the model, not a 500
+        outcome = "error"
         return _to_json({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        metrics.AGENT_TOOL_SECONDS.labels(name, outcome).observe(time.perf_counter() - start)
 
 
 async def run_ask(query: str, redis_client, client=None) -> AskResponse:
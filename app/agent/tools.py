@@ -7,9 +7,13 @@ tool schemas and a name -> coroutine dispatch map.
 
 from datetime import date
 
+from pydantic import BaseModel
+
 import app.constants as constants
 from app.agent.filters import filter_matches, guard_rows
-from app.services import search, team, player, rankings, standings, news, events, matches
+from app.schemas import Player, Team
+from app.constants import JobKind
+from app.services import search, team, player, rankings, standings, news, events, matches, projection, jobs
 
 _MATCH_FILTERS = ["opponent", "event", "stage", "date_from", "date_to", "limit", "roster_core", "opponent_roster_core"]
 
@@ -28,29 +32,43 @@ async def _search(category: str, term: str):
     return [r.model_dump(mode="json") for r in await search.get_data(constants.SearchCategory(category), term)]
 
 
-async def _get_team(id: str, completed_pages: int = 1, opponent=None, event=None, stage=None,
+def _include(model: type[BaseModel], fields: str | None) -> dict | None:
+    """The include tree of a `fields=` projection, compiled before fetching so a bad one fails first."""
+    return projection.include_tree(model, fields) if fields else None
+
+
+def _filtered(rows: list[BaseModel], **filters) -> list[BaseModel]:
+    """The match models `filter_matches` keeps, so they can be projected without being validated again."""
+    dumped = [row.model_dump(mode="json") for row in rows]
+    kept = {id(match) for match in filter_matches(dumped, **filters)}
+    return [row for row, match in zip(rows, dumped) if id(match) in kept]
+
+
+async def _get_team(id: str, completed_pages: int = 1, fields=None, opponent=None, event=None, stage=None,
                     date_from=None, date_to=None, limit=None, roster_core=None, opponent_roster_core=None):
     """Team info, roster, and upcoming/completed matches by id, with the completed list filtered and size-guarded."""
-    data = (await team.get_team_data(id, completed_pages=completed_pages)).model_dump(mode="json")
-    data["completed"] = guard_rows(
-        filter_matches(data.get("completed", []), opponent=opponent, event=event, stage=stage,
-                       date_from=date_from, date_to=date_to, limit=limit,
-                       roster_core=roster_core, opponent_roster_core=opponent_roster_core),
-        _MATCH_FILTERS,
-    )
+    include = _include(Team, fields)
+    result = await team.get_team_data(id, completed_pages=completed_pages)
+    completed = _filtered(result.completed, opponent=opponent, event=event, stage=stage,
+                          date_from=date_from, date_to=date_to, limit=limit,
+                          roster_core=roster_core, opponent_roster_core=opponent_roster_core)
+    data = result.model_copy(update={"completed": completed}).model_dump(mode="json", include=include)
+    if "completed" in data:
+        data["completed"] = guard_rows(data["completed"], _MATCH_FILTERS)
     return data
 
 
-async def _get_player(id: str, match_pages: int = 1, opponent=None, event=None, stage=None,
+async def _get_player(id: str, match_pages: int = 1, fields=None, opponent=None, event=None, stage=None,
                       date_from=None, date_to=None, limit=None, roster_core=None, opponent_roster_core=None):
     """Player info, per-agent stats, teams, and match history by id, with the match list filtered and size-guarded."""
-    data = (await player.get_player_data(id, match_pages=match_pages)).model_dump(mode="json")
-    data["matches"] = guard_rows(
-        filter_matches(data.get("matches", []), opponent=opponent, event=event, stage=stage,
-                       date_from=date_from, date_to=date_to, limit=limit,
-                       roster_core=roster_core, opponent_roster_core=opponent_roster_core),
-        _MATCH_FILTERS,
-    )
+    include = _include(Player, fields)
+    result = await player.get_player_data(id, match_pages=match_pages)
+    history = _filtered(result.matches, opponent=opponent, event=event, stage=stage,
+                        date_from=date_from, date_to=date_to, limit=limit,
+                        roster_core=roster_core, opponent_roster_core=opponent_roster_core)
+    data = result.model_copy(update={"matches": history}).model_dump(mode="json", include=include)
+    if "matches" in data:
+        data["matches"] = guard_rows(data["matches"], _MATCH_FILTERS)
     return data
 
 
@@ -60,7 +78,7 @@ async def _count_team_matches(id: str, stage=None, event=None, opponent=None, re
     Returns {played, won, lost, other}. `other` holds matches whose score can't be classified
     (forfeits, walkovers, empty scores), so `played == won + lost + other` always holds.
     """
-    data = (await team.get_team_data(id, completed_pages=0)).model_dump(mode="json")
+    data = (await jobs.fetch(JobKind.TEAM, id, 0)).model_dump(mode="json")
     rows = filter_matches(data.get("completed", []), opponent=opponent, event=event, stage=stage, roster_core=roster_core)
     played = won = lost = other = 0
     for m in rows:
@@ -79,7 +97,7 @@ async def _count_team_matches(id: str, stage=None, event=None, opponent=None, re
 
 async def _player_tenure(player_id: str, team_name: str):
     """Derive a player's tenure on a team (first/last match date + span) from full match history."""
-    data = (await player.get_player_data(player_id, match_pages=0)).model_dump(mode="json")
+    data = (await jobs.fetch(JobKind.PLAYER, player_id, 0)).model_dump(mode="json")
     rows = [m for m in data.get("matches", []) if team_name.lower() in (m.get("team", "") or "").lower()]
     if not rows:
         return {"found": False, "team": team_name}
@@ -127,6 +145,9 @@ def _match_filter_props() -> dict:
         "roster_core": {"type": "string",
                         "description": "Filter by this team/player's roster-core tag (e.g. '#ACM'); the tag changes when the core changes."},
         "opponent_roster_core": {"type": "string", "description": "Filter by the opponent's roster-core tag (e.g. '#YAJ')."},
+        "fields": {"type": "string",
+                   "description": "Comma-separated fields to return, to keep the result small, e.g. 'name,completed.score'. "
+                                  "'a.b' picks subfields; 'a[:3]' the first 3 items of a list."},
     }
 
 
@@ -1,14 +1,25 @@
-from typing import AsyncGenerator
+from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends
+from fastapi import Depends, Query
 from app.exceptions import UnauthorizedError
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+import app.constants as constants
 from app.cache import get_client
+from app.core import admission, telemetry
 from app.core.config import settings
 
 http_bearer = HTTPBearer()
 
+# Query parameters of the cursor-paginated `.../archive` routes
+ArchiveLimit = Annotated[int, Query(ge=1, le=constants.MAX_ARCHIVE_LIMIT, description="How many items to return")]
+ArchiveCursor = Annotated[str | None, Query(description="The `next_cursor` of the previous page")]
+# Field projection: only these (dotted) fields are returned, e.g. `name,img,upcoming[:3].opponent`
+Fields = Annotated[
+    str | None,
+    Query(description="Comma-separated fields to return; `a.b` picks subfields, `a[:3]` the first 3 items of a list"),
+]
+
 
 def verify_token(
     token_data: HTTPAuthorizationCredentials = Depends(http_bearer),
@@ -21,14 +32,19 @@ def verify_token(
 
     for api_key_source, api_key in settings.API_KEYS.items():
         if token_data.credentials == api_key:
-            if settings.SENTRY_DSN:
-                import sentry_sdk
-
-                sentry_sdk.set_tag("api_key", api_key_source)
+            telemetry.set_tag("api_key", api_key_source)
             return
     raise UnauthorizedError(detail="Invalid token")
 
 
+async def admit_scrapes() -> None:
+    """
+    Function to put the scrapes the route makes on a cache miss through the scrape admission limit
+    :return: Nothing
+    """
+    admission.gate(admission.SCRAPES)
+
+
 async def get_redis_client() -> AsyncGenerator:
     """
     Function to get a redis client
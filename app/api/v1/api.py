@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api import deps
 from app.api.v1.endpoints.events import router as events_router
+from app.api.v1.endpoints.jobs import router as jobs_router
 from app.api.v1.endpoints.matches import router as matches_router
 from app.api.v1.endpoints.news import router as news_router
 from app.api.v1.endpoints.player import router as player_router
@@ -13,15 +15,19 @@ from app.core.config import settings
 
 router = APIRouter()
 
-router.include_router(events_router, prefix="/events", tags=["Events"])
-router.include_router(matches_router, prefix="/matches", tags=["Matches"])
+# Routes that scrape by-id pages on a cache miss are admission controlled (see app/core/admission.py).
+admitted = [Depends(deps.admit_scrapes)]
+
+router.include_router(events_router, prefix="/events", tags=["Events"], dependencies=admitted)
+router.include_router(matches_router, prefix="/matches", tags=["Matches"], dependencies=admitted)
 router.include_router(news_router, prefix="/news", tags=["News"])
-router.include_router(team_router, prefix="/team", tags=["Team"])
-router.include_router(player_router, prefix="/player", tags=["Player"])
+router.include_router(team_router, prefix="/team", tags=["Team"], dependencies=admitted)
+router.include_router(player_router, prefix="/player", tags=["Player"], dependencies=admitted)
 router.include_router(rankings_router, prefix="/rankings", tags=["Rankings"])
 router.include_router(standings_router, prefix="/standings", tags=["Standings"])
 router.include_router(version_router, prefix="/version", tags=["Version"])
 router.include_router(search_router, prefix="/search", tags=["Search"])
+router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
 
 if settings.LLM_API_KEY:
     from app.api.v1.endpoints.ask import router as ask_router
@@ -6,6 +6,7 @@ from redis.asyncio import Redis
 from app.agent.ratelimit import client_ip, enforce_rate_limit
 from app.agent.runner import run_ask
 from app.api.deps import get_redis_client
+from app.core import admission
 from app.schemas import AskRequest, AskResponse
 
 router = APIRouter()
@@ -25,4 +26,5 @@ async def ask(
     """
     ip = client_ip(x_forwarded_for, request.client.host if request.client else None)
     await enforce_rate_limit(redis_client, ip)
-    return await run_ask(body.query, redis_client=redis_client)
+    async with admission.ASK.slot():
+        return await run_ask(body.query, redis_client=redis_client)
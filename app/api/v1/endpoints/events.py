@@ -1,20 +1,49 @@
-from fastapi import APIRouter, Depends
+from functools import partial
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from redis.asyncio import Redis
 
 from app import schemas, cache
 from app.api import deps
-from app.services import events
+from app.services import events, pagination, projection, stale
 
 router = APIRouter()
 
 
-@router.get("/")
-async def list_events(client: Redis = Depends(deps.get_redis_client)) -> list[schemas.Event]:
-    if data := await cache.get("events", client=client):
-        return schemas.EventListAdapter.validate_json(data)
-    return await events.get_events(client)
+@router.get("/", response_model=list[schemas.Event])
+async def list_events(
+    pages: Annotated[int, Query(description="Pages of events to fetch; <= 0 fetches all.")] = 1,
+    stream: Annotated[bool, Query(description="Stream NDJSON, one event per line as pages arrive.")] = False,
+    fields: deps.Fields = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> Response:
+    if stream:
+        return StreamingResponse(
+            await pagination.stream_ndjson(events.stream_events(client, pages=pages)),
+            media_type="application/x-ndjson",
+        )
+    projection.check(schemas.Event, fields)
+    # The cron keeps the first page cached; anything more is fetched live.
+    if pages == 1 and (data := await cache.get("events", client=client)):
+        if fields is None:
+            return Response(content=data, media_type="application/json")
+        event_list = schemas.EventListAdapter.validate_json(data)
+    elif pages == 1:
+        event_list = await stale.fetch_or_stale(
+            "events", partial(events.get_events, client), schemas.EventListAdapter.validate_json, client
+        )
+    else:
+        event_list = await events.get_events(client, pages=pages)
+    return Response(
+        content=projection.dump_list(schemas.EventListAdapter, schemas.Event, event_list, fields),
+        media_type="application/json",
+    )
 
 
-@router.get("/{id}")
-async def event_by_id(id: str, client: Redis = Depends(deps.get_redis_client)) -> schemas.EventWithDetails:
-    return await events.get_event_by_id(id, client)
+@router.get("/{id}", response_model=schemas.EventWithDetails)
+async def event_by_id(id: str, fields: deps.Fields = None, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    projection.check(schemas.EventWithDetails, fields)
+    result = await events.get_event_by_id(id, client)
+    return Response(content=projection.dump(result, fields), media_type="application/json")
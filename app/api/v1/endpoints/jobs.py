@@ -0,0 +1,62 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+
+from app import schemas
+from app.api import deps
+from app.constants import JobKind
+from app.core.config import settings
+from app.exceptions import NotFoundError, ServiceUnavailableError
+from app.services import jobs
+
+
+def require_cache() -> None:
+    if not settings.ENABLE_CACHE:
+        raise ServiceUnavailableError(detail="Jobs need the cache to be enabled")
+
+
+router = APIRouter(dependencies=[Depends(require_cache)])
+
+
+@router.post("/{kind}/{id}", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    kind: JobKind,
+    id: str,
+    pages: Annotated[int, Query(description="Pages of match history to scrape; `0` for all of it")] = 0,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.Job:
+    return await jobs.submit(client, kind, id, pages)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, client: Redis = Depends(deps.get_redis_client)) -> schemas.Job:
+    if (job := await jobs.get_job(client, job_id)) is None:
+        raise NotFoundError(detail="No such job")
+    return job
+
+
+@router.get(
+    "/{job_id}/result",
+    response_model=schemas.Player | schemas.Team,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.Job, "description": "The job hasn't finished yet"}},
+)
+async def get_job_result(job_id: str, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    job, data = await jobs.job_result(client, job_id)
+    if data is None:
+        return Response(
+            content=job.model_dump_json(), status_code=status.HTTP_202_ACCEPTED, media_type="application/json"
+        )
+    return Response(content=data, media_type="application/json")
+
+
+@router.get("/{job_id}/events", response_class=StreamingResponse)
+async def stream_job_events(job_id: str, client: Redis = Depends(deps.get_redis_client)) -> StreamingResponse:
+    if await jobs.get_job(client, job_id) is None:
+        raise NotFoundError(detail="No such job")
+    return StreamingResponse(
+        jobs.job_event_stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
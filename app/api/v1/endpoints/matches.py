@@ -1,20 +1,147 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from functools import partial
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from redis.asyncio import Redis
 
 from app import cache, schemas
 from app.api import deps
-from app.services import matches
+from app.core.config import settings
+from app.exceptions import ServiceUnavailableError
+from app.services import archive, batch, matches, pagination, projection, stale
 
 router = APIRouter()
 
+MatchIds = Annotated[list[str] | None, Query(description="Only changes to these matches")]
+TeamIds = Annotated[list[str] | None, Query(description="Only changes to matches of these teams")]
+EventIds = Annotated[list[str] | None, Query(description="Only changes to matches in these events")]
+
 
-@router.get("/")
-async def get_matches(client: Redis = Depends(deps.get_redis_client)) -> list[schemas.Match]:
+@router.get("/", response_model=list[schemas.Match])
+async def get_matches(fields: deps.Fields = None, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    projection.check(schemas.Match, fields)
     if data := await cache.get("matches", client=client):
-        return schemas.MatchListAdapter.validate_json(data)
-    return await matches.match_list(redis_client=client)
+        if fields is None:
+            return Response(content=data, media_type="application/json")
+        match_list = schemas.MatchListAdapter.validate_json(data)
+    else:
+        match_list = await stale.fetch_or_stale(
+            "matches", partial(matches.match_list, redis_client=client), schemas.MatchListAdapter.validate_json, client
+        )
+    return Response(
+        content=projection.dump_list(schemas.MatchListAdapter, schemas.Match, match_list, fields),
+        media_type="application/json",
+    )
+
+
+@router.get("/batch", response_class=StreamingResponse)
+async def get_matches_by_id(
+    ids: Annotated[str, Query(description="Comma-separated match IDs; each is streamed as an NDJSON line")],
+    client: Redis = Depends(deps.get_redis_client),
+) -> StreamingResponse:
+    return StreamingResponse(
+        batch.batch_lookup(
+            batch.parse_batch_ids(ids),
+            matches.match_cache_key,
+            partial(matches.match_by_id, redis_client=client),
+            client,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/results", response_model=list[schemas.Match])
+async def get_match_results(
+    pages: Annotated[int, Query(description="Pages of results to fetch (50 per page); <= 0 fetches all.")] = 1,
+    stream: Annotated[bool, Query(description="Stream NDJSON, one match per line as pages arrive.")] = False,
+    fields: deps.Fields = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> Response:
+    if stream:
+        return StreamingResponse(
+            await pagination.stream_ndjson(matches.stream_completed_matches(client, pages=pages)),
+            media_type="application/x-ndjson",
+        )
+    projection.check(schemas.Match, fields)
+    return Response(
+        content=projection.dump_list(
+            schemas.MatchListAdapter, schemas.Match, await matches.get_completed_matches(client, pages=pages), fields
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/results/archive")
+async def get_match_results_archive(
+    limit: deps.ArchiveLimit = 50,
+    cursor: deps.ArchiveCursor = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.CursorPage[schemas.Match]:
+    return await archive.archive_page(matches.results_archive(client), limit, cursor, client)
+
+
+@router.get("/changes")
+async def get_match_changes(
+    since: Annotated[int | None, Query(description="The `version` of the list you hold")] = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.MatchChanges:
+    return await matches.match_changes_since(since, client)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_match_changes(
+    match_id: MatchIds = None, team_id: TeamIds = None, event_id: EventIds = None
+) -> StreamingResponse:
+    if not settings.ENABLE_CACHE:
+        raise ServiceUnavailableError(detail="Match streams need the cache to be enabled")
+    return StreamingResponse(
+        matches.match_change_stream(matches.match_change_filter(match_id, team_id, event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def match_changes_websocket(
+    websocket: WebSocket, match_id: MatchIds = None, team_id: TeamIds = None, event_id: EventIds = None
+) -> None:
+    if not settings.ENABLE_CACHE:
+        await websocket.close(code=1013, reason="Match streams need the cache to be enabled")
+        return
+    await websocket.accept()
+    async with matches.match_changes.subscribe(matches.match_change_filter(match_id, team_id, event_id)) as queue:
+
+        async def forward() -> None:
+            while True:
+                await websocket.send_text((await queue.get()).decode())
+
+        # Forward in the background, so a client going away is noticed even while no changes arrive.
+        sender = asyncio.create_task(forward())
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
 
 
-@router.get("/{id}")
-async def get_match_by_id(id: str, client: Redis = Depends(deps.get_redis_client)) -> schemas.MatchWithDetails:
-    return await matches.match_by_id(id, client)
+@router.get("/{id}", response_model=schemas.MatchWithDetails)
+async def get_match_by_id(
+    id: str,
+    sections: Annotated[
+        str | None,
+        Query(
+            description="Comma-separated sections to include: teams, event, videos, maps, rounds, scoreboard, h2h. "
+            "Omit for the full match."
+        ),
+    ] = None,
+    fields: deps.Fields = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> Response:
+    projection.check(schemas.MatchWithDetails, fields)
+    body = await matches.match_json_by_id(id, client, matches.parse_sections(sections))
+    if fields is not None:
+        body = projection.dump(schemas.MatchWithDetails.model_validate_json(body), fields)
+    return Response(content=body, media_type="application/json")
@@ -1,16 +1,35 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
+from redis.asyncio import Redis
 
 from app import cache, schemas
-from app.services import news
+from app.api import deps
+from app.services import archive, news, projection, stale
 
 router = APIRouter()
 
 
-@router.get("/")
-async def get_news() -> list[schemas.NewsItem]:
+@router.get("/", response_model=list[schemas.NewsItem])
+async def get_news(fields: deps.Fields = None) -> Response:
+    projection.check(schemas.NewsItem, fields)
     if data := await cache.get("news"):
-        return schemas.NewsListAdapter.validate_json(data)
-    return await news.news_list()
+        if fields is None:
+            return Response(content=data, media_type="application/json")
+        news_items = schemas.NewsListAdapter.validate_json(data)
+    else:
+        news_items = await stale.fetch_or_stale("news", news.news_list, schemas.NewsListAdapter.validate_json)
+    return Response(
+        content=projection.dump_list(schemas.NewsListAdapter, schemas.NewsItem, news_items, fields),
+        media_type="application/json",
+    )
+
+
+@router.get("/archive")
+async def get_news_archive(
+    limit: deps.ArchiveLimit = 50,
+    cursor: deps.ArchiveCursor = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.CursorPage[schemas.NewsItem]:
+    return await archive.archive_page(news.news_archive(), limit, cursor, client)
 
 
 @router.get("/{news_id}")
@@ -1,19 +1,59 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
 
 from app import schemas
-from app.services import player
+from app.api import deps
+from app.services import archive, batch, pagination, player, popularity, projection
 
 router = APIRouter()
 
 
-@router.get("/{player_id}")
+@router.get("/batch", response_class=StreamingResponse)
+async def get_players_by_id(
+    ids: Annotated[str, Query(description="Comma-separated player IDs; each is streamed as an NDJSON line")],
+    client: Redis = Depends(deps.get_redis_client),
+) -> StreamingResponse:
+    ids_ = batch.parse_batch_ids(ids)
+    await popularity.record(popularity.PLAYER, ids_, client)
+    return StreamingResponse(
+        batch.batch_lookup(ids_, player.player_cache_key, player.fetch_player_data, client),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/{player_id}/archive")
+async def get_player_archive(
+    player_id: str,
+    limit: deps.ArchiveLimit = 50,
+    cursor: deps.ArchiveCursor = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.CursorPage[schemas.PlayerMatch]:
+    return await archive.archive_page(player.matches_archive(player_id), limit, cursor, client)
+
+
+@router.get("/{player_id}", response_model=schemas.Player)
 async def get_player_by_id(
     player_id: str,
     match_pages: Annotated[
         int,
         Query(description="Pages of match history to include (50 per page); <= 0 fetches all."),
     ] = 1,
-) -> schemas.Player:
-    return await player.get_player_data(player_id, match_pages=match_pages)
+    stream: Annotated[
+        bool,
+        Query(description="Stream NDJSON: the player without `matches`, then one match per line as pages arrive."),
+    ] = False,
+    fields: deps.Fields = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> Response:
+    await popularity.record(popularity.PLAYER, [player_id], client)
+    if stream:
+        return StreamingResponse(
+            await pagination.stream_ndjson(player.stream_player_data(player_id, match_pages=match_pages)),
+            media_type="application/x-ndjson",
+        )
+    projection.check(schemas.Player, fields)
+    result = await player.get_player_data(player_id, match_pages=match_pages)
+    return Response(content=projection.dump(result, fields), media_type="application/json")
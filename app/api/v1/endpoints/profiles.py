@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Response
+from redis.asyncio import Redis
+
+from app import cache
+from app.api import deps
+from app.core.profiling import profile_key
+from app.exceptions import NotFoundError
+
+router = APIRouter()
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    """A stored request profile, to open in https://www.speedscope.app"""
+    if (profile := await cache.get(profile_key(profile_id), client)) is None:
+        raise NotFoundError(detail="Profile not found")
+    return Response(
+        profile,
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+    )
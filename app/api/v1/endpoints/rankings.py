@@ -1,13 +1,35 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Annotated
 
-from app import cache, schemas
+from fastapi import APIRouter, Depends, Query, Response
+from redis.asyncio import Redis
+
+from app import schemas
+from app.api import deps
 from app.services import rankings
 
 router = APIRouter()
 
 
-@router.get("/")
-async def get_rankings() -> list[schemas.Ranking]:
-    if data := await cache.get("rankings"):
-        return schemas.RankingListAdapter.validate_json(data)
-    return await rankings.ranking_list()
+@router.get("/", response_model=list[schemas.Ranking])
+async def get_rankings(client: Redis = Depends(deps.get_redis_client)) -> Response:
+    if not (data := await rankings.rankings_json(client)):
+        data = schemas.RankingListAdapter.dump_json(await rankings.ranking_list())
+    return Response(content=data, media_type="application/json")
+
+
+@router.get("/history/{team_id}")
+async def get_ranking_history(
+    team_id: int,
+    start: Annotated[
+        datetime | None, Query(description="Start of the range; the entry in effect then is included")
+    ] = None,
+    end: Annotated[datetime | None, Query(description="End of the range, inclusive")] = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.RankingHistory:
+    return await rankings.ranking_history(team_id, client, start, end)
+
+
+@router.get("/{region}", response_model=schemas.Ranking)
+async def get_region_rankings(region: str, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    return Response(content=await rankings.region_ranking_json(region, client), media_type="application/json")
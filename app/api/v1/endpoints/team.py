@@ -1,11 +1,60 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
 
 from app import schemas
-from app.services import team
+from app.api import deps
+from app.services import archive, batch, pagination, popularity, projection, team
 
 router = APIRouter()
 
 
+@router.get("/batch", response_class=StreamingResponse)
+async def get_teams_by_id(
+    ids: Annotated[str, Query(description="Comma-separated team IDs; each is streamed as an NDJSON line")],
+    client: Redis = Depends(deps.get_redis_client),
+) -> StreamingResponse:
+    ids_ = batch.parse_batch_ids(ids)
+    await popularity.record(popularity.TEAM, ids_, client)
+    return StreamingResponse(
+        batch.batch_lookup(ids_, team.team_cache_key, team.fetch_team_data, client),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/{team_id}/archive")
+async def get_team_archive(
+    team_id: str,
+    limit: deps.ArchiveLimit = 50,
+    cursor: deps.ArchiveCursor = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> schemas.CursorPage[schemas.CompletedMatch]:
+    return await archive.archive_page(team.completed_archive(team_id), limit, cursor, client)
+
+
 @router.get("/{team_id}", response_model=schemas.Team)
-async def get_team_by_id(team_id: str) -> schemas.Team:
-    return await team.get_team_data(team_id)
+async def get_team_by_id(
+    team_id: str,
+    completed_pages: Annotated[
+        int,
+        Query(description="Pages of completed matches to include (50 per page); <= 0 fetches all."),
+    ] = 1,
+    stream: Annotated[
+        bool,
+        Query(description="Stream NDJSON: the team without `completed`, then one match per line as pages arrive."),
+    ] = False,
+    fields: deps.Fields = None,
+    client: Redis = Depends(deps.get_redis_client),
+) -> Response:
+    # Counted here rather than in the service, so jobs and /ask tool calls don't count as reads.
+    await popularity.record(popularity.TEAM, [team_id], client)
+    if stream:
+        return StreamingResponse(
+            await pagination.stream_ndjson(team.stream_team_data(team_id, completed_pages=completed_pages)),
+            media_type="application/x-ndjson",
+        )
+    projection.check(schemas.Team, fields)
+    result = await team.get_team_data(team_id, completed_pages=completed_pages)
+    return Response(content=projection.dump(result, fields), media_type="application/json")
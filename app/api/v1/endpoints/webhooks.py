@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Response, status
+from redis.asyncio import Redis
+
+from app import schemas
+from app.api import deps
+from app.services import webhooks
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_webhooks(client: Redis = Depends(deps.get_redis_client)) -> list[schemas.Webhook]:
+    return await webhooks.list_webhooks(client)
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_webhook(
+    webhook: schemas.WebhookCreate, client: Redis = Depends(deps.get_redis_client)
+) -> schemas.Webhook:
+    return await webhooks.create_webhook(client, webhook)
+
+
+@router.delete("/{webhook_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_webhook(webhook_id: str, client: Redis = Depends(deps.get_redis_client)) -> Response:
+    await webhooks.delete_webhook(client, webhook_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,8 +1,11 @@
 import logging
+import time
 
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 from redis.exceptions import RedisError
 
+from ..core import metrics
 from ..core.config import settings
 from ..core.connections import redis_pool
 
@@ -30,7 +33,7 @@ async def get(key: str, client: redis.Redis | None = None) -> bytes | None:
     if need_client := client is None:
         client = get_client()
     try:
-        return await client.get(key)  # type: ignore
+        value = await client.get(key)  # type: ignore
     except RedisError:
         # Cache is best-effort: a Redis outage must degrade to a live fetch, not 500 the request.
         logging.warning("cache read failed for key=%s; treating as miss", key, exc_info=True)
@@ -38,9 +41,43 @@ async def get(key: str, client: redis.Redis | None = None) -> bytes | None:
     finally:
         if need_client:
             await client.aclose()
+    metrics.cache_lookup(key, value is not None)
+    return value
 
 
-async def set(key: str, value: str, ttl: int = 60, client: redis.Redis | None = None) -> None:
+async def mget(keys: list[str], client: redis.Redis | None = None) -> list | None:
+    """
+    Function to get several values from the cache in one round trip
+
+    :param keys: The keys to retrieve
+    :param client: A pre-existing redis client
+    :return: The values from redis, ``None`` for missing keys
+    """
+    if not settings.ENABLE_CACHE or not keys:
+        return None
+
+    if need_client := client is None:
+        client = get_client()
+    try:
+        values = await client.mget(keys)  # type: ignore
+    except RedisError:
+        logging.warning("cache read failed for keys=%s; treating as miss", keys, exc_info=True)
+        return None
+    finally:
+        if need_client:
+            await client.aclose()
+    for key, value in zip(keys, values):
+        metrics.cache_lookup(key, value is not None)
+    return values
+
+
+def stale_key(key: str) -> str:
+    return f"stale:{key}"
+
+
+async def set(
+    key: str, value: str, ttl: int = 60, client: redis.Redis | None = None, stale_ttl: int | None = None
+) -> None:
     """
     Function to set a value in the cache
 
@@ -48,6 +85,7 @@ async def set(key: str, value: str, ttl: int = 60, client: redis.Redis | None =
     :param value: The value to set in redis
     :param ttl: The number of seconds before the item should expire
     :param client: A pre-existing redis client
+    :param stale_ttl: If given, also keep a last-known-good copy for this many seconds, see :func:`get_stale`
     :return: Nothing
     """
     if not settings.ENABLE_CACHE:
@@ -56,7 +94,12 @@ async def set(key: str, value: str, ttl: int = 60, client: redis.Redis | None =
     if need_client := client is None:
         client = get_client()
     try:
-        return await client.set(key, value, ttl)  # type: ignore
+        if stale_ttl is None:
+            return await client.set(key, value, ttl)  # type: ignore
+        pipeline = client.pipeline(transaction=False)
+        pipeline.set(key, value, ex=ttl)
+        add_stale(pipeline, key, value, stale_ttl)
+        await pipeline.execute()
     except RedisError:
         # Cache is best-effort: a failed write must not break the request path.
         logging.warning("cache write failed for key=%s; skipping", key, exc_info=True)
@@ -66,6 +109,45 @@ async def set(key: str, value: str, ttl: int = 60, client: redis.Redis | None =
             await client.aclose()
 
 
+def add_stale(pipeline: Pipeline, key: str, value: str | bytes, ttl: int) -> None:
+    """
+    Function to add keeping a last-known-good copy of a value to a pipeline, see :func:`get_stale`
+
+    :param pipeline: The pipeline
+    :param key: The key of the value
+    :param value: The value
+    :param ttl: How long to keep the copy for
+    :return: Nothing
+    """
+    pipeline.hset(stale_key(key), mapping={"value": value, "time": int(time.time())})
+    pipeline.expire(stale_key(key), ttl)
+
+
+async def get_stale(key: str, client: redis.Redis | None = None) -> tuple[bytes, int] | None:
+    """
+    Function to get the last-known-good copy of a value, kept by :func:`set` past the value's own expiry
+
+    :param key: The key of the value
+    :param client: A pre-existing redis client
+    :return: The value and its age in seconds, or ``None`` if no copy is kept
+    """
+    if not settings.ENABLE_CACHE:
+        return None
+
+    if need_client := client is None:
+        client = get_client()
+    try:
+        if not (stale := await client.hgetall(stale_key(key))):  # type: ignore
+            return None
+        return stale[b"value"], max(0, int(time.time()) - int(stale[b"time"]))
+    except RedisError:
+        logging.warning("cache read failed for key=%s; treating as miss", stale_key(key), exc_info=True)
+        return None
+    finally:
+        if need_client:
+            await client.aclose()
+
+
 async def hset(name: str, mapping: dict, client: redis.Redis | None = None) -> int | None:
     """
     Function to set a value in the cache
@@ -127,3 +209,30 @@ async def hmget(name: str, keys: list[str], client: redis.Redis | None = None) -
     finally:
         if need_client:
             await client.aclose()
+
+
+async def zincrby(name: str, members: list[str], client: redis.Redis | None = None) -> None:
+    """
+    Function to add one to the score of each of several sorted set members, in one round trip
+
+    :param name: The sorted set's name
+    :param members: The members
+    :param client: A pre-existing redis client
+    :return: Nothing
+    """
+    if not settings.ENABLE_CACHE or not members:
+        return None
+
+    if need_client := client is None:
+        client = get_client()
+    try:
+        pipeline = client.pipeline(transaction=False)
+        for member in members:
+            pipeline.zincrby(name, 1, member)
+        await pipeline.execute()
+    except RedisError:
+        # Like other cache writes, this is best-effort and must not break the request path.
+        logging.warning("cache write failed for key=%s; skipping", name, exc_info=True)
+    finally:
+        if need_client:
+            await client.aclose()
@@ -74,6 +74,42 @@ class SearchCategory(str, Enum):
     SERIES = "series"
 
 
+class MatchSection(str, Enum):
+    TEAMS = "teams"
+    EVENT = "event"
+    VIDEOS = "videos"
+    MAPS = "maps"
+    ROUNDS = "rounds"
+    SCOREBOARD = "scoreboard"
+    H2H = "h2h"
+
+
+ALL_MATCH_SECTIONS = frozenset(MatchSection)
+
+
+class JobKind(str, Enum):
+    PLAYER = "player"
+    TEAM = "team"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    FAILED = "failed"
+
+
+class WebhookEventType(str, Enum):
+    MATCH = "match"
+    EVENT = "event"
+
+
+class UpstreamPriority(str, Enum):
+    INTERACTIVE = "interactive"
+    AGENT = "agent"
+    BACKGROUND = "background"
+
+
 # Hard cap on the maximum number of pages fetched in any pagination mode.
 # Bounded mode: pages are clamped to min(param, MAX_PAGINATION_PAGES).
 # Full-history mode (param <= 0): crawl stops after this many total pages.
@@ -81,8 +117,13 @@ MAX_PAGINATION_PAGES = 50
 
 # Timeouts and TTLs (in seconds)
 # TTLs should be >= 2× cron interval to survive a missed run
-REQUEST_TIMEOUT = 60.0
-CACHE_TTL_RANKINGS = 3600  # 1 hour (cron: every 30 min)
+# How long to wait on VLR for each step of a request (connecting, or the next chunk of a response). Failures are
+# retried, so a stuck attempt gives up sooner than a whole request used to.
+REQUEST_TIMEOUT = 20.0
+# Rankings are cached per region and kept as last-known-good well past their refresh interval, so
+# a region that keeps failing keeps serving its previous ranking instead of dropping out.
+CACHE_TTL_RANKINGS = 604800  # 7 days
+RANKINGS_REFRESH_INTERVAL = 1800  # 30 minutes per region (cron: every 5 min, so failed regions retry soon)
 CACHE_TTL_MATCHES = 600  # 10 minutes (cron: every 5 min)
 CACHE_TTL_EVENTS = 3600  # 1 hour (cron: every 30 min)
 CACHE_TTL_NEWS = 3600  # 1 hour (cron: every 30 min)
@@ -92,3 +133,121 @@ CACHE_TTL_STANDINGS = 90000  # 25 hours (cron: daily at midnight)
 # single agent run and rapid repeats, without serving stale data.
 CACHE_TTL_TEAM = 60  # 1 minute
 CACHE_TTL_PLAYER = 60  # 1 minute
+# Match detail pages are live-fetched too; only complete (all-section) results are cached.
+CACHE_TTL_MATCH = 60  # 1 minute
+
+# The most requested teams and players are re-scraped every 5 minutes (see app/services/prewarm.py), and cached
+# for longer than the by-id TTLs above. Request counts decay on every run, so popularity follows recent reads,
+# and only the top of each count is kept.
+CACHE_TTL_PREWARMED = 600  # 10 minutes (cron: every 5 min)
+POPULARITY_DECAY = 0.9
+POPULARITY_KEEP = 1000
+# Upstream requests a refresh takes: a team's profile, upcoming and completed matches; a player's profile and matches.
+PREWARM_COST_TEAM = 3
+PREWARM_COST_PLAYER = 2
+
+# Upcoming match notifications: matches starting within the window are notified once, which is remembered for
+# longer than they stay in it. FCM takes at most 500 messages per request.
+NOTIFICATION_WINDOW = 900  # 15 minutes (cron: every 15 min)
+NOTIFICATION_SENT_TTL = 1800  # 30 minutes
+FCM_BATCH_SIZE = 500
+
+# Webhooks get the match and event changes the crons find, batched per endpoint and run, as jobs on the arq worker.
+# A failed delivery is retried with exponential backoff (5s, 10s, 20s, ...); a process sends at most
+# WEBHOOK_CONCURRENCY deliveries to the same endpoint at once, retrying any more the same way.
+WEBHOOK_TIMEOUT = 10.0
+WEBHOOK_MAX_TRIES = 6
+WEBHOOK_RETRY_DELAY = 5  # seconds, doubled on every retry
+WEBHOOK_CONCURRENCY = 2
+
+# Upstream requests share this many slots. Each lane (weight, cap) gets slots in proportion to its weight while
+# others wait, and never more than its cap, so crons and crawls can't crowd out API requests.
+UPSTREAM_CONCURRENCY = 20
+UPSTREAM_LANES = {
+    UpstreamPriority.INTERACTIVE: (8, 20),
+    UpstreamPriority.AGENT: (3, 10),
+    UpstreamPriority.BACKGROUND: (1, 8),
+}
+
+# Failed GETs upstream are retried after a jittered, doubling backoff. A GET that takes longer than its host's
+# p95 (once enough are timed) gets a duplicate, and whichever answers first is used. After enough failures in a
+# row, a host's circuit opens: requests to it fail right away (and cached pages are served stale) until the
+# cooldown has passed and a probe request succeeds.
+UPSTREAM_RETRIES = 2
+UPSTREAM_RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+UPSTREAM_HEDGE_MIN_DELAY = 1.0  # seconds
+UPSTREAM_HEDGE_MIN_SAMPLES = 20
+UPSTREAM_LATENCY_WINDOW = 200
+UPSTREAM_BREAKER_THRESHOLD = 5
+UPSTREAM_BREAKER_COOLDOWN = 30  # seconds
+# How long an API request may spend waiting on VLR, by path prefix (the longest match wins), and for any other
+# route. Clients can ask for a different budget, up to the max, with an `X-Request-Timeout` header (in seconds).
+# Past it, upstream calls fail with a 504 instead of carrying on after the client has likely given up.
+REQUEST_DEADLINE = 30.0
+REQUEST_DEADLINE_MAX = 300.0
+ROUTE_DEADLINES = {
+    # Full histories and batches take many pages/scrapes.
+    "/api/v1/team/": 120.0,
+    "/api/v1/player/": 120.0,
+    "/api/v1/matches/batch": 120.0,
+    "/api/v1/matches/results": 120.0,
+    "/api/v1/events/": 60.0,
+    "/api/v1/ask": 120.0,
+}
+# Admission control, per process: how many requests may scrape on a cache miss (or run an /ask question) at once,
+# and how many more may queue for a slot. Past that they get a 503 with Retry-After straight away.
+SCRAPE_CONCURRENCY = 16
+SCRAPE_QUEUE = 32
+ASK_CONCURRENCY = 4
+ASK_QUEUE = 8
+# Last-known-good copies of by-id pages and listings, served while VLR is unreachable.
+CACHE_TTL_STALE = 86400  # 1 day
+
+# Batch lookups: IDs accepted per request, and how many misses are scraped at once.
+MAX_BATCH_IDS = 50
+MAX_CONCURRENT_BATCH_FETCHES = 5
+
+# Archived listings (match histories, results and news) are paged with opaque cursors. Their newest
+# page is re-checked once it is older than the head TTL; older pages are only fetched upstream the
+# first time a cursor reaches them, and then read from the archive until it expires.
+ARCHIVE_HEAD_TTL = 300  # 5 minutes
+CACHE_TTL_ARCHIVE = 86400  # 1 day
+MAX_ARCHIVE_LIMIT = 100
+
+# Every write of the match list gets a version and a changelog entry, so clients can fetch deltas.
+# Older versions, or gaps longer than the cap, fall back to the full list.
+CACHE_TTL_MATCH_CHANGELOG = 3600  # 1 hour
+MAX_MATCH_CHANGELOG_SPAN = 500  # versions
+
+# Live matches are polled separately from the match list. The budget caps the upstream requests
+# the poller may spend per minute; with more live matches than fit, the least recently polled go first.
+LIVE_POLL_INTERVAL = 10  # seconds
+LIVE_POLL_BUDGET = 60  # requests per minute
+LIVE_MATCH_STATUSES = frozenset({MatchStatus.LIVE, MatchStatus.ONGOING})
+# Match change streams: events buffered per connection (the oldest are dropped beyond this), and how
+# often an idle SSE connection gets a keep-alive comment.
+MATCH_STREAM_QUEUE_SIZE = 64
+MATCH_STREAM_KEEPALIVE = 15  # seconds
+# A map is decided at 13 rounds with a two-round lead (overtime continues until then).
+ROUNDS_TO_WIN_MAP = 13
+
+# Full-history scrapes can run as jobs on the arq worker. A running job's state lapses after the timeout
+# unless a page is read (so a dead worker's job can be resubmitted); a finished job's state and result are
+# kept for reuse. Waiters fall back to polling the state at the poll interval.
+JOB_TIMEOUT = 600  # 10 minutes
+CACHE_TTL_JOB = 3600  # 1 hour
+JOB_POLL_INTERVAL = 5  # seconds
+
+# Every process running an arq worker runs jobs, but only the holder of the leader lease runs the crons (on
+# their own queue, so the other workers don't pick them up). The leader renews the lease well within its TTL;
+# if it stops doing so, another worker takes over within about the TTL.
+LEADER_LEASE_KEY = "arq:leader"
+LEADER_LEASE_TTL = 30  # seconds
+LEADER_LEASE_RENEW_INTERVAL = 10  # seconds
+CRON_QUEUE_NAME = "arq:queue:cron"
+
+# Request profiles (see app/core/profiling.py): how often the stack is sampled, at most how many samples a profile
+# takes (so a long response is profiled for its first 30 seconds), and how long profiles are kept.
+PROFILE_INTERVAL = 0.005  # seconds
+PROFILE_MAX_SAMPLES = 6000
+CACHE_TTL_PROFILE = 86400  # 1 day
@@ -0,0 +1,120 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+import app.constants as constants
+from app.core import deadline
+from app.exceptions import OverloadedError
+
+
+class Admission:
+    """
+    A limit on how many requests do a kind of expensive work at once, with a bounded queue for the rest
+
+    Once the queue is full, requests are turned away right away with a 503 (see :class:`OverloadedError`) instead of
+    piling up, as are queued requests whose deadline runs out before they get a slot.
+    """
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        # A moving average of how long a slot is held, to tell turned away requests when to come back.
+        self.hold = 1.0
+
+    def retry_after(self) -> int:
+        """
+        Function to estimate how long until a request turned away now would get a slot
+
+        :return: The seconds, for a ``Retry-After`` header
+        """
+        return max(1, math.ceil(self.hold * (len(self.waiters) + 1) / self.limit))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Function to do the work within the context in a slot, waiting in the queue for one if need be
+
+        :return: Nothing
+        """
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+        elif len(self.waiters) >= self.queue:
+            raise OverloadedError(retry_after=self.retry_after())
+        else:
+            await self._wait()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.hold += (time.monotonic() - start - self.hold) / 10
+            self._release()
+
+    async def _wait(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            async with asyncio.timeout(deadline.remaining()):
+                await waiter
+        except (asyncio.CancelledError, TimeoutError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # It was handed a slot just as it gave up; pass it on.
+                self._release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            if isinstance(exc, TimeoutError):
+                raise OverloadedError(retry_after=self.retry_after()) from exc
+            raise
+
+    def _release(self) -> None:
+        # The slot goes straight to the next waiter, so a newcomer can't take it first.
+        while self.waiters:
+            if not (waiter := self.waiters.popleft()).done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+# Scrapes of by-id pages on a cache miss (team, player, match and event pages), and /ask questions. Each process
+# has its own limits.
+SCRAPES = Admission(constants.SCRAPE_CONCURRENCY, constants.SCRAPE_QUEUE)
+ASK = Admission(constants.ASK_CONCURRENCY, constants.ASK_QUEUE)
+
+# The limit the current request's scrapes go through, set by the routes that scrape on a miss. Unset elsewhere,
+# e.g. on the arq worker, where scrapes are bounded by its job concurrency instead.
+_gate: ContextVar[Admission | None] = ContextVar("admission_gate", default=None)
+# Whether the current task already holds a slot, so nested scrapes don't wait on a second one.
+_admitted: ContextVar[bool] = ContextVar("admitted", default=False)
+
+
+def gate(admission: Admission) -> None:
+    """
+    Function to put the rest of the current request's scrapes through an admission limit
+
+    :param admission: The limit
+    :return: Nothing
+    """
+    _gate.set(admission)
+
+
+@asynccontextmanager
+async def admit() -> AsyncIterator[None]:
+    """
+    Function to scrape within the context in a slot of the current request's admission limit, if it has one
+
+    :return: Nothing
+    """
+    if (admission := _gate.get()) is None or _admitted.get():
+        yield
+        return
+    async with admission.slot():
+        token = _admitted.set(True)
+        try:
+            yield
+        finally:
+            _admitted.reset(token)
@@ -13,9 +13,31 @@ class Settings(BaseSettings):
 
     ENABLE_CACHE: bool = False
     ENABLE_ID_MAP_DB: bool = False
+    # Run the arq worker (jobs, and crons while leader) in the API processes. Turn off when `python -m app.worker`
+    # runs them instead.
+    ENABLE_API_WORKER: bool = True
+    # Port for the standalone worker to serve its Prometheus metrics on; the API serves them at /metrics.
+    WORKER_METRICS_PORT: int | None = None
+    # Profile requests sent with the internal API key in `X-Profile`, and this fraction of all others (see
+    # app/core/profiling.py). Profiles are kept in the cache.
+    ENABLE_PROFILING: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0
 
     GOOGLE_APPLICATION_CREDENTIALS: str | None = None
 
+    # Bounds (in seconds) on how long the crons leave each listing between refreshes; within them, the
+    # interval follows the match calendar (see app/services/schedule.py).
+    MATCHES_REFRESH_MIN: int = 60
+    MATCHES_REFRESH_MAX: int = 1800
+    EVENTS_REFRESH_MIN: int = 600
+    EVENTS_REFRESH_MAX: int = 7200
+    NEWS_REFRESH_MIN: int = 900
+    NEWS_REFRESH_MAX: int = 7200
+    # How many of the most requested teams and players (each) are kept warm, and the upstream requests that may
+    # take per run (see app/services/prewarm.py).
+    PREWARM_TOP_N: int = 20
+    PREWARM_BUDGET: int = 60
+
     TIMEZONE: str
 
     LLM_API_KEY: str | None = None
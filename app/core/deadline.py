@@ -0,0 +1,112 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+import httpx
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import app.constants as constants
+from app.exceptions import DeadlineExceededError
+
+# When the current request's budget for upstream calls runs out, in monotonic time. Unset outside of API requests
+# (e.g. on the arq worker), where upstream calls are only bounded by REQUEST_TIMEOUT.
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+def budget(path: str, header: str | None) -> float:
+    """
+    Function to work out how long a request may spend on upstream calls
+
+    :param path: The request's path
+    :param header: The ``X-Request-Timeout`` header, if the client sent one
+    :return: The budget in seconds: the header's (up to ``REQUEST_DEADLINE_MAX``) or the route's default
+    """
+    try:
+        if header is not None and (seconds := float(header)) > 0:
+            return min(seconds, constants.REQUEST_DEADLINE_MAX)
+    except ValueError:
+        pass
+    prefixes = [prefix for prefix in constants.ROUTE_DEADLINES if path.startswith(prefix)]
+    return constants.ROUTE_DEADLINES[max(prefixes, key=len)] if prefixes else constants.REQUEST_DEADLINE
+
+
+def remaining() -> float | None:
+    """
+    Function to get what is left of the current request's budget
+
+    :return: The seconds left, or ``None`` if there is no deadline
+    """
+    if (deadline := _deadline.get()) is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@asynccontextmanager
+async def limit(request: httpx.Request) -> AsyncIterator[None]:
+    """
+    Function to bound an upstream call by what is left of the current request's budget
+
+    Its connect/read/write/pool timeouts are cut down to the budget as well, so reading the body after the context
+    is exited still stops in time.
+
+    :param request: The upstream request
+    :return: Nothing
+    """
+    if (left := remaining()) is None:
+        yield
+        return
+    if left <= 0:
+        raise DeadlineExceededError
+    timeouts = request.extensions.get("timeout", {})
+    request.extensions["timeout"] = {
+        name: left if seconds is None else min(seconds, left) for name, seconds in timeouts.items()
+    }
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except TimeoutError as exc:
+        raise DeadlineExceededError from exc
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that gives each HTTP request a budget for its upstream calls (see :func:`budget`), and cancels
+    the request if the client disconnects before it is answered, so a dead request stops using upstream capacity
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        seconds = budget(scope["path"], Headers(scope=scope).get("X-Request-Timeout"))
+        token = _deadline.set(time.monotonic() + seconds)
+
+        # The client's messages are read here, and handed on to the app, to notice a disconnect while it works.
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        task = asyncio.create_task(self.app(scope, messages.get, send))
+
+        async def watch() -> None:
+            while True:
+                messages.put_nowait(message := await receive())
+                if message["type"] == "http.disconnect":
+                    task.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await task
+        except asyncio.CancelledError:
+            # Only the client going away is swallowed; the server cancelling this request is passed on.
+            if asyncio.current_task().cancelling():  # type: ignore[union-attr]
+                raise
+        finally:
+            task.cancel()
+            watcher.cancel()
+            _deadline.reset(token)
@@ -0,0 +1,58 @@
+import os
+import secrets
+import socket
+
+from redis.asyncio import Redis
+
+# Extends the lease, but only for the holder that has it.
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Gives the lease up, but only for the holder that has it.
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class Lease:
+    """
+    A Redis lease that at most one process holds at a time, e.g. to elect a leader
+
+    The lease lapses unless its holder renews it within ``ttl`` seconds, so a holder that dies (or can't reach
+    Redis) loses it, and another process can take it over.
+    """
+
+    __slots__ = ("key", "ttl", "token")
+
+    def __init__(self, key: str, ttl: int):
+        self.key = key
+        self.ttl = ttl
+        # Unique to this holder, and says which process it is when inspecting the key.
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+    async def acquire(self, client: Redis) -> bool:
+        """
+        Function to take the lease if it is free, or renew it if this holder has it
+
+        :param client: The redis client
+        :return: Whether this holder has the lease
+        """
+        if await client.eval(_RENEW, 1, self.key, self.token, self.ttl * 1000):
+            return True
+        return bool(await client.set(self.key, self.token, nx=True, ex=self.ttl))
+
+    async def release(self, client: Redis) -> None:
+        """
+        Function to give the lease up, if this holder has it
+
+        :param client: The redis client
+        :return: Nothing
+        """
+        await client.eval(_RELEASE, 1, self.key, self.token)
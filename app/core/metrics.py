@@ -0,0 +1,163 @@
+import functools
+import re
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterator, ParamSpec, TypeVar
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from pydantic import BaseModel
+
+from app.utils import url_pattern
+
+P = ParamSpec("P")
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+# Parsing and (de)serializing a page takes anywhere from well under a millisecond to about a second.
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+UPSTREAM_SECONDS = Histogram(
+    "vlr_upstream_request_seconds",
+    "Time from getting a slot until the response headers of each attempt (retries and hedges too) at a request to VLR,"
+    " by URL pattern",
+    ["pattern", "status"],
+)
+UPSTREAM_BYTES = Counter("vlr_upstream_bytes", "Response bytes downloaded from VLR, by URL pattern", ["pattern"])
+PARSE_SECONDS = Histogram("vlr_parse_seconds", "Time spent in each page parser", ["parser"], buckets=_FAST_BUCKETS)
+PYDANTIC_SECONDS = Histogram(
+    "vlr_pydantic_seconds",
+    "Time spent validating and serializing models",
+    ["model", "operation"],
+    buckets=_FAST_BUCKETS,
+)
+CACHE_LOOKUPS = Counter("vlr_cache_lookups", "Cache lookups by key family, and whether they hit", ["family", "result"])
+CRON_SECONDS = Histogram(
+    "vlr_cron_run_seconds", "Duration of each cron run", ["cron", "outcome"], buckets=(1, 5, 15, 30, 60, 120, 300, 600)
+)
+CRON_LAST_SUCCESS = Gauge("vlr_cron_last_success_timestamp_seconds", "When each cron last ran successfully", ["cron"])
+AGENT_TOOL_SECONDS = Histogram("vlr_agent_tool_seconds", "Latency of /ask tool calls", ["tool", "outcome"])
+
+# The family of a cache key is its leading word: `team:2:1` → `team`, `standings_2024` → `standings`.
+_FAMILY = re.compile(r"[a-z]+")
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str) -> Iterator[None]:
+    """
+    Function to observe how long the work within the context takes
+
+    :param histogram: The histogram to observe it in
+    :param labels: Its label values
+    :return: Nothing
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+def parser(function: Callable[P, T]) -> Callable[P, T]:
+    """
+    Function to decorate a page parser, to time each call as ``{module}.{function}``
+
+    :param function: The parser
+    :return: The timed parser
+    """
+    child = PARSE_SECONDS.labels(f"{function.__module__.rpartition('.')[2]}.{function.__name__}")
+
+    @functools.wraps(function)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        with child.time():
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def validate(model: type[M], data: dict | str | bytes) -> M:
+    """
+    Function to validate a model, timing it
+
+    :param model: The model
+    :param data: Parsed data, or JSON (e.g. from the cache)
+    :return: The model instance
+    """
+    with timed(PYDANTIC_SECONDS, model.__name__, "validate"):
+        return model.model_validate(data) if isinstance(data, dict) else model.model_validate_json(data)
+
+
+def serialize(value: BaseModel) -> str:
+    """
+    Function to serialize a model to JSON, timing it
+
+    :param value: The model instance
+    :return: The JSON
+    """
+    with timed(PYDANTIC_SECONDS, type(value).__name__, "serialize"):
+        return value.model_dump_json()
+
+
+def cron(function: Callable[[dict], Awaitable[None]]) -> Callable[[dict], Awaitable[None]]:
+    """
+    Function to decorate a cron, to time each run and record when it last succeeded
+
+    :param function: The cron
+    :return: The timed cron
+    """
+
+    @functools.wraps(function)
+    async def wrapper(ctx: dict) -> None:
+        start = time.perf_counter()
+        try:
+            await function(ctx)
+        except BaseException:
+            CRON_SECONDS.labels(function.__name__, "error").observe(time.perf_counter() - start)
+            raise
+        CRON_SECONDS.labels(function.__name__, "ok").observe(time.perf_counter() - start)
+        CRON_LAST_SUCCESS.labels(function.__name__).set_to_current_time()
+
+    return wrapper
+
+
+def cache_lookup(key: str, hit: bool) -> None:
+    """
+    Function to count a cache lookup
+
+    :param key: The key looked up
+    :param hit: Whether it was cached
+    :return: Nothing
+    """
+    family = match[0] if (match := _FAMILY.match(key)) else "other"
+    CACHE_LOOKUPS.labels(family, "hit" if hit else "miss").inc()
+
+
+def upstream_response(request: httpx.Request, response: httpx.Response, seconds: float) -> None:
+    """
+    Function to record an upstream response, counting the bytes of its body as it is read
+
+    :param request: The request
+    :param response: Its response, with the body not read yet
+    :param seconds: How long it took to get
+    :return: Nothing
+    """
+    # Grouped like Sentry's scraping errors (see app.utils.before_send), to keep the label set small.
+    pattern = url_pattern(str(request.url))
+    UPSTREAM_SECONDS.labels(pattern, str(response.status_code)).observe(seconds)
+    response.stream = _CountedStream(response.stream, UPSTREAM_BYTES.labels(pattern))
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """A response body that counts its bytes as they are read."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, counter: Counter):
+        self.stream = stream
+        self.counter = counter
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            self.counter.inc(len(chunk))
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
@@ -0,0 +1,187 @@
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from types import FrameType
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import app.constants as constants
+from app import cache
+from app.core.config import settings
+
+
+class Sampler:
+    """
+    A statistical profiler for one thread: a background thread snapshots its stack at an interval, and each
+    snapshot is weighted by the time since the last, so the result shows where the wall-clock time went
+
+    Profiling the event loop's thread covers every coroutine it runs, so a busy server's profile includes
+    whatever else it was doing at the time. Sampling stops by itself once ``max_samples`` are taken.
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float = constants.PROFILE_INTERVAL,
+        max_samples: int = constants.PROFILE_MAX_SAMPLES,
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_samples = max_samples
+        self.frames: dict[tuple[str, str, int], int] = {}
+        self.samples: list[list[int]] = []
+        self.weights: list[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def __enter__(self) -> "Sampler":
+        self.start = self.last = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    @property
+    def full(self) -> bool:
+        return len(self.samples) >= self.max_samples
+
+    def stop(self) -> None:
+        """
+        Function to stop sampling, if it hasn't already been
+
+        :return: Nothing
+        """
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        # A full profile ends at its last sample, not whenever it was noticed to be full.
+        self.end = self.last if self.full else time.perf_counter()
+
+    def _run(self) -> None:
+        while not self.full and not self._stop.wait(self.interval):
+            if (frame := sys._current_frames().get(self.thread_id)) is None:
+                return
+            now = time.perf_counter()
+            self.samples.append(self._stack(frame))
+            self.weights.append(now - self.last)
+            self.last = now
+
+    def _stack(self, frame: FrameType | None) -> list[int]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+            stack.append(self.frames.setdefault(key, len(self.frames)))
+            frame = frame.f_back
+        # Outermost first, as speedscope expects.
+        return stack[::-1]
+
+    def speedscope(self, name: str) -> dict:
+        """
+        Function to export the profile in speedscope's format (https://www.speedscope.app)
+
+        :param name: What was profiled
+        :return: The profile
+        """
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "vlrgg-scraper",
+            "shared": {
+                "frames": [{"name": function, "file": file, "line": line} for function, file, line in self.frames]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.end - self.start,
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+def profile_key(id: str) -> str:
+    """
+    Function to get the cache key of a stored profile
+
+    :param id: The profile's ID
+    :return: The key
+    """
+    return f"profile:{id}"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request end to end when it asks to be (with the internal API key in the
+    ``X-Profile`` header) or is picked by ``PROFILE_SAMPLE_RATE``, and stores the profile in the cache
+
+    The profile's ID is sent back in the ``X-Profile-Id`` header, to download it from the internal API. Only one
+    request is profiled at a time per process; others asking meanwhile are served without. Only added when
+    ``ENABLE_PROFILING`` is set.
+
+    An event stream runs for as long as its client stays, so only what led up to it is profiled; any other response
+    is profiled up to the sampler's cap. Either way, the profile is stored (and the next request may be profiled) as
+    soon as sampling stops, not when the response ends.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope) or not self.lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        id = uuid.uuid4().hex
+        name = f"{scope['method']} {scope['path']}"
+        sampler = Sampler(threading.get_ident())
+        stored = False
+
+        async def store() -> None:
+            nonlocal stored
+            stored = True
+            sampler.stop()
+            self.lock.release()
+            await cache.set(profile_key(id), json.dumps(sampler.speedscope(name)), ttl=constants.CACHE_TTL_PROFILE)
+            logging.info("Profiled %s in %.3fs as %s", name, sampler.end - sampler.start, id)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = id
+            await send(message)
+            if not stored and (sampler.full or _is_event_stream(message)):
+                await store()
+
+        try:
+            with sampler:
+                await self.app(scope, receive, send_with_id)
+        except BaseException:
+            if not stored:
+                self.lock.release()
+            raise
+        if not stored:
+            await store()
+
+    @staticmethod
+    def _wanted(scope: Scope) -> bool:
+        if Headers(scope=scope).get("X-Profile") == settings.INTERNAL_API_KEY:
+            return True
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def _is_event_stream(message: Message) -> bool:
+    if message["type"] != "http.response.start":
+        return False
+    return Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream")
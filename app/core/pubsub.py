@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from redis.exceptions import RedisError
+
+from app.cache import get_client
+
+# Seconds to wait before resubscribing after the Redis connection drops
+_RECONNECT_DELAY = 1.0
+
+
+class Subscription:
+    """A subscriber's filter and its bounded queue of raw (still serialized) messages."""
+
+    __slots__ = ("accepts", "queue")
+
+    def __init__(self, accepts: Callable[[dict], bool], size: int):
+        self.accepts = accepts
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=size)
+
+
+class Broker:
+    """
+    Fan-out of a Redis pub/sub channel to in-process subscribers
+
+    A single Redis subscription is shared by every subscriber in the process, and only runs while
+    anyone is subscribed. Each message is decoded once to run the filters, and the original bytes are
+    queued as they are, so a connection holds at most ``queue_size`` references to shared messages.
+    A subscriber that falls behind loses its oldest messages rather than growing its queue.
+    """
+
+    def __init__(self, channel: str, queue_size: int = 64):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.subscriptions: set[Subscription] = set()
+        self._listener: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def subscribe(self, accepts: Callable[[dict], bool]) -> AsyncIterator[asyncio.Queue[bytes]]:
+        """
+        Function to subscribe to the channel for the duration of the context
+
+        :param accepts: Filter deciding which decoded messages this subscriber receives
+        :return: The subscriber's queue of raw messages
+        """
+        subscription = Subscription(accepts, self.queue_size)
+        self.subscriptions.add(subscription)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            yield subscription.queue
+        finally:
+            self.subscriptions.discard(subscription)
+            if not self.subscriptions:
+                await self.close()
+
+    def dispatch(self, data: bytes) -> None:
+        """
+        Function to hand a published message to every subscriber whose filter accepts it
+
+        :param data: The raw message
+        :return: Nothing
+        """
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logging.warning("Dropping malformed message on %s", self.channel)
+            return
+        for subscription in self.subscriptions:
+            if not subscription.accepts(message):
+                continue
+            if subscription.queue.full():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(data)
+
+    async def close(self) -> None:
+        """
+        Function to stop the shared Redis subscription
+
+        :return: Nothing
+        """
+        if (listener := self._listener) is None:
+            return
+        # Detached first, so a subscriber arriving while it winds down starts a new one instead of relying on it.
+        self._listener = None
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
+
+    async def _listen(self) -> None:
+        while True:
+            client = get_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(message["data"])
+            except RedisError:
+                logging.warning("Lost subscription to %s; resubscribing", self.channel, exc_info=True)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+            await asyncio.sleep(_RECONNECT_DELAY)
@@ -0,0 +1,98 @@
+import logging
+import os
+from pathlib import Path
+
+from rich.logging import RichHandler
+
+from app.core.config import settings
+from app.utils import before_send
+
+_GIT_DIR = Path(__file__).resolve().parents[2] / ".git"
+
+
+def _release() -> str | None:
+    """Git SHA for Sentry release tracking, read from the checkout rather than by running git"""
+    if release := os.environ.get("GIT_SHA"):
+        return release
+    try:
+        head = (_GIT_DIR / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head.removeprefix("ref: ")
+        if (path := _GIT_DIR / ref).is_file():
+            return path.read_text().strip()
+        # Refs that haven't changed since the last `git gc` only exist in packed-refs, as `<sha> <ref>` lines.
+        for line in (_GIT_DIR / "packed-refs").read_text().splitlines():
+            if line.endswith(f" {ref}"):
+                return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return None
+
+
+def _traces_sampler(sampling_context: dict) -> float:
+    """100% sampling for cron jobs, 8% for API requests. Respects parent sampling decisions."""
+    if (parent := sampling_context.get("parent_sampled")) is not None:
+        return 1.0 if parent else 0.0
+    if sampling_context.get("transaction_context", {}).get("op") == "queue.task.arq":
+        return 1.0
+    return 0.08
+
+
+def setup() -> None:
+    """
+    Function to set up logging, and Sentry if a DSN is defined in our environment, for the API or the worker
+    :return: Nothing
+    """
+    logging.basicConfig(
+        format="[%(levelname)s] (%(asctime)s) %(module)s:%(pathname)s:%(funcName)s:%(lineno)s:: %(message)s",
+        level=logging.INFO,
+        datefmt="%d-%m-%y %H:%M:%S",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+
+    # Sentry is only imported once a DSN is configured, so the API and worker start faster without it.
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+        from sentry_sdk.integrations.arq import ArqIntegration
+        from sentry_sdk.integrations.fastapi import FastApiIntegration
+        from sentry_sdk.integrations.httpx import HttpxIntegration
+        from sentry_sdk.integrations.starlette import StarletteIntegration
+
+        sentry_sdk.init(
+            dsn=settings.SENTRY_DSN,
+            release=_release(),
+            integrations=[
+                StarletteIntegration(),
+                FastApiIntegration(),
+                HttpxIntegration(),
+                ArqIntegration(),
+            ],
+            traces_sampler=_traces_sampler,
+            before_send=before_send,
+        )
+
+
+def set_tag(key: str, value: str) -> None:
+    """
+    Function to tag the current Sentry scope, if Sentry is set up
+    :param key: The tag
+    :param value: Its value
+    :return: Nothing
+    """
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+
+        sentry_sdk.set_tag(key, value)
+
+
+def set_transaction_name(name: str) -> None:
+    """
+    Function to name the current Sentry transaction, if Sentry is set up
+    :param name: The name
+    :return: Nothing
+    """
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+
+        sentry_sdk.get_current_scope().set_transaction_name(name)
@@ -0,0 +1,370 @@
+import asyncio
+import http
+import logging
+import math
+import random
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+import httpx
+
+import app.constants as constants
+from app.constants import UpstreamPriority
+from app.core import deadline, metrics
+from app.exceptions import UpstreamUnavailableError
+
+# The lane of the upstream requests made in this context. Requests default to interactive; the arq worker runs
+# its jobs and crons in the background lane, and the /ask agent its tool calls in the agent lane.
+_priority: ContextVar[UpstreamPriority] = ContextVar("upstream_priority", default=UpstreamPriority.INTERACTIVE)
+
+
+def set_priority(priority: UpstreamPriority) -> None:
+    """
+    Function to put the rest of the current task's upstream requests in a lane
+
+    :param priority: The lane
+    :return: Nothing
+    """
+    _priority.set(priority)
+
+
+@contextmanager
+def priority(priority: UpstreamPriority) -> Iterator[None]:
+    """
+    Function to put the upstream requests made within the context in a lane
+
+    :param priority: The lane
+    :return: Nothing
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class Scheduler:
+    """
+    Weighted fair queuing of upstream requests over a fixed number of slots, with a cap per lane
+
+    A request runs right away if a slot is free and its lane is under its cap. Otherwise it waits, and every freed
+    slot goes to the waiting lane with the earliest virtual start time: each grant advances its lane's virtual time
+    by ``1 / weight``, so busy lanes share slots in proportion to their weights, and a lane that was idle doesn't
+    get to make up for it.
+    """
+
+    def __init__(self, concurrency: int, lanes: dict[UpstreamPriority, tuple[int, int]]):
+        self.free = concurrency
+        self.weights = {lane: weight for lane, (weight, _) in lanes.items()}
+        self.caps = {lane: cap for lane, (_, cap) in lanes.items()}
+        self.active = dict.fromkeys(lanes, 0)
+        self.waiting: dict[UpstreamPriority, deque[asyncio.Future]] = {lane: deque() for lane in lanes}
+        self.finish = dict.fromkeys(lanes, 0.0)
+        self.clock = 0.0
+
+    async def acquire(self, lane: UpstreamPriority) -> None:
+        """
+        Function to wait for a slot
+
+        :param lane: The request's lane
+        :return: Nothing
+        """
+        if self.free and self.active[lane] < self.caps[lane] and not self.waiting[lane]:
+            self._grant(lane)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # It was granted a slot just as it was cancelled; hand it on.
+                self.release(lane)
+            elif waiter in self.waiting[lane]:
+                self.waiting[lane].remove(waiter)
+            raise
+
+    def release(self, lane: UpstreamPriority) -> None:
+        """
+        Function to give back a slot, handing it to the next waiting request
+
+        :param lane: The lane the slot was acquired in
+        :return: Nothing
+        """
+        self.active[lane] -= 1
+        self.free += 1
+        while self.free:
+            if not (ready := [name for name, waiters in self.waiting.items() if waiters and self._under_cap(name)]):
+                return
+            next_lane = min(ready, key=self._start)
+            if (waiter := self.waiting[next_lane].popleft()).cancelled():
+                continue
+            self._grant(next_lane)
+            waiter.set_result(None)
+
+    def queued(self, lane: UpstreamPriority) -> bool:
+        """
+        Function to check whether requests are waiting for a slot in a lane
+
+        :param lane: The lane
+        :return: Whether any are
+        """
+        return bool(self.waiting[lane])
+
+    def _under_cap(self, lane: UpstreamPriority) -> bool:
+        return self.active[lane] < self.caps[lane]
+
+    def _start(self, lane: UpstreamPriority) -> float:
+        return max(self.clock, self.finish[lane])
+
+    def _grant(self, lane: UpstreamPriority) -> None:
+        self.clock = self._start(lane)
+        self.finish[lane] = self.clock + 1 / self.weights[lane]
+        self.free -= 1
+        self.active[lane] += 1
+
+
+class _SlotStream(httpx.AsyncByteStream):
+    """A response body that gives its slot back once it is read or closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, scheduler: Scheduler, lane: UpstreamPriority):
+        self.stream = stream
+        self.scheduler = scheduler
+        self.lane: UpstreamPriority | None = lane
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if self.lane is not None:
+                self.scheduler.release(self.lane)
+                self.lane = None
+
+
+class PriorityTransport(httpx.AsyncBaseTransport):
+    """
+    A transport that runs each request in a slot of its context's lane, holding it until the body is read
+
+    How long the request waited for its slot is set in the response's ``queued_seconds`` extension.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: Scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        lane = _priority.get()
+        queued = time.monotonic()
+        await self.scheduler.acquire(lane)
+        queued = time.monotonic() - queued
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            self.scheduler.release(lane)
+            raise
+        if isinstance(response.stream, httpx.ByteStream):
+            # The body is already in memory (e.g. a mocked transport), so there is nothing left to wait for.
+            self.scheduler.release(lane)
+        else:
+            response.stream = _SlotStream(response.stream, self.scheduler, lane)
+        response.extensions["queued_seconds"] = queued
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class Latency:
+    """The recent response times of a host, to tell when a request is slower than usual."""
+
+    def __init__(self, window: int, min_samples: int):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def p95(self) -> float | None:
+        if len(self.samples) < self.min_samples:
+            return None
+        return sorted(self.samples)[int(len(self.samples) * 0.95)]
+
+
+class Breaker:
+    """
+    A circuit breaker: after ``threshold`` failures in a row it opens, failing requests right away, and after
+    ``cooldown`` seconds lets one request through to see whether the upstream is back
+    """
+
+    def __init__(self, threshold: int, cooldown: int):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+
+    def check(self) -> None:
+        """
+        Function to check that a request may be made
+
+        :return: Nothing
+        """
+        if self.opened_at is None:
+            return
+        if (waited := time.monotonic() - self.opened_at) < self.cooldown or self.probing:
+            raise UpstreamUnavailableError(retry_after=max(1, math.ceil(self.cooldown - waited)))
+        self.probing = True
+
+    def record(self, ok: bool) -> None:
+        """
+        Function to record how a request went
+
+        :param ok: Whether the upstream answered (with anything but a server error)
+        :return: Nothing
+        """
+        if ok:
+            self.failures, self.opened_at, self.probing = 0, None, False
+            return
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            if self.opened_at is None or self.probing:
+                logging.warning(f"Upstream failed {self.failures} times in a row, opening the circuit")
+            self.opened_at, self.probing = time.monotonic(), False
+
+    def abandon(self) -> None:
+        """
+        Function to record that a request ended without an answer either way, e.g. it was cancelled
+
+        :return: Nothing
+        """
+        # Let the next request probe instead.
+        self.probing = False
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    A transport that retries failed GETs with jittered backoff, sends a duplicate of a GET that is slower than the
+    host's p95, and stops requesting a host that keeps failing (see :class:`Breaker`)
+
+    Response times leave out any wait for a slot of ``scheduler``, and no duplicate is sent while requests are
+    waiting for one in the lane, as it would only add to the queue.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: Scheduler | None = None):
+        self.transport = transport
+        self.scheduler = scheduler
+        self.breakers: defaultdict[str, Breaker] = defaultdict(
+            lambda: Breaker(constants.UPSTREAM_BREAKER_THRESHOLD, constants.UPSTREAM_BREAKER_COOLDOWN)
+        )
+        self.latencies: defaultdict[str, Latency] = defaultdict(
+            lambda: Latency(constants.UPSTREAM_LATENCY_WINDOW, constants.UPSTREAM_HEDGE_MIN_SAMPLES)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self.breakers[request.url.host]
+        breaker.check()
+        # Retries and hedges all come out of the request's deadline, if it has one.
+        async with deadline.limit(request):
+            try:
+                return await self._retried(request, breaker)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+
+    async def _retried(self, request: httpx.Request, breaker: Breaker) -> httpx.Response:
+        # Only GETs are safe to send more than once.
+        retries = constants.UPSTREAM_RETRIES if request.method == "GET" else 0
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, constants.UPSTREAM_RETRY_BACKOFF * 2**attempt))
+            try:
+                response = await self._hedged(request)
+            except httpx.TransportError:
+                if attempt == retries:
+                    breaker.record(False)
+                    raise
+                continue
+            failed = response.status_code in _RETRY_STATUSES
+            if not failed or attempt == retries:
+                breaker.record(not failed)
+                return response
+            await response.aclose()
+
+    async def _hedged(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latencies[request.url.host].p95() if request.method == "GET" else None
+        first = asyncio.create_task(self._timed(request))
+        if delay is None:
+            return await first
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, constants.UPSTREAM_HEDGE_MIN_DELAY))
+            if not done and not (self.scheduler and self.scheduler.queued(_priority.get())):
+                tasks.add(asyncio.create_task(self._timed(request)))
+            # The first response wins; an error only counts once both attempts have failed.
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                if winner := next((task for task in done if not task.exception()), None):
+                    tasks.discard(winner)
+                    return winner.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+                tasks = pending
+        finally:
+            for task in tasks:
+                task.cancel()
+                task.add_done_callback(_close_response)
+
+    async def _timed(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        seconds = time.monotonic() - start - response.extensions.get("queued_seconds", 0.0)
+        self.latencies[request.url.host].add(seconds)
+        metrics.upstream_response(request, response, seconds)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_RETRY_STATUSES = frozenset(
+    {
+        http.HTTPStatus.INTERNAL_SERVER_ERROR,
+        http.HTTPStatus.BAD_GATEWAY,
+        http.HTTPStatus.SERVICE_UNAVAILABLE,
+        http.HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+
+# Responses of losing hedges being closed, kept referenced until they are.
+_closing: set[asyncio.Task] = set()
+
+
+def _close_response(task: asyncio.Task) -> None:
+    # A losing hedge that got a response anyway gives its connection (and its slot) back.
+    if not task.cancelled() and not task.exception():
+        closing = asyncio.ensure_future(task.result().aclose())
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Function to create the shared HTTP client, with its requests to VLR retried, hedged and scheduled by lane
+
+    Requests to other hosts (e.g. webhook deliveries) go straight out, so they neither take VLR's slots nor trip
+    its breakers, and aren't counted in its metrics.
+
+    :return: The client
+    """
+    scheduler = Scheduler(constants.UPSTREAM_CONCURRENCY, constants.UPSTREAM_LANES)
+    transport = ResilientTransport(PriorityTransport(httpx.AsyncHTTPTransport(), scheduler), scheduler)
+    # Matches vlr.gg and its subdomains.
+    return httpx.AsyncClient(timeout=constants.REQUEST_TIMEOUT, mounts={"all://*vlr.gg": transport})
@@ -1,25 +1,34 @@
 import asyncio
 import logging
+import sys
 from asyncio import Task
-from datetime import datetime, timedelta
-from typing import Any
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
 from zoneinfo import ZoneInfo
 
-from arq import cron
+from arq import cron, func
+from arq.connections import ArqRedis, RedisSettings, create_pool
+from arq.cron import CronJob
 from arq.worker import Worker, create_worker
-from firebase_admin import App, credentials, delete_app, get_app, initialize_app, messaging
-from sentry_sdk import get_current_scope
+from redis.exceptions import RedisError
 
-from app import schemas
+from app import cache, schemas
 from app import constants
-from app.constants import MatchStatus
 from app.core.config import settings
-from app.services import events, matches, news, rankings, standings
+from app.constants import UpstreamPriority
+from app.core import metrics, telemetry, upstream
+from app.core.lease import Lease
+from app.services import events, jobs, matches, news, prewarm, rankings, schedule, standings, webhooks
+
+if TYPE_CHECKING:
+    from firebase_admin import App
 
 _FCM_APP_NAME = "vlrgg-fcm"
 
 
-def _get_fcm_app() -> App:
+def _get_fcm_app() -> "App":
+    from firebase_admin import credentials, get_app, initialize_app
+
     try:
         return get_app(_FCM_APP_NAME)
     except ValueError:
@@ -37,6 +46,11 @@ def _get_fcm_app() -> App:
 
 
 async def _close_fcm_app() -> None:
+    if "firebase_admin" not in sys.modules:
+        # Never used, so there is nothing to close.
+        return
+    from firebase_admin import delete_app, get_app
+
     try:
         app = get_app(_FCM_APP_NAME)
     except ValueError:
@@ -50,141 +64,189 @@ async def _close_fcm_app() -> None:
         logging.exception("Failed to delete Firebase app during shutdown: %s", _FCM_APP_NAME)
 
 
+@metrics.cron
 async def fcm_notification_cron(ctx: dict) -> None:
     """
-    Function to notify users about upcoming matches
+    Function to notify users about upcoming matches, once per match
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("FCM Notification Cron")
+    telemetry.set_transaction_name("FCM Notification Cron")
+    # Imported here, along with Firebase, as it's only scheduled when FCM is configured.
+    from app.services import notifications
+
     client = ctx["redis"]
 
     # Get the current time, so that we can filter for matches starting in the next 15 minutes
     current_time = datetime.now(tz=ZoneInfo(settings.TIMEZONE))
-    upcoming_matches = [
-        match
-        for match in await matches.get_upcoming_matches(redis_client=client)
-        if match.status == MatchStatus.UPCOMING and 0 < (match.time - current_time).total_seconds() < 900
-    ]
-
-    if not upcoming_matches:
+    upcoming_matches = {match.id: match for match in await notifications.upcoming_matches(client, current_time)}
+    # Claimed before sending, so an overlapping run can't notify about the same match too
+    if not (match_ids := await notifications.claim(client, list(upcoming_matches))):
         logging.info("No notifications to send")
         return
 
-    # Fetch all match details concurrently (skip failures gracefully)
-    all_match_details = await asyncio.gather(
-        *[matches.match_by_id(match.id, redis_client=client) for match in upcoming_matches],
+    built = await asyncio.gather(
+        *[notifications.build_message(client, upcoming_matches[match_id], current_time) for match_id in match_ids],
         return_exceptions=True,
     )
-
     # Build notification messages, skipping any failed lookups
-    messages = []
-    for match, match_details in zip(upcoming_matches, all_match_details):
-        if isinstance(match_details, BaseException):
-            logging.warning(f"Failed to fetch match details for {match.id}: {match_details}")
-            continue
-
-        logging.info(f"Sending notification for {match=}")
-
-        team1_id, team2_id = (team.id for team in match_details.teams)
-        time_to_start = int((match.time - current_time).total_seconds() // 60)
-
-        payload = {
-            "title": f"{match.team1.name} vs {match.team2.name}",
-            "body": f"Match is starting in {time_to_start} minutes",
-            "timestamp": match.time.isoformat(),
-            "match_id": match.id,
-        }
-        if streams := match_details.videos.streams:
-            payload |= {"stream_url": streams[0].url.unicode_string()}
-
-        messages.append(
-            messaging.Message(
-                data=payload,
-                condition=f"'event-{match_details.event.id}' in topics || 'match-{match.id}' in topics || "
-                f"'team-{team1_id}' in topics || 'team-{team2_id}' in topics",
-                android=messaging.AndroidConfig(ttl=timedelta(minutes=30)),
-            ),
-        )
-
-    # Don't bother sending if there's nothing to send
-    if not messages:
-        return
-
-    app = _get_fcm_app()
-    await messaging.send_each_async(messages=messages, dry_run=False, app=app)
-    logging.info("Sent notification")
+    messages, failed = {}, []
+    for match_id, message in zip(match_ids, built):
+        if isinstance(message, BaseException):
+            logging.warning(f"Failed to fetch match details for {match_id}: {message}")
+            failed.append(match_id)
+        else:
+            logging.info(f"Sending notification for match={upcoming_matches[match_id]}")
+            messages[match_id] = message
+
+    if messages:
+        sent = await notifications.send(list(messages.values()), _get_fcm_app())
+        failed += [match_id for match_id, ok in zip(messages, sent) if not ok]
+        logging.info(f"Sent {sum(sent)} notifications")
+    # Let the next run retry these
+    await notifications.release(client, failed)
+
+
+async def store_listing(client: ArqRedis, key: str, data: bytes, ttl: int) -> None:
+    """
+    Function to cache a listing, along with a last-known-good copy to serve while VLR is unavailable
+    :param client: The redis client
+    :param key: The listing's key
+    :param data: The serialized listing
+    :param ttl: The listing's TTL
+    :return: Nothing
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.set(key, data, ex=ttl)
+    cache.add_stale(pipe, key, data, constants.CACHE_TTL_STALE)
+    await pipe.execute()
 
 
+@metrics.cron
 async def rankings_cron(ctx: dict) -> None:
     """
-    Function to fetch rankings from VLR and update the cache
+    Function to refresh the cached rankings of the regions that are due
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("Rankings Cron")
+    telemetry.set_transaction_name("Rankings Cron")
 
-    await ctx["redis"].set(
-        "rankings",
-        schemas.RankingListAdapter.dump_json(await rankings.ranking_list()),
-        ex=constants.CACHE_TTL_RANKINGS,
-    )
+    await rankings.refresh_rankings(ctx["redis"])
 
 
+@metrics.cron
 async def matches_cron(ctx: dict) -> None:
     """
-    Function to fetch matches from VLR and update the cache
+    Function to fetch matches from VLR and update the cache, when they are due
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("Matches Cron")
+    telemetry.set_transaction_name("Matches Cron")
     client = ctx["redis"]
+    if not await schedule.is_due(client, "matches"):
+        return
 
-    await client.set(
-        "matches",
-        schemas.MatchListAdapter.dump_json(await matches.match_list(redis_client=client)),
-        ex=constants.CACHE_TTL_MATCHES,
+    match_list = await matches.match_list(redis_client=client)
+    await matches.overlay_live_states(match_list, client)
+    delay = schedule.matches_delay(match_list, datetime.now(tz=ZoneInfo(settings.TIMEZONE)))
+    previous = schemas.MatchListAdapter.validate_json(cached) if (cached := await client.get("matches")) else None
+    await matches.store_match_list(
+        client,
+        match_list,
+        *matches.match_list_delta(previous or [], match_list),
+        ttl=schedule.cache_ttl(constants.CACHE_TTL_MATCHES, delay),
     )
+    # With nothing to diff against, every listed match would be reported as new.
+    if previous is not None:
+        await matches.publish_match_changes(client, matches.diff_match_lists(previous, match_list))
+    await schedule.defer(client, "matches", delay)
 
 
+@metrics.cron
+async def live_matches_cron(ctx: dict) -> None:
+    """
+    Function to poll live matches and patch their changes into the cached match list
+    :param ctx: Context dict
+    :return: Nothing
+    """
+    telemetry.set_transaction_name("Live Matches Cron")
+
+    if changes := await matches.poll_live_matches(ctx["redis"]):
+        logging.info(f"Live matches changed: {changes}")
+
+
+@metrics.cron
 async def events_cron(ctx: dict) -> None:
     """
-    Function to fetch matches from VLR and update the cache
+    Function to fetch events from VLR and update the cache, when they are due
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("Events Cron")
+    telemetry.set_transaction_name("Events Cron")
     client = ctx["redis"]
+    if not await schedule.is_due(client, "events"):
+        return
 
-    await client.set(
+    event_list = await events.get_events(cache_client=client)
+    delay = schedule.events_delay(event_list, settings.EVENTS_REFRESH_MIN, settings.EVENTS_REFRESH_MAX)
+    previous = schemas.EventListAdapter.validate_json(cached) if (cached := await client.get("events")) else None
+    await store_listing(
+        client,
         "events",
-        schemas.EventListAdapter.dump_json(await events.get_events(cache_client=client)),
-        ex=constants.CACHE_TTL_EVENTS,
+        schemas.EventListAdapter.dump_json(event_list),
+        schedule.cache_ttl(constants.CACHE_TTL_EVENTS, delay),
     )
+    # With nothing to diff against, every listed event would be reported as new.
+    if previous is not None:
+        await webhooks.dispatch(client, constants.WebhookEventType.EVENT, events.diff_event_lists(previous, event_list))
+    await schedule.defer(client, "events", delay)
 
 
+@metrics.cron
 async def news_cron(ctx: dict) -> None:
     """
-    Function to fetch matches from VLR and update the cache
+    Function to fetch news from VLR and update the cache, when it is due
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("News Cron")
+    telemetry.set_transaction_name("News Cron")
+    client = ctx["redis"]
+    if not await schedule.is_due(client, "news"):
+        return
 
-    await ctx["redis"].set(
+    # News comes out around events, so it is refreshed more often while any are ongoing.
+    event_list = schemas.EventListAdapter.validate_json(cached) if (cached := await client.get("events")) else []
+    delay = schedule.events_delay(event_list, settings.NEWS_REFRESH_MIN, settings.NEWS_REFRESH_MAX)
+    await store_listing(
+        client,
         "news",
         schemas.NewsListAdapter.dump_json(await news.news_list()),
-        ex=constants.CACHE_TTL_NEWS,
+        schedule.cache_ttl(constants.CACHE_TTL_NEWS, delay),
     )
+    await schedule.defer(client, "news", delay)
+
+
+@metrics.cron
+async def prewarm_cron(ctx: dict) -> None:
+    """
+    Function to refresh the cached pages of the most requested teams and players
+    :param ctx: Context dict
+    :return: Nothing
+    """
+    telemetry.set_transaction_name("Prewarm Cron")
+
+    refreshed = await prewarm.prewarm(ctx["redis"])
+    logging.info(f"Prewarmed {len(refreshed)} teams and players")
 
 
+@metrics.cron
 async def standings_cron(ctx: dict) -> None:
     """
     Function to fetch standings from VLR and update the cache
     :param ctx: Context dict
     :return: Nothing
     """
-    get_current_scope().set_transaction_name("Standings Cron")
+    telemetry.set_transaction_name("Standings Cron")
     client = ctx["redis"]
     current_year = datetime.now().year
 
@@ -196,35 +258,134 @@ async def standings_cron(ctx: dict) -> None:
     )
 
 
+def cron_jobs() -> list[CronJob]:
+    """
+    Function to list the crons the leader runs
+    :return: The crons
+    """
+    jobs = [
+        # Every 5 minutes; each region is only re-fetched once its own refresh interval has passed.
+        cron(
+            "app.cron.rankings_cron",
+            hour=None,
+            minute={0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55},
+        ),
+        # These check every minute (matches) or 5 minutes (events, news) whether their listing is due, which
+        # depends on the match calendar; see app/services/schedule.py.
+        cron("app.cron.matches_cron", hour=None, minute=None),
+        cron("app.cron.events_cron", hour=None, minute=set(range(0, 60, 5))),
+        cron("app.cron.news_cron", hour=None, minute=set(range(0, 60, 5))),
+        cron(
+            "app.cron.live_matches_cron",
+            hour=None,
+            minute=None,
+            second=set(range(0, 60, constants.LIVE_POLL_INTERVAL)),
+            timeout=constants.LIVE_POLL_INTERVAL,
+        ),
+        # Offset from the other 5-minute crons, so its scrapes don't land alongside theirs.
+        cron("app.cron.prewarm_cron", hour=None, minute=set(range(2, 60, 5))),
+        cron("app.cron.standings_cron", hour=0, minute=0),
+    ]
+
+    # Only try to run the FCM cron if we have a service account JSON
+    if settings.GOOGLE_APPLICATION_CREDENTIALS is not None:
+        jobs.append(cron("app.cron.fcm_notification_cron", hour=None, minute={0, 15, 30, 45}))
+    return jobs
+
+
+async def _on_job_start(ctx: dict) -> None:
+    # Jobs and crons run in their own tasks, so this only moves their upstream requests behind the API's.
+    upstream.set_priority(UpstreamPriority.BACKGROUND)
+
+
+def redis_settings() -> RedisSettings:
+    return RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD)
+
+
 class ArqWorker:
+    """
+    The arq workers of a process: one running jobs, and one running the crons while this process is the leader
+
+    Any number of processes (API processes, and ``python -m app.worker``) can run these. They share the jobs,
+    and whichever holds the leader lease runs the crons, so each cron runs once cluster-wide.
+    """
+
     def __init__(self) -> None:
         self.worker: Worker | None = None
         self.task: Task | None = None
+        self.cron_worker: Worker | None = None
+        self.cron_task: Task | None = None
+        self.leader_task: Task | None = None
+        self.redis: ArqRedis | None = None
+        self.lease = Lease(constants.LEADER_LEASE_KEY, constants.LEADER_LEASE_TTL)
+        self.kwargs: dict[str, Any] = {}
 
     async def start(self, **kwargs: Any) -> None:
-        cron_jobs = [
-            cron("app.cron.rankings_cron", hour=None, minute={0, 30}),
-            cron(
-                "app.cron.matches_cron",
-                hour=None,
-                minute={0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55},
+        self.kwargs = kwargs
+        # Full-history scrapes submitted through the jobs API. Results are kept by the jobs service itself, so
+        # arq keeps none; that also lets a finished job's ID be queued again.
+        functions = [
+            func(jobs.run_job, name=jobs.JOB_FUNCTION, keep_result=0, timeout=constants.JOB_TIMEOUT, max_tries=1),
+            # Webhook deliveries retry themselves (with backoff) until this many tries.
+            func(
+                webhooks.deliver,
+                name=webhooks.DELIVER_FUNCTION,
+                keep_result=0,
+                timeout=constants.WEBHOOK_TIMEOUT * 2,
+                max_tries=constants.WEBHOOK_MAX_TRIES,
             ),
-            cron("app.cron.events_cron", hour=None, minute={0, 30}),
-            cron("app.cron.news_cron", hour=None, minute={0, 30}),
-            cron("app.cron.standings_cron", hour=0, minute=0),
         ]
 
-        # Only try to run the FCM cron if we have a service account JSON
-        if settings.GOOGLE_APPLICATION_CREDENTIALS is not None:
-            cron_jobs.append(cron("app.cron.fcm_notification_cron", hour=None, minute={0, 15, 30, 45}))
-
-        self.worker = create_worker(
-            {"cron_jobs": cron_jobs},
-            **kwargs,
-        )
+        self.worker = create_worker({"functions": functions, "on_job_start": _on_job_start}, **kwargs)
         self.task = asyncio.create_task(self.worker.async_run())
+        self.redis = await create_pool(kwargs["redis_settings"])
+        self.leader_task = asyncio.create_task(self.lead())
+
+    async def lead(self) -> None:
+        """
+        Function to keep trying for the leader lease, running the crons only while holding it
+        :return: Nothing
+        """
+        while True:
+            try:
+                leader = await self.lease.acquire(self.redis)
+            except RedisError:
+                # The lease can't be renewed either, so it will lapse: stop before another worker takes over.
+                logging.warning("Could not reach redis for the leader lease", exc_info=True)
+                leader = False
+
+            if leader and self.cron_worker is None:
+                logging.info("Became the leader, starting crons")
+                self.cron_worker = create_worker(
+                    {"cron_jobs": cron_jobs(), "queue_name": constants.CRON_QUEUE_NAME, "on_job_start": _on_job_start},
+                    **self.kwargs,
+                )
+                self.cron_task = asyncio.create_task(self.cron_worker.async_run())
+            elif not leader and self.cron_worker is not None:
+                logging.warning("No longer the leader, stopping crons")
+                await self.stop_crons()
+            await asyncio.sleep(constants.LEADER_LEASE_RENEW_INTERVAL)
+
+    async def stop_crons(self) -> None:
+        worker, self.cron_worker = self.cron_worker, None
+        if worker:
+            await worker.close()
 
     async def stop(self) -> None:
+        if self.leader_task:
+            self.leader_task.cancel()
+            try:
+                await self.leader_task
+            except asyncio.CancelledError:
+                pass
+        await self.stop_crons()
+        if self.redis:
+            try:
+                # Hand over right away, rather than once the lease lapses.
+                await self.lease.release(self.redis)
+            except RedisError:
+                logging.warning("Could not release the leader lease", exc_info=True)
+            await self.redis.aclose()
         if self.worker:
             await self.worker.close()
         await _close_fcm_app()
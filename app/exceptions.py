@@ -21,6 +21,30 @@ class InternalServerError(HTTPException):
         super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
 
 
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Service unavailable", *, retry_after: int | None = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers=headers)
+
+
+# Raised instead of requesting an upstream that keeps failing, until it is due to be tried again
+class UpstreamUnavailableError(ServiceUnavailableError):
+    def __init__(self, detail: str = "VLR.gg is unavailable", *, retry_after: int | None = None):
+        super().__init__(detail=detail, retry_after=retry_after)
+
+
+# Raised to turn a request away while too many others are already scraping
+class OverloadedError(ServiceUnavailableError):
+    def __init__(self, detail: str = "Too busy, try again later", *, retry_after: int | None = None):
+        super().__init__(detail=detail, retry_after=retry_after)
+
+
+# Raised instead of waiting on VLR.gg past the request's deadline
+class DeadlineExceededError(HTTPException):
+    def __init__(self, detail: str = "Timed out waiting for VLR.gg"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
+
+
 class ScrapingError(HTTPException):
     def __init__(
         self,
@@ -2,14 +2,17 @@ from pydantic import TypeAdapter
 
 from .agent import AskRequest, AskResponse
 from .events import Event, EventWithDetails
-from .matches import Match, MatchTeam, MatchWithDetails
+from .jobs import Job, JobError
+from .matches import Match, MatchChanges, MatchData, MatchTeam, MatchWithDetails
 from .news import NewsItem, NewsArticle
+from .pagination import CursorPage
 from .player import Player, PlayerMatch
-from .rankings import Ranking, TeamRanking
+from .rankings import Ranking, RankingHistory, RankingHistoryEntry, TeamRanking
 from .search import SearchResult
 from .standings import *
-from .team import Team
+from .team import CompletedMatch, Team
 from .version import VersionResponse
+from .webhooks import Webhook, WebhookCreate
 from .internal import TeamCache
 
 # Module-level TypeAdapters for fast JSON serialization/deserialization
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+from app.constants import JobStatus
+
+
+class JobError(BaseModel):
+    status: int
+    detail: str
+
+
+# Response for `POST /api/v1/jobs/{kind}/{id}` and `GET /api/v1/jobs/{job_id}`
+class Job(BaseModel):
+    id: str
+    status: JobStatus
+    # Pages of history read so far
+    pages: int = 0
+    error: JobError | None = None
@@ -59,8 +59,8 @@ class Round(BaseModel):
 class MatchData(BaseModel):
     map: str = ""
     teams: list[Team]
-    members: list[TeamMember]
-    rounds: list[Round]
+    members: list[TeamMember] = []
+    rounds: list[Round] = []
 
 
 class PreviousEncounters(BaseModel):
@@ -79,14 +79,15 @@ class MatchVideos(BaseModel):
 
 
 # Response for `GET /api/v1/matches/{match_id}`
+# Every field has a default so a response can be built from only the requested sections.
 class MatchWithDetails(BaseModel):
-    teams: list[TeamWithImage]
-    bans: list[str]
-    event: Event
-    videos: MatchVideos
-    map_count: int
-    data: list[MatchData]
-    previous_encounters: list[PreviousEncounters]
+    teams: list[TeamWithImage] = []
+    bans: list[str] = []
+    event: Event | None = None
+    videos: MatchVideos | None = None
+    map_count: int = 0
+    data: list[MatchData] = []
+    previous_encounters: list[PreviousEncounters] = []
 
 
 class MatchTeam(BaseModel):
@@ -105,3 +106,15 @@ class Match(BaseModel):
     event: str
     series: str
     event_id: str | None = None
+    # Only set for live matches, by the live match poller
+    current_map: str | None = None
+    current_round: int | None = None
+
+
+# Response for `GET /api/v1/matches/changes`
+# With `full` set, `matches` is the whole list; otherwise it holds only the added and changed matches.
+class MatchChanges(BaseModel):
+    version: int
+    full: bool = False
+    matches: list[Match] = []
+    removed: list[str] = []
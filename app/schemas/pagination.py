@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+# Response for the cursor-paginated `.../archive` routes
+class CursorPage[T](BaseModel):
+    items: list[T]
+    next_cursor: str | None = None
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, HttpUrl
 
 
@@ -14,3 +16,16 @@ class TeamRanking(BaseModel):
 class Ranking(BaseModel):
     region: str
     teams: list[TeamRanking]
+
+
+class RankingHistoryEntry(BaseModel):
+    time: datetime
+    # `None` while the team is out of its region's ranked list
+    rank: int | None
+    points: int | None
+
+
+# Response for `GET /api/v1/rankings/history/{team_id}`
+class RankingHistory(BaseModel):
+    team_id: int
+    history: list[RankingHistoryEntry]
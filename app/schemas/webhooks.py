@@ -0,0 +1,18 @@
+from pydantic import BaseModel, HttpUrl
+
+from app.constants import WebhookEventType
+
+
+# Request for `POST /api/v1/internal/webhooks`; empty filters receive everything
+class WebhookCreate(BaseModel):
+    url: HttpUrl
+    types: list[WebhookEventType] = []
+    match_ids: list[str] = []
+    team_ids: list[str] = []
+    event_ids: list[str] = []
+
+
+# Response for `POST /api/v1/internal/webhooks`; deliveries are signed with `secret`
+class Webhook(WebhookCreate):
+    id: str
+    secret: str
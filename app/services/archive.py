@@ -0,0 +1,280 @@
+import base64
+import http
+import inspect
+import time
+from functools import cache
+from operator import attrgetter
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel, TypeAdapter
+from redis.asyncio import Redis
+
+from app import schemas
+import app.constants as constants
+from app.core.config import settings
+from app.core.connections import get_http_client
+from app.exceptions import BadRequestError, ScrapingError, ServiceUnavailableError
+
+# Stored segments read per round trip; a segment is at most one upstream page, so this covers a full `limit`.
+_READ_AHEAD = 3
+
+_EXPIRED_CURSOR = "This cursor has expired; start again without one"
+
+
+class Listing:
+    """
+    A paginated VLR listing, newest first, that is read from a local archive
+
+    The archive is a run of segments, each holding the items that one upstream page added. Older pages are
+    appended after the last segment the first time a cursor reaches them, and items that later show up at the
+    top of the listing go in a segment before the first, so segments never change once written and a cursor
+    (a position in a segment) stays put as the listing grows. A set of the archived IDs drops the items that
+    upstream's shifting page boundaries repeat. If the newest page has nothing in common with the archive, the
+    gap can't be filled, and a new generation of the archive is started instead.
+    """
+
+    __slots__ = ("name", "url", "parse", "adapter", "key", "is_empty")
+
+    def __init__(
+        self,
+        name: str,
+        url: Callable[[int], str],
+        parse: Callable[[bytes], list | Awaitable[list]],
+        item: type[BaseModel],
+        key: Callable[[Any], str] = attrgetter("id"),
+        is_empty: Callable[[bytes, list], bool] | None = None,
+    ):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.adapter = _list_adapter(item)
+        self.key = key
+        self.is_empty = is_empty
+
+    @property
+    def state_key(self) -> str:
+        return f"archive:{self.name}"
+
+    @property
+    def fresh_key(self) -> str:
+        return f"archive:{self.name}:fresh"
+
+    def ids_key(self, gen: int) -> str:
+        return f"archive:{self.name}:{gen}:ids"
+
+    def segment_key(self, gen: int, segment: int) -> str:
+        return f"archive:{self.name}:{gen}:{segment}"
+
+
+@cache
+def _list_adapter(item: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[item])
+
+
+def encode_cursor(gen: int, segment: int, index: int) -> str:
+    """
+    Function to build the opaque cursor of a position in an archive
+
+    :param gen: The archive's generation
+    :param segment: The segment
+    :param index: The position within the segment
+    :return: The cursor
+    """
+    return base64.urlsafe_b64encode(f"{gen}:{segment}:{index}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int, int]:
+    """
+    Function to read a cursor made by :func:`encode_cursor`
+
+    :param cursor: The cursor
+    :return: The generation, segment and index
+    """
+    try:
+        gen, segment, index = map(int, base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":"))
+    except ValueError:
+        raise BadRequestError(detail="Invalid cursor") from None
+    if index < 0:
+        raise BadRequestError(detail="Invalid cursor")
+    return gen, segment, index
+
+
+async def archive_page(listing: Listing, limit: int, cursor: str | None, client: Redis) -> schemas.CursorPage:
+    """
+    Function to read a page of a listing from its archive, fetching upstream only past what is archived
+
+    :param listing: The listing
+    :param limit: How many items to return
+    :param cursor: Where the previous page ended; ``None`` for the newest items
+    :param client: The redis client
+    :return: The items, and the cursor of the next page (``None`` at the end of the listing)
+    """
+    if not settings.ENABLE_CACHE:
+        raise ServiceUnavailableError(detail="Archives need the cache to be enabled")
+
+    state = await get_state(listing, client)
+    if cursor is None:
+        if not state or await client.get(listing.fresh_key) is None:
+            state = await refresh_head(listing, state, client)
+        gen, segment, index = state["gen"], state["first"], 0
+    else:
+        gen, segment, index = decode_cursor(cursor)
+        if state.get("gen") != gen:
+            raise BadRequestError(detail=_EXPIRED_CURSOR)
+
+    items: list = []
+    while len(items) < limit:
+        if segment > state["last"]:
+            if state["done"]:
+                break
+            state = await extend_tail(listing, state, client)
+            continue
+        keys = [listing.segment_key(gen, s) for s in range(segment, min(segment + _READ_AHEAD, state["last"] + 1))]
+        for data in await client.mget(keys):
+            if data is None:
+                # Evicted from under us: drop what is left so the next request starts over.
+                await client.delete(listing.state_key)
+                raise BadRequestError(detail=_EXPIRED_CURSOR)
+            rows = listing.adapter.validate_json(data)
+            taken = rows[index : index + limit - len(items)]
+            items.extend(taken)
+            index += len(taken)
+            if index < len(rows):
+                break
+            segment, index = segment + 1, 0
+
+    at_end = segment > state["last"] and state["done"]
+    return schemas.CursorPage(items=items, next_cursor=None if at_end else encode_cursor(gen, segment, index))
+
+
+async def get_state(listing: Listing, client: Redis) -> dict[str, int]:
+    """
+    Function to get where a listing's archive stands
+
+    :param listing: The listing
+    :param client: The redis client
+    :return: The ``gen``eration, ``first`` and ``last`` segments, last upstream ``page`` archived and whether the
+        listing is ``done``; empty if there is no archive
+    """
+    return {key.decode(): int(value) for key, value in (await client.hgetall(listing.state_key)).items()}
+
+
+async def refresh_head(listing: Listing, state: dict[str, int], client: Redis) -> dict[str, int]:
+    """
+    Function to archive anything new at the top of a listing, starting the archive if there is none
+
+    :param listing: The listing
+    :param state: The archive's state
+    :param client: The redis client
+    :return: The archive's new state
+    """
+    items, empty = await fetch_page(listing, 1)
+    ids = [listing.key(item) for item in items]
+    known = await client.smismember(listing.ids_key(state["gen"]), ids) if state and ids else []
+    if not state or (items and not any(known)):
+        gen = max(time.time_ns() // 1_000_000, state.get("gen", 0) + 1)
+        state = await write_segment(
+            listing, client, {}, 0, items, {"gen": gen, "first": 0, "last": 0, "page": 1, "done": int(empty)}
+        )
+    elif new := items[: known.index(1)] if items else []:
+        # Everything above the newest item we have is new.
+        state = await write_segment(listing, client, state, state["first"] - 1, new, {"first": state["first"] - 1})
+    else:
+        await touch(listing, state, client)
+    await client.set(listing.fresh_key, b"1", ex=constants.ARCHIVE_HEAD_TTL)
+    return state
+
+
+async def extend_tail(listing: Listing, state: dict[str, int], client: Redis) -> dict[str, int]:
+    """
+    Function to archive the next upstream page of a listing
+
+    :param listing: The listing
+    :param state: The archive's state
+    :param client: The redis client
+    :return: The archive's new state
+    """
+    page = state["page"] + 1
+    if page > constants.MAX_PAGINATION_PAGES:
+        changes = {"done": 1}
+    else:
+        items, empty = await fetch_page(listing, page)
+        known = await client.smismember(listing.ids_key(state["gen"]), [listing.key(i) for i in items]) if items else []
+        if new := [item for item, seen in zip(items, known) if not seen]:
+            return await write_segment(
+                listing, client, state, state["last"] + 1, new, {"last": state["last"] + 1, "page": page}
+            )
+        # Everything on the page was archived already: newer items have pushed it down since.
+        changes = {"page": page, "done": int(empty)}
+    await client.hset(listing.state_key, mapping=changes)
+    return {**state, **changes}
+
+
+async def write_segment(
+    listing: Listing, client: Redis, state: dict[str, int], segment: int, items: list, changes: dict[str, int]
+) -> dict[str, int]:
+    """
+    Function to store a new segment of an archive
+
+    The segment is only written if it is absent, so when two requests race to archive the same page the first
+    one's copy is kept; the state changes are the same either way.
+
+    :param listing: The listing
+    :param client: The redis client
+    :param state: The archive's state
+    :param segment: The segment
+    :param items: The segment's items
+    :param changes: The state fields to update, including ``gen`` when starting a new generation
+    :return: The archive's new state
+    """
+    state = {**state, **changes}
+    await client.set(
+        listing.segment_key(state["gen"], segment),
+        listing.adapter.dump_json(items),
+        nx=True,
+        ex=constants.CACHE_TTL_ARCHIVE,
+    )
+    pipeline = client.pipeline(transaction=True)
+    if items:
+        pipeline.sadd(listing.ids_key(state["gen"]), *(listing.key(item) for item in items))
+    pipeline.hset(listing.state_key, mapping=changes)
+    await pipeline.execute()
+    await touch(listing, state, client)
+    return state
+
+
+async def touch(listing: Listing, state: dict[str, int], client: Redis) -> None:
+    """
+    Function to keep all of an archive around for another :data:`constants.CACHE_TTL_ARCHIVE`
+
+    :param listing: The listing
+    :param state: The archive's state
+    :param client: The redis client
+    :return: Nothing
+    """
+    pipeline = client.pipeline(transaction=False)
+    for key in (
+        listing.state_key,
+        listing.ids_key(state["gen"]),
+        *(listing.segment_key(state["gen"], s) for s in range(state["first"], state["last"] + 1)),
+    ):
+        pipeline.expire(key, constants.CACHE_TTL_ARCHIVE)
+    await pipeline.execute()
+
+
+async def fetch_page(listing: Listing, page: int) -> tuple[list, bool]:
+    """
+    Function to fetch and parse one upstream page of a listing
+
+    :param listing: The listing
+    :param page: The page number
+    :return: The page's items, and whether it is past the end of the listing
+    """
+    async with get_http_client() as client:
+        response = await client.get(listing.url(page))
+    if response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+    items = listing.parse(response.content)
+    if inspect.isawaitable(items):
+        items = await items
+    return items, listing.is_empty(response.content, items) if listing.is_empty else not items
@@ -0,0 +1,89 @@
+import asyncio
+import http
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app import cache
+import app.constants as constants
+from app.core import admission
+from app.exceptions import BadRequestError
+
+
+def parse_batch_ids(value: str) -> list[str]:
+    """
+    Function to parse a comma-separated ``ids`` query value
+
+    :param value: The raw value, e.g. ``"1,2,3"``
+    :return: The unique IDs, in the order given
+    """
+    ids = list(dict.fromkeys(id.strip() for id in value.split(",") if id.strip()))
+    if not ids:
+        raise BadRequestError(detail="No IDs given")
+    if len(ids) > constants.MAX_BATCH_IDS:
+        raise BadRequestError(detail=f"At most {constants.MAX_BATCH_IDS} IDs can be requested at once")
+    return ids
+
+
+async def batch_lookup(
+    ids: list[str],
+    cache_key: Callable[[str], str],
+    fetch: Callable[[str], Awaitable[BaseModel]],
+    redis_client: Redis | None,
+) -> AsyncIterator[bytes]:
+    """
+    Function to look up several items, streaming each as soon as it is ready
+
+    Cache hits come from a single ``MGET`` and are sent first, as stored. Misses are then fetched
+    concurrently, at most :data:`constants.MAX_CONCURRENT_BATCH_FETCHES` at a time, and sent in the
+    order they complete. A failed item is reported on its own line rather than failing the batch, as a 500
+    if it failed with anything but an HTTP error.
+
+    :param ids: The IDs to look up
+    :param cache_key: The cache key of an ID
+    :param fetch: Fetches (and caches) an item that is not cached
+    :param redis_client: The redis client
+    :return: NDJSON lines of ``{"id": ..., "data": ...}`` or ``{"id": ..., "error": {"status": ..., "detail": ...}}``
+    """
+    misses = []
+    for id, data in zip(ids, await cache.mget([cache_key(id) for id in ids], client=redis_client) or [None] * len(ids)):
+        if data:
+            yield _line(id, b'"data":' + data)
+        else:
+            misses.append(id)
+    if not misses:
+        return
+
+    semaphore = asyncio.Semaphore(constants.MAX_CONCURRENT_BATCH_FETCHES)
+
+    async def resolve(id: str) -> bytes:
+        async with semaphore:
+            try:
+                async with admission.admit():
+                    return _line(id, b'"data":' + (await fetch(id)).model_dump_json().encode())
+            except HTTPException as exc:
+                status, detail = exc.status_code, exc.detail
+            except Exception:
+                logging.exception("batch lookup failed for %s", id)
+                error = http.HTTPStatus.INTERNAL_SERVER_ERROR
+                status, detail = error.value, error.phrase
+            return _line(
+                id, b'"error":' + json.dumps({"status": status, "detail": detail}, separators=(",", ":")).encode()
+            )
+
+    tasks = [asyncio.create_task(resolve(id)) for id in misses]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # The client may go away mid-stream; don't leave its fetches running.
+        for task in tasks:
+            task.cancel()
+
+
+def _line(id: str, field: bytes) -> bytes:
+    return b'{"id":' + json.dumps(id).encode() + b"," + field + b"}\n"
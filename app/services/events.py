@@ -3,8 +3,10 @@ import http
 import itertools
 import logging
 import re
+from contextlib import aclosing
 from datetime import datetime
-from typing import NotRequired, TypedDict, cast
+from operator import attrgetter
+from typing import AsyncIterator, NotRequired, TypedDict, cast
 from zoneinfo import ZoneInfo
 
 import dateutil.parser
@@ -15,8 +17,10 @@ from redis.asyncio import Redis
 
 from app import schemas, cache
 import app.constants as constants
+from app.core import admission, metrics
 from app.core.config import settings
 from app.core.connections import get_http_client
+from app.services import pagination
 from app.utils import clean_number_string, clean_string, get_class, get_href, get_image_url, simplify_name
 
 
@@ -51,20 +55,67 @@ async def get_events(cache_client: Redis, pages: int = 1) -> list[schemas.Event]
         more until a page returns no events.
     :return: Parsed list of events
     """
-    async with get_http_client() as client:
-        response = await client.get(constants.EVENTS_URL)
-        if response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+    async with get_http_client() as client, aclosing(iter_events(client, cache_client, pages)) as history:
+        return [event async for page in history for event in page]
 
-        # Page 1 has been fetched above; grab any additional pages while the client is open.
-        event_list = await parse_events_page(response.content, cache_client)
-        if event_list and pages != 1:
-            seen: set[str] = {e.id for e in event_list}
-            # Clamp bounded mode; full-history mode cap is enforced inside the helper.
-            effective_pages = min(pages, constants.MAX_PAGINATION_PAGES) if pages >= 1 else pages
-            event_list.extend(await fetch_additional_events(client, cache_client, effective_pages, seen))
 
-    return event_list
+async def iter_events(client, cache_client: Redis, pages: int = 1) -> AsyncIterator[list[schemas.Event]]:
+    """
+    Fetch the list of events from VLR a page at a time
+
+    :param client: The shared HTTP client
+    :param cache_client: A redis client instance
+    :param pages: How many pages of events to fetch, as in :func:`get_events`. A non-200 on
+        any page raises ScrapingError rather than returning a partial list.
+    :return: The parsed events of each page, in order
+    """
+    response = await client.get(constants.EVENTS_URL)
+    if response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+
+    event_list = await parse_events_page(response.content, cache_client)
+    yield event_list
+    if event_list and pages != 1:
+        seen: set[str] = {e.id for e in event_list}
+        async for page in pagination.paginate(
+            client,
+            events_url,
+            lambda content: parse_events_page(content, cache_client),
+            attrgetter("id"),
+            pages,
+            seen,
+            EVENTS_PAGE_BATCH_SIZE,
+        ):
+            yield page
+
+
+async def stream_events(cache_client: Redis, pages: int = 1) -> AsyncIterator[bytes]:
+    """
+    Stream the list of events from VLR as NDJSON, sending each page's events as it is parsed
+
+    :param cache_client: A redis client instance
+    :param pages: How many pages of events to fetch, as in :func:`get_events`
+    :return: One event per line
+    """
+    async with get_http_client() as client, aclosing(iter_events(client, cache_client, pages)) as history:
+        async for page in history:
+            yield pagination.ndjson(page)
+
+
+def diff_event_lists(previous: list[schemas.Event], current: list[schemas.Event]) -> list[dict]:
+    """
+    Function to diff two scrapes of the event list
+
+    :param previous: The previously cached events
+    :param current: The fresh events
+    :return: A change event for every event that is new or whose status changed
+    """
+    before = {event.id: event.status for event in previous}
+    return [
+        {"event_id": event.id, "title": event.title, "changes": {"status": event.status.value}}
+        for event in current
+        if before.get(event.id) != event.status
+    ]
 
 
 def events_url(page: int) -> str:
@@ -73,109 +124,28 @@ def events_url(page: int) -> str:
 
 
 async def parse_events_page(content: bytes, cache_client: Redis) -> list[schemas.Event]:
-    """Parse all event cards from a single page of HTML."""
-    soup = BeautifulSoup(content, "lxml")
-    return list(
-        itertools.chain(
-            *(
-                await asyncio.gather(
-                    *[
-                        convert_to_list(data, cache_client)
-                        for data in soup.find_all("div", class_="events-container-col")
-                    ]
-                )
-            )
-        )
-    )
-
-
-async def fetch_additional_events(
-    client, cache_client: Redis, pages: int, seen: set[str] | None = None
-) -> list[schemas.Event]:
-    """
-    Fetch events beyond page 1, preserving order (page 2, then 3, ...).
-
-    :param client: The shared HTTP client.
-    :param cache_client: A redis client instance.
-    :param pages: Total pages wanted (already clamped by caller for bounded mode).
-        ``> 1`` fetches pages ``2..pages`` concurrently; ``<= 0`` fetches every remaining
-        page in batches up to ``MAX_PAGINATION_PAGES`` total, stopping once a page returns
-        no events or contributes no new ids. A non-200 on any page raises ScrapingError
-        rather than returning a partial list (page 1 is already validated by the caller).
-    :param seen: Set of event ids already collected (page 1). New items are filtered against
-        this set in all modes; full-history mode also stops when a page adds zero new ids.
-    :return: The parsed events from the additional pages, in order.
-    """
-    event_list: list[schemas.Event] = []
-    if seen is None:
-        seen = set()
-
-    if pages > 1:
-        # Fetch pages 2..N in batches (not one big fan-out) to bound concurrent load on VLR.
-        stop = False
-        for start in range(2, pages + 1, EVENTS_PAGE_BATCH_SIZE):
-            batch = range(start, min(start + EVENTS_PAGE_BATCH_SIZE, pages + 1))
-            responses = await asyncio.gather(*(client.get(events_url(p)) for p in batch))
-            for response in responses:
-                if response.status_code != http.HTTPStatus.OK:
-                    raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-                page_events = await parse_events_page(response.content, cache_client)
-                if not page_events:
-                    stop = True
-                    break
-                new = [e for e in page_events if e.id not in seen]
-                seen.update(e.id for e in new)
-                event_list.extend(new)
-            if stop:
-                break
-        return event_list
-
-    # pages <= 0: fetch all remaining pages in batches until empty, zero new ids,
-    # or MAX_PAGINATION_PAGES total pages (including the already-fetched page 1) is reached.
-    page = 2
-    pages_crawled = 1  # page 1 already counted
-    while pages_crawled < constants.MAX_PAGINATION_PAGES:
-        batch_size = min(EVENTS_PAGE_BATCH_SIZE, constants.MAX_PAGINATION_PAGES - pages_crawled)
-        batch = list(range(page, page + batch_size))
-        responses = await asyncio.gather(*(client.get(events_url(p)) for p in batch))
-        pages_crawled += len(batch)
-        stop = False
-        for response in responses:
-            if response.status_code != http.HTTPStatus.OK:
-                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-            page_events = await parse_events_page(response.content, cache_client)
-            if not page_events:
-                stop = True
-                break
-            new = [e for e in page_events if e.id not in seen]
-            if not new:
-                stop = True
-                break
-            seen.update(e.id for e in new)
-            event_list.extend(new)
-        if stop:
-            break
-        page += batch_size
-
+    """Parse all event cards from a single page of HTML, adding them to the ID map if it's enabled."""
+    event_list = parse_event_list(content)
+    if event_list and settings.ENABLE_ID_MAP_DB:
+        await cache.hset("event", {simplify_name(event.title): event.id for event in event_list}, cache_client)
     return event_list
 
 
-async def convert_to_list(events: Tag, client: Redis) -> list[schemas.Event]:
-    """
-    Parse a list of events
-
-    :param client: A redis client instance
-     :param events: The events
-    :return: The list of parsed events
-    """
-    return list(await asyncio.gather(*[parse_event(event, client) for event in events.find_all("a", class_="wf-card")]))
+@metrics.parser
+def parse_event_list(content: bytes) -> list[schemas.Event]:
+    """Parse the event cards of each column of a page of HTML, in order."""
+    soup = BeautifulSoup(content, "lxml")
+    return [
+        parse_event(event)
+        for column in soup.find_all("div", class_="events-container-col")
+        for event in column.find_all("a", class_="wf-card")
+    ]
 
 
-async def parse_event(event: Tag, client: Redis) -> schemas.Event:
+def parse_event(event: Tag) -> schemas.Event:
     """
     Parse an event
 
-    :param client: A redis client instance
     :param event: The HTML
     :return: The event parsed
     """
@@ -195,7 +165,7 @@ async def parse_event(event: Tag, client: Redis) -> schemas.Event:
         "mod-", ""
     )
     img = HttpUrl(get_image_url(event.find("div", class_="event-item-thumb").find("img")["src"]))
-    parsed_event = schemas.Event(
+    return schemas.Event(
         id=event_id,
         title=title,
         status=status,
@@ -204,9 +174,6 @@ async def parse_event(event: Tag, client: Redis) -> schemas.Event:
         location=location,
         img=img,
     )
-    if settings.ENABLE_ID_MAP_DB:
-        await cache.hset("event", {simplify_name(title): event_id}, client)
-    return parsed_event
 
 
 def get_event_title(header: Tag) -> str:
@@ -234,13 +201,7 @@ async def get_event_name_and_cache(id: str, client: Redis) -> str:
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-    soup = BeautifulSoup(response.content, "lxml")
-
-    if (event_header := soup.find_all("div", class_="event-header")) is None:
-        raise BadRequestError(detail="Event header was missing, please retry")
-
-    header = event_header[0]
-    title = get_event_title(header)
+    title = parse_event_title(response.content)
 
     # Populate cache if enabled
     if settings.ENABLE_ID_MAP_DB:
@@ -249,6 +210,21 @@ async def get_event_name_and_cache(id: str, client: Redis) -> str:
     return title
 
 
+@metrics.parser
+def parse_event_title(content: bytes) -> str:
+    """
+    Function to parse just the title from an event's page
+    :param content: The page
+    :return: The event name
+    """
+    soup = BeautifulSoup(content, "lxml")
+
+    if (event_header := soup.find_all("div", class_="event-header")) is None:
+        raise BadRequestError(detail="Event header was missing, please retry")
+
+    return get_event_title(event_header[0])
+
+
 async def get_event_by_id(id: str, client: Redis | None = None) -> schemas.EventWithDetails:
     """
     Function to fetch an event from VLR, and return the parsed response
@@ -256,7 +232,8 @@ async def get_event_by_id(id: str, client: Redis | None = None) -> schemas.Event
     :param client: Optional Redis client for caching
     :return: The parsed event
     """
-    events, matches = await asyncio.gather(parse_events_data(id, client), parse_match_data(id))
+    async with admission.admit():
+        events, matches = await asyncio.gather(parse_events_data(id, client), parse_match_data(id))
     events["matches"] = matches
     return schemas.EventWithDetails(
         id=events["id"],
@@ -286,8 +263,25 @@ async def parse_events_data(id: str, cache_client: Redis | None = None) -> Parse
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
+    event = parse_event_page(id, response.content)
+
+    # Populate cache if enabled and client provided
+    if settings.ENABLE_ID_MAP_DB and cache_client:
+        await cache.hset("event", {simplify_name(event["title"]): id}, cache_client)
+
+    return event
+
+
+@metrics.parser
+def parse_event_page(id: str, content: bytes) -> ParsedEventData:
+    """
+    Function to parse an event's page
+    :param id: The ID of the event
+    :param content: The page
+    :ret: Dict of the parsed data
+    """
     event: dict[str, str | list] = {"id": id}
-    soup = BeautifulSoup(response.content, "lxml")
+    soup = BeautifulSoup(content, "lxml")
 
     if (event_header := soup.find_all("div", class_="event-header")) is None:
         raise BadRequestError(detail="Event header was missing, please retry")
@@ -350,10 +344,6 @@ async def parse_events_data(id: str, cache_client: Redis | None = None) -> Parse
 
     event["standings"] = parse_event_standings(soup.find("div", class_="event-container"))
 
-    # Populate cache if enabled and client provided
-    if settings.ENABLE_ID_MAP_DB and cache_client:
-        await cache.hset("event", {simplify_name(event["title"]): id}, cache_client)
-
     return cast(ParsedEventData, event)
 
 
@@ -363,7 +353,17 @@ async def parse_match_data(id: str) -> list:
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-    soup = BeautifulSoup(response.content, "lxml")
+    return parse_event_matches(response.content)
+
+
+@metrics.parser
+def parse_event_matches(content: bytes) -> list:
+    """
+    Function to parse the matches from an event's matches page
+    :param content: The page
+    :return: The matches of each day, in order
+    """
+    soup = BeautifulSoup(content, "lxml")
     return list(
         itertools.chain(
             *(
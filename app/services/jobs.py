@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable
+
+from arq.connections import ArqRedis
+from fastapi import HTTPException
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app import cache, schemas
+import app.constants as constants
+from app.constants import JobKind, JobStatus
+from app.core.config import settings
+from app.core.pubsub import Broker
+from app.exceptions import NotFoundError
+from app.services import player, team
+
+# The name jobs are queued under on the arq worker.
+JOB_FUNCTION = "scrape"
+
+# Job state changes are published here, and fanned out to whoever is waiting on the job.
+JOB_EVENTS_CHANNEL = "jobs:events"
+job_events = Broker(JOB_EVENTS_CHANNEL)
+
+JOB_MODELS: dict[JobKind, type[BaseModel]] = {JobKind.PLAYER: schemas.Player, JobKind.TEAM: schemas.Team}
+
+_FINISHED = frozenset({JobStatus.COMPLETE, JobStatus.FAILED})
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def result_key(job_id: str) -> str:
+    return f"job:{job_id}:result"
+
+
+def job_id(kind: JobKind, id: str, pages: int) -> str:
+    """
+    Function to build the ID of a job, which is the same for every request of the same scrape
+
+    :param kind: What is being scraped
+    :param id: The player's or team's ID
+    :param pages: How many pages of history to scrape; ``<= 0`` for all of it
+    :return: The job's ID
+    """
+    return f"{kind.value}:{id}:{0 if pages <= 0 else min(pages, constants.MAX_PAGINATION_PAGES)}"
+
+
+async def scrape(
+    kind: JobKind, id: str, pages: int, on_page: Callable[[int], Awaitable[None]] | None = None
+) -> BaseModel:
+    """
+    Function to run a job's scrape
+
+    :param kind: What is being scraped
+    :param id: The player's or team's ID
+    :param pages: How many pages of history to scrape; ``<= 0`` for all of it
+    :param on_page: Called with the number of history pages read so far
+    :return: The player or team
+    """
+    if kind is JobKind.PLAYER:
+        return await player.get_player_data(id, match_pages=pages, on_page=on_page)
+    return await team.get_team_data(id, completed_pages=pages, on_page=on_page)
+
+
+async def get_job(client: Redis, job_id: str) -> schemas.Job | None:
+    """
+    Function to get the state of a job
+
+    :param client: The redis client
+    :param job_id: The job's ID
+    :return: The job, or ``None`` if there is no such job (or it has expired)
+    """
+    return schemas.Job.model_validate_json(data) if (data := await client.get(job_key(job_id))) else None
+
+
+async def save_job(client: Redis, job: schemas.Job, ttl: int) -> None:
+    """
+    Function to store the state of a job and tell anyone waiting on it
+
+    :param client: The redis client
+    :param job: The job
+    :param ttl: How long to keep the state for
+    :return: Nothing
+    """
+    data = job.model_dump_json()
+    await client.set(job_key(job.id), data, ex=ttl)
+    await client.publish(JOB_EVENTS_CHANNEL, data)
+
+
+async def submit(client: Redis, kind: JobKind, id: str, pages: int) -> schemas.Job:
+    """
+    Function to queue a scrape as a job, unless the same scrape is already queued, running or done
+
+    :param client: The redis client
+    :param kind: What to scrape
+    :param id: The player's or team's ID
+    :param pages: How many pages of history to scrape; ``<= 0`` for all of it
+    :return: The job
+    """
+    id_ = job_id(kind, id, pages)
+    if (job := await get_job(client, id_)) and job.status != JobStatus.FAILED:
+        return job
+
+    job = schemas.Job(id=id_, status=JobStatus.QUEUED)
+    await save_job(client, job, constants.JOB_TIMEOUT)
+    # arq doesn't queue a job whose ID is already queued or running, so racing submissions run it once.
+    await ArqRedis(pool_or_conn=client.connection_pool).enqueue_job(JOB_FUNCTION, kind.value, id, pages, _job_id=id_)
+    return job
+
+
+async def run_job(ctx: dict, kind: str, id: str, pages: int) -> None:
+    """
+    Function to run a job on the arq worker, saving its progress after every page and its result at the end
+
+    :param ctx: Context dict
+    :param kind: What to scrape
+    :param id: The player's or team's ID
+    :param pages: How many pages of history to scrape; ``<= 0`` for all of it
+    :return: Nothing
+    """
+    client = ctx["redis"]
+    id_ = job_id(JobKind(kind), id, pages)
+    pages_read = 0
+
+    async def progress(count: int) -> None:
+        nonlocal pages_read
+        pages_read = count
+        await save_job(client, schemas.Job(id=id_, status=JobStatus.RUNNING, pages=count), constants.JOB_TIMEOUT)
+
+    await progress(0)
+    try:
+        result = await scrape(JobKind(kind), id, pages, progress)
+    except Exception as exc:
+        if isinstance(exc, HTTPException):
+            error = schemas.JobError(status=exc.status_code, detail=str(exc.detail))
+        else:
+            error = schemas.JobError(status=500, detail="Internal server error")
+        await save_job(client, schemas.Job(id=id_, status=JobStatus.FAILED, error=error), constants.CACHE_TTL_JOB)
+        if not isinstance(exc, HTTPException):
+            raise
+        logging.warning(f"Job {id_} failed: {exc.detail}")
+        return
+
+    await client.set(result_key(id_), result.model_dump_json(), ex=constants.CACHE_TTL_JOB)
+    await save_job(client, schemas.Job(id=id_, status=JobStatus.COMPLETE, pages=pages_read), constants.CACHE_TTL_JOB)
+
+
+async def job_result(client: Redis, job_id: str) -> tuple[schemas.Job, bytes | None]:
+    """
+    Function to get the result of a job
+
+    :param client: The redis client
+    :param job_id: The job's ID
+    :return: The job, and its result as JSON once it is complete
+    """
+    if (job := await get_job(client, job_id)) is None:
+        raise NotFoundError(detail="No such job")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=job.error.status, detail=job.error.detail)
+    if job.status != JobStatus.COMPLETE:
+        return job, None
+    if (data := await client.get(result_key(job_id))) is None:
+        raise NotFoundError(detail="This job's result has expired; submit it again")
+    return job, data
+
+
+async def watch(client: Redis, job_id: str) -> AsyncIterator[schemas.Job]:
+    """
+    Function to follow a job until it finishes
+
+    The stored state is read once subscribed, and again whenever nothing is published for
+    :data:`constants.JOB_POLL_INTERVAL` seconds, so changes made before the subscription started (or
+    missed while it reconnected) are still seen.
+
+    :param client: The redis client
+    :param job_id: The job's ID
+    :return: The job's state as it changes, ending with it complete or failed (or gone, if it expires)
+    """
+    async with job_events.subscribe(lambda event: event["id"] == job_id) as queue:
+        job = await get_job(client, job_id)
+        while job is not None:
+            yield job
+            if job.status in _FINISHED:
+                return
+            try:
+                job = schemas.Job.model_validate_json(await asyncio.wait_for(queue.get(), constants.JOB_POLL_INTERVAL))
+            except TimeoutError:
+                job = await get_job(client, job_id)
+
+
+async def job_event_stream(job_id: str) -> AsyncIterator[bytes]:
+    """
+    Function to stream a job's state as Server-Sent Events until it finishes
+
+    :param job_id: The job's ID
+    :return: The encoded SSE frames
+    """
+    client = cache.get_client()
+    try:
+        async for job in watch(client, job_id):
+            yield b"event: job\ndata: " + job.model_dump_json().encode() + b"\n\n"
+    finally:
+        await client.aclose()
+
+
+async def fetch(kind: JobKind, id: str, pages: int) -> BaseModel:
+    """
+    Function to get the result of a scrape, run as a job when the cache is enabled
+
+    As a job, the scrape is shared with every other request for it, runs on the worker, and its result is
+    kept for reuse; without the cache it is run here.
+
+    :param kind: What to scrape
+    :param id: The player's or team's ID
+    :param pages: How many pages of history to scrape; ``<= 0`` for all of it
+    :return: The player or team
+    """
+    if not settings.ENABLE_CACHE:
+        return await scrape(kind, id, pages)
+
+    client = cache.get_client()
+    try:
+        id_ = (await submit(client, kind, id, pages)).id
+        async for _ in watch(client, id_):
+            pass
+        _, data = await job_result(client, id_)
+        if data is None:
+            raise NotFoundError(detail="This job has expired; submit it again")
+        return JOB_MODELS[kind].model_validate_json(data)
+    finally:
+        await client.aclose()
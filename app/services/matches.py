@@ -1,20 +1,31 @@
 import asyncio
 import http
+import json
+import logging
 import re
+import time
 from asyncio import gather
+from concurrent.futures import Executor
+from contextlib import aclosing
 from datetime import datetime
-from itertools import chain
+from itertools import chain, repeat
+from operator import attrgetter
+from typing import AsyncIterator, Callable, TypedDict
 
 import dateutil.parser
 from bs4 import BeautifulSoup, Tag
 from bs4.element import ResultSet
-from app.exceptions import ScrapingError
+from app.exceptions import BadRequestError, ScrapingError
 from redis.asyncio import Redis
+from redis.exceptions import WatchError
 
 from app import schemas, cache
 import app.constants as constants
+from app.core import metrics
 from app.core.config import settings
 from app.core.connections import get_http_client
+from app.core.pubsub import Broker
+from app.services import archive, pagination, stale, webhooks
 from app.utils import (
     clean_number_string,
     clean_string,
@@ -28,19 +39,110 @@ from app.utils import (
 # Max concurrent fallback HTTP requests to avoid rate-limiting vlr.gg
 _MAX_CONCURRENT_FALLBACKS = 10
 
+# The id fallback only reads the teams and the event off the match page.
+_FALLBACK_SECTIONS = frozenset({constants.MatchSection.TEAMS, constants.MatchSection.EVENT})
+
+# `rounds` and `scoreboard` live inside each map, so asking for either implies the maps themselves.
+MAP_SECTIONS = frozenset(
+    {constants.MatchSection.MAPS, constants.MatchSection.ROUNDS, constants.MatchSection.SCOREBOARD}
+)
+
+# Response fields owned by each top-level section; `bans` is the map veto, so it travels with the maps.
+_SECTION_FIELDS = {
+    constants.MatchSection.TEAMS: ("teams",),
+    constants.MatchSection.EVENT: ("event",),
+    constants.MatchSection.VIDEOS: ("videos",),
+    constants.MatchSection.H2H: ("previous_encounters",),
+}
+_MAP_FIELDS = ("bans", "map_count", "data")
+# Per-map fields owned by the sub-sections of `maps`.
+_MAP_DATA_FIELDS = {constants.MatchSection.ROUNDS: "rounds", constants.MatchSection.SCOREBOARD: "members"}
+
+# The live poller reads the series score off the header and the current map off the map headers.
+LIVE_SECTIONS = frozenset({constants.MatchSection.TEAMS, constants.MatchSection.MAPS})
+# Hash of match ID -> last polled live state, diffed against on every poll.
+LIVE_STATE_KEY = "matches:live"
+
+# The version of the cached `matches` list, the counter it is drawn from, and per version the delta
+# from the previous one.
+MATCHES_VERSION_KEY = "matches:version"
+MATCHES_VERSION_COUNTER_KEY = "matches:version:counter"
+
+
+def changelog_key(version: int) -> str:
+    return f"matches:changelog:{version}"
+
+
+# Changes to listed matches are published here by the crons, and fanned out to stream subscribers.
+MATCH_CHANGES_CHANNEL = "matches:changes"
+match_changes = Broker(MATCH_CHANGES_CHANNEL, queue_size=constants.MATCH_STREAM_QUEUE_SIZE)
+
 # VLR serves 50 completed match cards per results page. When fetching "all" pages we request
 # them in batches of this size and stop as soon as a page yields no cards.
 COMPLETED_PAGE_BATCH_SIZE = 5
 
 
-async def match_by_id(id: str, redis_client: Redis | None) -> schemas.MatchWithDetails:
+def match_cache_key(id: str) -> str:
+    return f"match:{id}"
+
+
+async def match_by_id(
+    id: str,
+    redis_client: Redis | None,
+    sections: frozenset[constants.MatchSection] = constants.ALL_MATCH_SECTIONS,
+) -> schemas.MatchWithDetails:
     """
     Function to fetch a match from VLR, and return the parsed response
 
     :param id: The match ID
     :param redis_client: Shared Redis client, or ``None`` to let cache helpers manage a client
+    :param sections: The sections to parse. Parsers for the other sections are skipped and their
+        fields keep their defaults. A cached complete match is returned whole.
     :return: The parsed match
     """
+    # Short-TTL cache (no cron for by-id pages): collapses duplicate live fetches.
+    if cached := await cache.get(match_cache_key(id), client=redis_client):
+        return metrics.validate(schemas.MatchWithDetails, cached)
+    return await stale.fetch_or_stale(
+        match_cache_key(id),
+        lambda: scrape_match(id, redis_client, sections),
+        schemas.MatchWithDetails.model_validate_json,
+        redis_client,
+    )
+
+
+async def match_json_by_id(id: str, redis_client: Redis | None, sections: frozenset[constants.MatchSection]) -> bytes:
+    """
+    Function to fetch a match and serialize only the requested sections
+
+    :param id: The match ID
+    :param redis_client: Shared Redis client, or ``None`` to let cache helpers manage a client
+    :param sections: The selected sections
+    :return: The JSON response body
+    """
+    if cached := await cache.get(match_cache_key(id), client=redis_client):
+        return slice_match_json(cached, sections)
+
+    async def fetch() -> bytes:
+        result = await scrape_match(id, redis_client, sections)
+        return result.model_dump_json(exclude=section_exclude(sections)).encode()
+
+    return await stale.fetch_or_stale(
+        match_cache_key(id), fetch, lambda data: slice_match_json(data, sections), redis_client
+    )
+
+
+async def scrape_match(
+    id: str, redis_client: Redis | None, sections: frozenset[constants.MatchSection]
+) -> schemas.MatchWithDetails:
+    """
+    Function to scrape a match page, running only the parsers for the requested sections
+
+    :param id: The match ID
+    :param redis_client: Shared Redis client, or ``None`` to let cache helpers manage a client
+    :param sections: The sections to parse
+    :return: The parsed match; complete results are also cached
+    """
     async with get_http_client() as client:
         response = await client.get(constants.MATCH_URL_WITH_ID.format(id))
         if response.status_code != http.HTTPStatus.OK:
@@ -48,21 +150,90 @@ async def match_by_id(id: str, redis_client: Redis | None) -> schemas.MatchWithD
 
     soup = BeautifulSoup(response.content, "lxml")
 
-    bans = get_ban_data(soup.find_all("div", class_="match-header-note"))
-    event = get_event_data(soup)
-    video_data = get_video_data(soup.find("div", class_="match-streams-bets-container"))
-    map_ret = get_map_data(soup.find_all("div", class_="vm-stats"))
-    h2h_matches = get_previous_encounters_data(soup.find("div", class_="wf-card match-h2h"))
-    teams = await get_team_data(soup.find_all("div", class_="match-header-vs"), client=redis_client)
-    return schemas.MatchWithDetails(
-        teams=teams,
-        bans=bans,
-        event=event,
-        videos=video_data,
-        data=map_ret[0],
-        map_count=map_ret[1],
-        previous_encounters=h2h_matches,
-    )
+    parsed: dict = {}
+    if constants.MatchSection.TEAMS in sections:
+        parsed["teams"] = await get_team_data(soup.find_all("div", class_="match-header-vs"), client=redis_client)
+    if constants.MatchSection.EVENT in sections:
+        parsed["event"] = get_event_data(soup)
+    if constants.MatchSection.VIDEOS in sections:
+        parsed["videos"] = get_video_data(soup.find("div", class_="match-streams-bets-container"))
+    if sections & MAP_SECTIONS:
+        parsed["bans"] = get_ban_data(soup.find_all("div", class_="match-header-note"))
+        parsed["data"], parsed["map_count"] = get_map_data(
+            soup.find_all("div", class_="vm-stats"),
+            rounds=constants.MatchSection.ROUNDS in sections,
+            scoreboard=constants.MatchSection.SCOREBOARD in sections,
+        )
+    if constants.MatchSection.H2H in sections:
+        parsed["previous_encounters"] = get_previous_encounters_data(soup.find("div", class_="wf-card match-h2h"))
+    result = metrics.validate(schemas.MatchWithDetails, parsed)
+
+    if sections >= constants.ALL_MATCH_SECTIONS:
+        await cache.set(
+            match_cache_key(id),
+            metrics.serialize(result),
+            ttl=constants.CACHE_TTL_MATCH,
+            client=redis_client,
+            stale_ttl=constants.CACHE_TTL_STALE,
+        )
+    return result
+
+
+def parse_sections(value: str | None) -> frozenset[constants.MatchSection]:
+    """
+    Function to parse a comma-separated ``sections`` query value
+
+    :param value: The raw value, e.g. ``"teams,event"``. Empty or ``None`` selects every section.
+    :return: The selected sections
+    """
+    if not value or not (names := [name.strip().lower() for name in value.split(",") if name.strip()]):
+        return constants.ALL_MATCH_SECTIONS
+    try:
+        return frozenset(constants.MatchSection(name) for name in names)
+    except ValueError:
+        valid = ", ".join(section.value for section in constants.MatchSection)
+        raise BadRequestError(detail=f"Unknown section in {value!r}; valid sections are: {valid}")
+
+
+def section_exclude(sections: frozenset[constants.MatchSection]) -> dict:
+    """
+    Function to build the serialization ``exclude`` for the sections that were not requested
+
+    :param sections: The selected sections
+    :return: A pydantic ``exclude`` mapping, empty when every section is selected
+    """
+    exclude: dict = {
+        field: True for section, fields in _SECTION_FIELDS.items() if section not in sections for field in fields
+    }
+    if not sections & MAP_SECTIONS:
+        exclude |= dict.fromkeys(_MAP_FIELDS, True)
+    elif skipped := {field for section, field in _MAP_DATA_FIELDS.items() if section not in sections}:
+        exclude["data"] = {"__all__": skipped}
+    return exclude
+
+
+def slice_match_json(data: bytes, sections: frozenset[constants.MatchSection]) -> bytes:
+    """
+    Function to cut a serialized complete match down to the requested sections
+
+    Works on the plain JSON rather than re-validating the model, so serving a cached match costs one
+    ``json`` round trip at most, and nothing when every section is requested.
+
+    :param data: The serialized :class:`schemas.MatchWithDetails`
+    :param sections: The selected sections
+    :return: The serialized subset
+    """
+    if not (exclude := section_exclude(sections)):
+        return data
+    match = json.loads(data)
+    for field, rule in exclude.items():
+        if rule is True:
+            match.pop(field, None)
+            continue
+        for map_data in match.get(field, []):
+            for nested in rule["__all__"]:
+                map_data.pop(nested, None)
+    return json.dumps(match, separators=(",", ":"), ensure_ascii=False).encode()
 
 
 async def get_team_data(data: ResultSet, client: Redis | None) -> list[dict]:
@@ -116,6 +287,7 @@ async def get_team_data(data: ResultSet, client: Redis | None) -> list[dict]:
     return response
 
 
+@metrics.parser
 def get_ban_data(data: ResultSet) -> list:
     """
     Function to parse the notes from a match page on VLR
@@ -126,6 +298,7 @@ def get_ban_data(data: ResultSet) -> list:
     return [ban_data.strip() for ban_data in data[0].get_text().split(";")] if data else []
 
 
+@metrics.parser
 def get_event_data(soup: BeautifulSoup) -> dict:
     """
     Function to extract event data from a match page on VLR
@@ -169,6 +342,7 @@ def get_event_data(soup: BeautifulSoup) -> dict:
     return ret
 
 
+@metrics.parser
 def get_video_data(data: Tag) -> dict[str, list]:
     """
     Function to extract information about stream/VOD links from a match page on VLR
@@ -207,106 +381,246 @@ def get_video_data(data: Tag) -> dict[str, list]:
     return response
 
 
-def get_map_data(data: ResultSet) -> tuple[list, int]:
+class MapNodes(TypedDict):
+    """The elements of one ``vm-stats-game`` block that map parsing reads, collected in a single walk."""
+
+    block: Tag
+    game_id: str
+    team_names: list[Tag]
+    scores: list[Tag]
+    round_teams: list[Tag]
+    round_cols: list[Tag]
+    scoreboards: list[Tag]
+    overview_rows: list[Tag]
+
+
+class MapStatsNodes(TypedDict):
+    """The elements of a ``vm-stats`` container, collected in a single walk."""
+
+    nav_items: list[Tag]
+    disabled: list[Tag]
+    map_labels: list[Tag]
+    games: list[MapNodes]
+
+
+def walk_map_stats(stats: Tag) -> MapStatsNodes:
+    """
+    Walk a ``vm-stats`` subtree once, bucketing every element that map parsing needs.
+
+    A best-of-5 page carries six ``vm-stats-game`` blocks, and scanning each of them separately for
+    team names, scores, round columns and scoreboards walks the same subtrees over and over. This
+    visits every element exactly once, in document order, so each bucket keeps the order that
+    ``find_all`` would have returned. Classes are matched by token, as ``find_all(class_=...)`` does.
+
+    :param stats: The ``vm-stats`` container (or any tree holding ``vm-stats-game`` blocks)
+    :return: The bucketed elements
+    """
+    result: MapStatsNodes = {"nav_items": [], "disabled": [], "map_labels": [], "games": []}
+    # Each entry carries the enclosing game block (if any), and whether the element sits inside that
+    # block's first `vlr-rounds` container, which is where the short team names live.
+    stack: list[tuple[Tag, MapNodes | None, bool]] = [
+        (child, None, False) for child in reversed(stats.contents) if isinstance(child, Tag)
+    ]
+    # Game blocks whose first `vlr-rounds` container has already been entered, by identity.
+    rounds_seen: set[int] = set()
+    while stack:
+        tag, game, in_rounds = stack.pop()
+        if tag.name == "tbody":
+            if game is not None:
+                game["scoreboards"].append(tag)
+        elif tag.name == "div" and (classes := tag.get("class")):
+            if "vm-stats-gamesnav-item" in classes:
+                result["nav_items"].append(tag)
+            if "mod-disabled" in classes:
+                result["disabled"].append(tag)
+            if "map" in classes:
+                result["map_labels"].append(tag)
+            if "vm-stats-game" in classes:
+                game = {
+                    "block": tag,
+                    "game_id": tag.get("data-game-id", ""),
+                    "team_names": [],
+                    "scores": [],
+                    "round_teams": [],
+                    "round_cols": [],
+                    "scoreboards": [],
+                    "overview_rows": [],
+                }
+                result["games"].append(game)
+            elif game is not None:
+                if "team-name" in classes:
+                    game["team_names"].append(tag)
+                if "score" in classes:
+                    game["scores"].append(tag)
+                if "vlr-rounds-row-col" in classes:
+                    game["round_cols"].append(tag)
+                if "ovw-row" in classes and "mod-head" not in classes:
+                    game["overview_rows"].append(tag)
+                if in_rounds and "team" in classes:
+                    game["round_teams"].append(tag)
+                if "vlr-rounds" in classes and id(game) not in rounds_seen:
+                    rounds_seen.add(id(game))
+                    in_rounds = True
+        stack.extend((child, game, in_rounds) for child in reversed(tag.contents) if isinstance(child, Tag))
+    return result
+
+
+@metrics.parser
+def get_map_data(
+    data: ResultSet, executor: Executor | None = None, rounds: bool = True, scoreboard: bool = True
+) -> tuple[list, int]:
     """
     Function to extract information about a map from a match page on VLR
     :param data: The data about the maps
+    :param executor: Optional worker pool to parse the played maps in parallel. Each map's block is
+        handed over as HTML and re-parsed in the worker, so this only pays off for pools of processes
+        on multi-map pages; ``None`` parses inline.
+    :param rounds: Whether to parse each map's rounds; skipped maps get an empty list
+    :param scoreboard: Whether to parse each map's scoreboard; skipped maps get an empty list
     :return: The parsed data
     """
     stats = data[0]
-
-    # Extract stats first
-    map_stats = stats.find_all("div", class_="vm-stats-game")
+    nodes = walk_map_stats(stats)
 
     # Extract map names if there were multiple maps
     maps = {
         map_data["data-game-id"]: "".join(i for i in clean_string(map_data.get_text()) if not i.isdigit())
-        for map_data in stats.find_all("div", class_="vm-stats-gamesnav-item")
+        for map_data in nodes["nav_items"]
     }
 
     # If the above dict is empty (i.e. no vm-stats-gamesnav-item), we know that there is a single map
     if maps == {}:
-        if map_data := stats.find_all("div", class_="map"):
+        if map_data := nodes["map_labels"]:
             maps = {stats["data-game-id"]: map_data[0].find("span").get_text().strip()}
             map_count = 1
         else:
             map_count = 0
     else:
         # Set the number of maps actually played (remove disabled ones basically)
-        map_count = len(maps) - 1 - len(stats.find_all("div", class_="mod-disabled"))
+        map_count = len(maps) - 1 - len(nodes["disabled"])
+
+    played = [
+        game
+        for game in nodes["games"]
+        if (match_map_id := game["game_id"]) != "all" and maps.get(match_map_id, "").lower() != constants.TBD
+    ]
+    if executor is None:
+        return [parse_map(game, maps.get(game["game_id"]), rounds, scoreboard) for game in played], map_count
+
+    # Tags can't cross a process boundary, so each played block travels as HTML and is re-walked there.
+    return (
+        list(
+            executor.map(
+                parse_map_html,
+                [str(game["block"]) for game in played],
+                [maps.get(game["game_id"]) for game in played],
+                repeat(rounds, len(played)),
+                repeat(scoreboard, len(played)),
+            )
+        ),
+        map_count,
+    )
 
-    map_ret = []
-    for map_data in map_stats:
-        if (match_map_id := map_data["data-game-id"]) == "all" or maps.get(match_map_id, "").lower() == constants.TBD:
-            continue
-        teams = [
-            {
-                "name": map_data.find_all("div", class_="team-name")[i].get_text().strip(),
-                "score": map_data.find_all("div", class_="score")[i].get_text().strip(),
-            }
-            for i in range(2)
-        ]
-        team_short_name = [
-            clean_string(elem.get_text())
-            for elem in map_data.find("div", class_="vlr-rounds").find_all("div", class_="team")
-        ]
-        team_name_mapping = {short: long["name"] for short, long in zip(team_short_name, teams)}
-        rounds = []
-        # TODO: find a better solution, only done to prevent warning at 201 (tuple[int, ...] vs tuple[int, int])
-        prev: tuple[int, ...] = (0, 0)
-        for round_data in map_data.find_all("div", class_="vlr-rounds-row-col")[1:]:
-            if round_current_score := round_data.get("title"):
-                round_score = clean_string(round_current_score)
-                side, round_winner = "", ""
-                if round_score != "":
-                    current = tuple(map(int, round_score.split("-")))
-                    if prev[0] == current[0]:
-                        round_winner = "team2"
-                    elif prev[1] == current[1]:
-                        round_winner = "team1"
-
-                    prev = current
-
-                win_type: str | None = None
-                if round_win_data := round_data.find_all("div", class_="mod-win"):
-                    side = {
-                        "mod-t": "attack",
-                        "mod-ct": "defense",
-                    }.get(round_win_data[0].get("class")[2], "")
-
-                    if (img := round_win_data[0].find("img")) and (img_src := img.get("src")):
-                        win_type = {
-                            "elim": "Elimination",
-                            "time": "Time out",
-                            "defuse": "Defused",
-                            "boom": "Spike exploded",
-                        }.get(img_src.split("/")[-1].split(".")[0])
-
-                rounds.append(
-                    {
-                        "round_number": clean_string(round_data.find("div", class_="rnd-num").get_text()),
-                        "round_score": round_score,
-                        "winner": round_winner,
-                        "side": side,
-                        "win_type": win_type or "Not Played",
-                    }
-                )
 
-        scoreboards = map_data.find_all("tbody")
-        members = (
-            list(chain(*(parse_scoreboard(element, team_name_mapping) for element in scoreboards)))
-            if scoreboards
-            else parse_overview_scoreboard(map_data, team_name_mapping)
+@metrics.parser
+def parse_map_html(html: str, map_name: str | None, rounds: bool = True, scoreboard: bool = True) -> dict:
+    """Parse a single serialized ``vm-stats-game`` block. Runs in a worker for parallel map parsing."""
+    return parse_map(walk_map_stats(BeautifulSoup(html, "lxml"))["games"][0], map_name, rounds, scoreboard)
+
+
+def parse_map(game: MapNodes, map_name: str | None, rounds: bool = True, scoreboard: bool = True) -> dict:
+    """
+    Function to parse a single map from the elements collected by :func:`walk_map_stats`
+    :param game: The map's bucketed elements
+    :param map_name: The map's name
+    :param rounds: Whether to parse the rounds
+    :param scoreboard: Whether to parse the scoreboard
+    :return: The parsed map
+    """
+    teams = [
+        {
+            "name": game["team_names"][i].get_text().strip(),
+            "score": game["scores"][i].get_text().strip(),
+        }
+        for i in range(2)
+    ]
+    ret: dict = {"map": map_name, "teams": teams}
+    if scoreboard:
+        team_short_name = [clean_string(elem.get_text()) for elem in game["round_teams"]]
+        team_name_mapping = {short: long["name"] for short, long in zip(team_short_name, teams)}
+        ret["members"] = (
+            list(chain(*(parse_scoreboard(element, team_name_mapping) for element in game["scoreboards"])))
+            if game["scoreboards"]
+            else parse_overview_rows(game["overview_rows"], team_name_mapping)
         )
-        map_ret.append({"map": maps.get(match_map_id), "teams": teams, "members": members, "rounds": rounds})
-    return map_ret, map_count
+    if rounds:
+        ret["rounds"] = parse_rounds(game["round_cols"][1:])
+    return ret
+
+
+def parse_rounds(round_cols: list[Tag]) -> list[dict]:
+    """
+    Function to parse the round-by-round breakdown of a map
+    :param round_cols: The ``vlr-rounds-row-col`` columns, without the leading team-name column
+    :return: The parsed rounds
+    """
+    rounds = []
+    # TODO: find a better solution, only done to prevent warning at 201 (tuple[int, ...] vs tuple[int, int])
+    prev: tuple[int, ...] = (0, 0)
+    for round_data in round_cols:
+        if round_current_score := round_data.get("title"):
+            round_score = clean_string(round_current_score)
+            side, round_winner = "", ""
+            if round_score != "":
+                current = tuple(map(int, round_score.split("-")))
+                if prev[0] == current[0]:
+                    round_winner = "team2"
+                elif prev[1] == current[1]:
+                    round_winner = "team1"
+
+                prev = current
+
+            win_type: str | None = None
+            if round_win_data := round_data.find_all("div", class_="mod-win"):
+                side = {
+                    "mod-t": "attack",
+                    "mod-ct": "defense",
+                }.get(round_win_data[0].get("class")[2], "")
+
+                if (img := round_win_data[0].find("img")) and (img_src := img.get("src")):
+                    win_type = {
+                        "elim": "Elimination",
+                        "time": "Time out",
+                        "defuse": "Defused",
+                        "boom": "Spike exploded",
+                    }.get(img_src.split("/")[-1].split(".")[0])
+
+            rounds.append(
+                {
+                    "round_number": clean_string(round_data.find("div", class_="rnd-num").get_text()),
+                    "round_score": round_score,
+                    "winner": round_winner,
+                    "side": side,
+                    "win_type": win_type or "Not Played",
+                }
+            )
+    return rounds
 
 
 def parse_scoreboard(data: Tag, team_name_mapping: dict[str, str]) -> list:
     ret = []
     for player in data.find_all("tr"):
-        data = player.find("td", class_="mod-player")
-        stats = player.find_all("td", class_="mod-stat")
+        # One pass over the row's cells instead of a separate search per cell kind.
+        data = agents = None
+        stats = []
+        for cell in player.find_all("td"):
+            classes = cell.get("class") or ()
+            if data is None and "mod-player" in classes:
+                data = cell
+            if agents is None and "mod-agents" in classes:
+                agents = cell
+            if "mod-stat" in classes:
+                stats.append(cell)
         team_name_short = clean_string(data.find_all("div", class_="ge-text-light")[-1].get_text())
         player_id = ""
         if player_data := data.find("a"):
@@ -318,8 +632,7 @@ def parse_scoreboard(data: Tag, team_name_mapping: dict[str, str]) -> list:
                 "name": clean_string(data.find("div", class_="text-of").get_text()),
                 "team": team_name_mapping.get(team_name_short, team_name_short),
                 "agents": [
-                    {"title": agent["title"], "img": get_image_url(agent["src"])}
-                    for agent in player.find("td", class_="mod-agents").find_all("img")
+                    {"title": agent["title"], "img": get_image_url(agent["src"])} for agent in agents.find_all("img")
                 ],
                 "rating": clean_number_string(stats[0].find("span", class_="side mod-side mod-both").get_text()),
                 "acs": clean_number_string(stats[1].find("span", class_="side mod-side mod-both").get_text()),
@@ -339,17 +652,27 @@ def parse_scoreboard(data: Tag, team_name_mapping: dict[str, str]) -> list:
 
 def parse_overview_scoreboard(data: Tag, team_name_mapping: dict[str, str]) -> list:
     """Parse VLR's div-based overview scoreboard layout."""
+    return parse_overview_rows(data.select("div.ovw-row:not(.mod-head)"), team_name_mapping)
+
+
+def parse_overview_rows(rows: list[Tag], team_name_mapping: dict[str, str]) -> list:
+    """Parse the player rows of VLR's div-based overview scoreboard layout."""
 
-    def overall_stat(row: Tag, column: str) -> int | float:
-        if (cell := row.find(attrs={"data-col": column})) and (value := cell.select_one("span.side.mod-both")):
+    def overall_stat(cells: dict[str, Tag], column: str) -> int | float:
+        if (cell := cells.get(column)) and (value := cell.select_one("span.side.mod-both")):
             return clean_number_string(value.get_text())
         return 0
 
     ret = []
-    for player in data.select("div.ovw-row:not(.mod-head)"):
+    for player in rows:
         if not (player_data := player.select_one("div.ovw-cell.mod-player")):
             continue
 
+        # Index the stat cells once per row; the first cell for a column wins, as `find` would.
+        cells: dict[str, Tag] = {}
+        for cell in player.find_all(attrs={"data-col": True}):
+            cells.setdefault(str(cell["data-col"]), cell)
+
         player_id = ""
         if (player_link := player_data.find("a")) and (href := player_link.get("href")):
             player_id = get_href(href).split("/")[-2]
@@ -364,22 +687,23 @@ def parse_overview_scoreboard(data: Tag, team_name_mapping: dict[str, str]) -> l
                     {"title": agent["title"], "img": get_image_url(agent["src"])}
                     for agent in player_data.select("div.ovw-agents img")
                 ],
-                "rating": overall_stat(player, "rating2"),
-                "acs": overall_stat(player, "acs"),
-                "kills": overall_stat(player, "kills"),
-                "deaths": overall_stat(player, "deaths"),
-                "assists": overall_stat(player, "assists"),
-                "kast": overall_stat(player, "kast"),
-                "adr": overall_stat(player, "adr"),
-                "headshot_percent": overall_stat(player, "hsp"),
-                "first_kills": overall_stat(player, "fb"),
-                "first_deaths": overall_stat(player, "fd"),
-                "first_kills_diff": overall_stat(player, "fk-diff"),
+                "rating": overall_stat(cells, "rating2"),
+                "acs": overall_stat(cells, "acs"),
+                "kills": overall_stat(cells, "kills"),
+                "deaths": overall_stat(cells, "deaths"),
+                "assists": overall_stat(cells, "assists"),
+                "kast": overall_stat(cells, "kast"),
+                "adr": overall_stat(cells, "adr"),
+                "headshot_percent": overall_stat(cells, "hsp"),
+                "first_kills": overall_stat(cells, "fb"),
+                "first_deaths": overall_stat(cells, "fd"),
+                "first_kills_diff": overall_stat(cells, "fk-diff"),
             }
         )
     return ret
 
 
+@metrics.parser
 def get_previous_encounters_data(data: Tag) -> list[dict]:
     """
     :param data: Previous encounters data
@@ -408,6 +732,381 @@ def get_previous_encounters_data(data: Tag) -> list[dict]:
     return response
 
 
+async def poll_live_matches(redis_client: Redis) -> dict[str, dict]:
+    """
+    Function to poll the detail pages of live matches and patch their changes into the cached match list
+
+    Only matches listed as live in the cached ``matches`` payload are polled, at most
+    :data:`constants.LIVE_POLL_BUDGET` per minute, least recently polled first. Each poll is diffed
+    against the previous one, and the payload is only rewritten when something changed.
+
+    :param redis_client: The redis client
+    :return: The changed fields of each match that changed
+    """
+    if not (cached := await redis_client.get("matches")):
+        return {}
+    match_list = schemas.MatchListAdapter.validate_json(cached)
+    live_ids = {match.id for match in match_list if match.status in constants.LIVE_MATCH_STATUSES}
+
+    states = {key.decode(): json.loads(value) for key, value in (await redis_client.hgetall(LIVE_STATE_KEY)).items()}
+    if finished := states.keys() - live_ids:
+        await redis_client.hdel(LIVE_STATE_KEY, *finished)
+    if not live_ids:
+        return {}
+
+    batch_size = max(constants.LIVE_POLL_BUDGET * constants.LIVE_POLL_INTERVAL // 60, 1)
+    due = sorted(live_ids, key=lambda match_id: states.get(match_id, {}).get("polled", 0))[:batch_size]
+    results = await gather(*[live_match_state(match_id, redis_client) for match_id in due], return_exceptions=True)
+
+    polled = time.time()
+    changes: dict[str, dict] = {}
+    updates: dict[str, str] = {}
+    for match_id, state in zip(due, results):
+        if isinstance(state, Exception):
+            logging.warning("live poll failed for match %s", match_id, exc_info=state)
+            continue
+        previous = states.get(match_id, {})
+        if changed := {field: value for field, value in state.items() if previous.get(field) != value}:
+            changes[match_id] = changed
+        updates[match_id] = json.dumps(state | {"polled": polled})
+
+    if updates:
+        await redis_client.hset(LIVE_STATE_KEY, mapping=updates)
+        await redis_client.expire(LIVE_STATE_KEY, constants.CACHE_TTL_MATCHES)
+    if changes and (patched := await patch_match_list(redis_client, changes)):
+        await publish_match_changes(redis_client, [match_change_event(match, changes[match.id]) for match in patched])
+    return changes
+
+
+async def live_match_state(match_id: str, redis_client: Redis) -> dict:
+    """
+    Function to read the live state of a match off its detail page
+
+    :param match_id: The match ID
+    :param redis_client: The redis client
+    :return: The series score, the map being played and the round being played on it, if any
+    """
+    match = await scrape_match(match_id, redis_client, LIVE_SECTIONS)
+    state = {
+        "team1": match.teams[0].score if match.teams else None,
+        "team2": match.teams[1].score if len(match.teams) > 1 else None,
+        "current_map": None,
+        "current_round": None,
+    }
+    # The first undecided map is the one being played. Between maps the last one is still reported,
+    # but with no round, since it's over; once the series is won, neither.
+    if current := next((map_data for map_data in match.data if not map_decided(map_data)), None):
+        state["current_map"] = current.map
+        state["current_round"] = sum(team.score or 0 for team in current.teams) + 1
+    elif match.data and not series_decided(match):
+        state["current_map"] = match.data[-1].map
+    return state
+
+
+def map_decided(map_data: schemas.MatchData) -> bool:
+    """
+    Function to check whether a map has been won
+
+    :param map_data: The parsed map
+    :return: Whether either team has won the map
+    """
+    scores = [team.score or 0 for team in map_data.teams]
+    return max(scores) >= constants.ROUNDS_TO_WIN_MAP and abs(scores[0] - scores[1]) >= 2
+
+
+def series_decided(match: schemas.MatchWithDetails) -> bool:
+    """
+    Function to check whether a series has been won
+
+    :param match: The parsed match
+    :return: Whether either team has won a majority of the series' maps
+    """
+    scores = [team.score or 0 for team in match.teams]
+    return bool(scores) and max(scores) > match.map_count // 2
+
+
+def apply_live_state(match: schemas.Match, state: dict) -> None:
+    """
+    Function to write polled live fields onto a listed match
+
+    :param match: The listed match
+    :param state: The fields to apply; any subset of a :func:`live_match_state` result
+    :return: Nothing
+    """
+    if "team1" in state:
+        match.team1.score = state["team1"]
+    if "team2" in state:
+        match.team2.score = state["team2"]
+    if "current_map" in state:
+        match.current_map = state["current_map"]
+    if "current_round" in state:
+        match.current_round = state["current_round"]
+
+
+async def overlay_live_states(match_list: list[schemas.Match], redis_client: Redis) -> None:
+    """
+    Function to carry the polled map and round over onto a freshly scraped match list
+
+    The list page has its own scores, but not the map and round, which only the poller knows.
+
+    :param match_list: The freshly scraped matches
+    :param redis_client: The redis client
+    :return: Nothing
+    """
+    if not (states := await redis_client.hgetall(LIVE_STATE_KEY)):
+        return
+    for match in match_list:
+        if match.status in constants.LIVE_MATCH_STATUSES and (state := states.get(match.id.encode())):
+            state = json.loads(state)
+            apply_live_state(match, {"current_map": state["current_map"], "current_round": state["current_round"]})
+
+
+def match_list_delta(
+    previous: list[schemas.Match], current: list[schemas.Match]
+) -> tuple[list[schemas.Match], list[str]]:
+    """
+    Function to diff two versions of the match list by match ID
+
+    :param previous: The previous list
+    :param current: The new list
+    :return: The added or changed matches, and the IDs of the removed ones
+    """
+    before = {match.id: match for match in previous}
+    current_ids = {match.id for match in current}
+    return [match for match in current if before.get(match.id) != match], [
+        match_id for match_id in before if match_id not in current_ids
+    ]
+
+
+async def store_match_list(
+    redis_client: Redis,
+    match_list: list[schemas.Match],
+    upserted: list[schemas.Match],
+    removed: list[str],
+    ttl: int | None = constants.CACHE_TTL_MATCHES,
+) -> int | None:
+    """
+    Function to cache the match list under a new version, along with its delta from the previous one
+
+    :param redis_client: The redis client
+    :param match_list: The full list
+    :param upserted: The matches added or changed since the previous version
+    :param removed: The IDs of the matches removed since the previous version
+    :param ttl: The list's TTL, or ``None`` to keep the current one
+    :return: The new version
+    """
+    return await write_match_list(redis_client, lambda cached: (match_list, upserted, removed), ttl)
+
+
+async def patch_match_list(redis_client: Redis, changes: dict[str, dict]) -> list[schemas.Match]:
+    """
+    Function to patch polled live fields into the cached match list as it is now
+
+    A full refresh may have stored a newer list while the live matches were being polled, so the list is re-read
+    when it's written, rather than the one the poll started from written back.
+
+    :param redis_client: The redis client
+    :param changes: The changed live fields of each match, see :func:`live_match_state`
+    :return: The listed matches that were patched
+    """
+    patched: list[schemas.Match] = []
+
+    def patch(cached: bytes | None) -> tuple[list[schemas.Match], list[schemas.Match], list[str]] | None:
+        match_list = schemas.MatchListAdapter.validate_json(cached) if cached else []
+        patched[:] = [match for match in match_list if match.id in changes]
+        for match in patched:
+            apply_live_state(match, changes[match.id])
+        return (match_list, patched, []) if patched else None
+
+    await write_match_list(redis_client, patch, ttl=None)
+    return patched
+
+
+async def write_match_list(
+    redis_client: Redis,
+    update: Callable[[bytes | None], tuple[list[schemas.Match], list[schemas.Match], list[str]] | None],
+    ttl: int | None,
+) -> int | None:
+    """
+    Function to write the match list and its changelog entry under the next version, in one transaction
+
+    The transaction is retried whenever the list or the version counter changes underneath it, so the full refresh
+    and the live poller can't overwrite each other's lists or skip a version.
+
+    :param redis_client: The redis client
+    :param update: Gets the cached list (if any) and returns the list to store, with the matches upserted and the
+        IDs removed since; or ``None`` to leave it as is
+    :param ttl: The list's TTL, or ``None`` to keep the current one
+    :return: The new version, or ``None`` if nothing was written
+    """
+    expiry = {"ex": ttl} if ttl else {"keepttl": True}
+    async with redis_client.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch("matches", MATCHES_VERSION_COUNTER_KEY)
+                if (change := update(await pipe.get("matches"))) is None:
+                    return None
+                match_list, upserted, removed = change
+                # Watched, so the increment below yields exactly this.
+                version = int(await pipe.get(MATCHES_VERSION_COUNTER_KEY) or 0) + 1
+                data = schemas.MatchListAdapter.dump_json(match_list)
+                pipe.multi()
+                pipe.incr(MATCHES_VERSION_COUNTER_KEY)
+                pipe.set("matches", data, **expiry)
+                cache.add_stale(pipe, "matches", data, constants.CACHE_TTL_STALE)
+                pipe.set(MATCHES_VERSION_KEY, version, **expiry)
+                pipe.set(
+                    changelog_key(version),
+                    schemas.MatchChanges(version=version, matches=upserted, removed=removed).model_dump_json(),
+                    ex=constants.CACHE_TTL_MATCH_CHANGELOG,
+                )
+                await pipe.execute()
+                return version
+            except WatchError:
+                continue
+
+
+async def match_changes_since(since: int | None, redis_client: Redis) -> schemas.MatchChanges:
+    """
+    Function to get the changes to the match list since a version
+
+    The changelog entries after ``since`` are merged, so a match changed several times is sent once.
+    When ``since`` is missing, unknown or too old, the full list is returned instead.
+
+    :param since: The version the client holds
+    :param redis_client: The redis client
+    :return: The delta, or the full list
+    """
+    cached, version = await cache.mget(["matches", MATCHES_VERSION_KEY], client=redis_client) or (None, None)
+    if not cached or not version:
+        return schemas.MatchChanges(version=0, full=True, matches=await match_list(redis_client))
+    version = int(version)
+
+    def full() -> schemas.MatchChanges:
+        # Only built when falling back; a delta doesn't need the whole list validated.
+        return schemas.MatchChanges(version=version, full=True, matches=schemas.MatchListAdapter.validate_json(cached))
+
+    if since is None or not 0 <= version - since <= constants.MAX_MATCH_CHANGELOG_SPAN:
+        return full()
+
+    entries = await cache.mget([changelog_key(v) for v in range(since + 1, version + 1)], client=redis_client) or []
+    if any(entry is None for entry in entries):
+        return full()
+    upserted: dict[str, schemas.Match] = {}
+    removed: set[str] = set()
+    for entry in map(schemas.MatchChanges.model_validate_json, entries):
+        for match in entry.matches:
+            upserted[match.id] = match
+            removed.discard(match.id)
+        for match_id in entry.removed:
+            upserted.pop(match_id, None)
+            removed.add(match_id)
+    return schemas.MatchChanges(version=version, matches=list(upserted.values()), removed=sorted(removed))
+
+
+def match_state(match: schemas.Match) -> dict:
+    """
+    Function to get the fields of a listed match that change events report
+
+    :param match: The listed match
+    :return: The status, scores, and the current map and round
+    """
+    return {
+        "status": match.status.value,
+        "team1": match.team1.score,
+        "team2": match.team2.score,
+        "current_map": match.current_map,
+        "current_round": match.current_round,
+    }
+
+
+def match_change_event(match: schemas.Match, changes: dict) -> dict:
+    """
+    Function to build the change event published for a match
+
+    :param match: The listed match, after the change
+    :param changes: The changed fields and their new values
+    :return: The event, carrying the IDs subscribers filter on
+    """
+    return {
+        "match_id": match.id,
+        "event_id": match.event_id,
+        "team_ids": [team_id for team_id in (match.team1.id, match.team2.id) if team_id],
+        "changes": changes,
+    }
+
+
+def diff_match_lists(previous: list[schemas.Match], current: list[schemas.Match]) -> list[dict]:
+    """
+    Function to diff two scrapes of the match list
+
+    :param previous: The previously cached matches
+    :param current: The fresh matches
+    :return: A change event for every match that is new or changed
+    """
+    before = {match.id: match_state(match) for match in previous}
+    events = []
+    for match in current:
+        state, old = match_state(match), before.get(match.id, {})
+        if changes := {field: value for field, value in state.items() if field not in old or old[field] != value}:
+            events.append(match_change_event(match, changes))
+    return events
+
+
+async def publish_match_changes(redis_client: Redis, events: list[dict]) -> None:
+    """
+    Function to publish match change events to stream subscribers, and queue them for webhooks
+
+    :param redis_client: The redis client
+    :param events: The events to publish
+    :return: Nothing
+    """
+    if not events:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    for event in events:
+        pipe.publish(MATCH_CHANGES_CHANNEL, json.dumps(event, separators=(",", ":")))
+    await pipe.execute()
+    await webhooks.dispatch(redis_client, constants.WebhookEventType.MATCH, events)
+
+
+def match_change_filter(
+    match_ids: list[str] | None, team_ids: list[str] | None, event_ids: list[str] | None
+) -> Callable[[dict], bool]:
+    """
+    Function to build a subscriber filter for match change events
+
+    :param match_ids: Match IDs to receive
+    :param team_ids: Team IDs whose matches to receive
+    :param event_ids: Event IDs whose matches to receive
+    :return: A filter accepting events that match any of the given IDs, or every event if none are given
+    """
+    if not (match_ids or team_ids or event_ids):
+        return lambda event: True
+    match_set, team_set, event_set = set(match_ids or ()), set(team_ids or ()), set(event_ids or ())
+    return lambda event: (
+        event["match_id"] in match_set or event["event_id"] in event_set or not team_set.isdisjoint(event["team_ids"])
+    )
+
+
+async def match_change_stream(accepts: Callable[[dict], bool]) -> AsyncIterator[bytes]:
+    """
+    Function to stream match change events as Server-Sent Events
+
+    :param accepts: The subscriber's filter
+    :return: The encoded SSE frames; comment frames keep idle connections open
+    """
+    async with match_changes.subscribe(accepts) as queue:
+        yield b": connected\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), constants.MATCH_STREAM_KEEPALIVE)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield b"event: match\ndata: " + data + b"\n\n"
+
+
 async def match_list(redis_client: Redis) -> list[schemas.Match]:
     """
     Function to parse a list of matches from the VLR.gg homepage
@@ -487,102 +1186,73 @@ async def get_completed_matches(redis_client: Redis, pages: int = 1) -> list[sch
         A value ``<= 0`` fetches ALL pages, requesting more until a page returns no matches.
     :return: The list of matches
     """
-    async with get_http_client() as client:
-        previous_matches_response = await client.get(constants.PAST_MATCHES_URL)
-        if previous_matches_response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(
-                url=str(previous_matches_response.url), upstream_status=previous_matches_response.status_code
-            )
+    async with get_http_client() as client, aclosing(iter_completed_matches(client, redis_client, pages)) as history:
+        return [match async for page in history for match in page]
+
+
+async def iter_completed_matches(client, redis_client: Redis, pages: int = 1) -> AsyncIterator[list[schemas.Match]]:
+    """
+    Function to get completed matches from VLR a page at a time
+
+    :param client: The shared HTTP client
+    :param redis_client: A redis instance
+    :param pages: How many pages of completed match results to fetch, as in :func:`get_completed_matches`.
+        A non-200 on any page raises ScrapingError rather than returning a partial list.
+    :return: The parsed matches of each page, in order
+    """
+    previous_matches_response = await client.get(constants.PAST_MATCHES_URL)
+    if previous_matches_response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(
+            url=str(previous_matches_response.url), upstream_status=previous_matches_response.status_code
+        )
+
+    results = await parse_results_page(previous_matches_response.content, redis_client)
+    yield results
+    if results and pages != 1:
+        seen: set[str] = {m.id for m in results}
+        # Use the raw card count as the empty-page sentinel. parse_match silently returns None for cards
+        # missing an event id, so the parsed list can be empty while the page is not; such a page neither
+        # ends the listing nor counts as all-duplicates, and the page cap bounds us instead.
+        async for page in pagination.paginate(
+            client,
+            completed_matches_url,
+            lambda content: parse_results_page(content, redis_client),
+            attrgetter("id"),
+            pages,
+            seen,
+            COMPLETED_PAGE_BATCH_SIZE,
+            is_empty=lambda content, _: not count_result_cards(content),
+        ):
+            yield page
+
+
+async def stream_completed_matches(redis_client: Redis, pages: int = 1) -> AsyncIterator[bytes]:
+    """
+    Function to stream completed matches from VLR as NDJSON, sending each page's results as it is parsed
+
+    :param redis_client: A redis instance
+    :param pages: How many pages of completed match results to fetch, as in :func:`get_completed_matches`
+    :return: One match per line
+    """
+    async with get_http_client() as client, aclosing(iter_completed_matches(client, redis_client, pages)) as history:
+        async for page in history:
+            yield pagination.ndjson(page)
 
-        # Page 1 has been fetched above; grab any additional pages while the client is open.
-        results = await parse_results_page(previous_matches_response.content, redis_client)
-        if results and pages != 1:
-            seen: set[str] = {m.id for m in results}
-            # Clamp bounded mode; full-history mode cap is enforced inside the helper.
-            effective_pages = min(pages, constants.MAX_PAGINATION_PAGES) if pages >= 1 else pages
-            results.extend(await fetch_additional_completed_matches(client, redis_client, effective_pages, seen))
-
-    return results
-
-
-async def fetch_additional_completed_matches(
-    client, redis_client: Redis, pages: int, seen: set[str] | None = None
-) -> list[schemas.Match]:
-    """
-    Fetch completed match results beyond page 1, preserving order (page 2, then 3, ...).
-
-    :param client: The shared HTTP client.
-    :param redis_client: A redis instance.
-    :param pages: Total pages wanted (already clamped by caller for bounded mode).
-        ``> 1`` fetches pages ``2..pages`` concurrently; ``<= 0`` fetches every remaining page
-        in batches up to ``MAX_PAGINATION_PAGES`` total, stopping once a page has no raw cards
-        or contributes no new ids. A non-200 on any page raises ScrapingError rather than
-        returning a partial list (page 1 is already validated by the caller).
-    :param seen: Set of match ids already collected (page 1). New items are filtered against
-        this set in all modes; full-history mode also stops when a page adds zero new ids.
-    :return: The parsed matches from the additional pages, in order.
-    """
-    matches: list[schemas.Match] = []
-    if seen is None:
-        seen = set()
-
-    if pages > 1:
-        # Fetch pages 2..N in batches (not one big fan-out) to bound concurrent load on VLR.
-        stop = False
-        for start in range(2, pages + 1, COMPLETED_PAGE_BATCH_SIZE):
-            batch = range(start, min(start + COMPLETED_PAGE_BATCH_SIZE, pages + 1))
-            responses = await gather(*(client.get(completed_matches_url(p)) for p in batch))
-            for response in responses:
-                if response.status_code != http.HTTPStatus.OK:
-                    raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-                # Use raw card count so pages where parse_match drops all cards don't trigger a false stop.
-                if not count_result_cards(response.content):
-                    stop = True
-                    break
-                page_matches = await parse_results_page(response.content, redis_client)
-                new = [m for m in page_matches if m.id not in seen]
-                seen.update(m.id for m in new)
-                matches.extend(new)
-            if stop:
-                break
-        return matches
-
-    # pages <= 0: fetch all remaining pages in batches until empty (raw card count), all parsed results
-    # are duplicate ids, or MAX_PAGINATION_PAGES total pages (incl. page 1 already fetched) is reached.
-    # NOTE: if raw cards > 0 but page_matches is [] (parse_match silently dropped everything, e.g. all
-    # cards lack an event id), we do NOT stop — the page cap provides the safety net in that case.
-    page = 2
-    pages_crawled = 1  # page 1 already counted
-    while pages_crawled < constants.MAX_PAGINATION_PAGES:
-        batch_size = min(COMPLETED_PAGE_BATCH_SIZE, constants.MAX_PAGINATION_PAGES - pages_crawled)
-        batch = list(range(page, page + batch_size))
-        responses = await gather(*(client.get(completed_matches_url(p)) for p in batch))
-        pages_crawled += len(batch)
-        stop = False
-        for response in responses:
-            if response.status_code != http.HTTPStatus.OK:
-                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-            # Use raw card count as the empty-page sentinel. parse_match may silently return None
-            # for cards missing an event id, so the parsed list can be empty while the page is not.
-            if not count_result_cards(response.content):
-                stop = True
-                break
-            page_matches = await parse_results_page(response.content, redis_client)
-            if page_matches:
-                # Only apply dedup-stop when we have parsed results: if ALL are duplicates the
-                # upstream is looping and we should terminate.  If page_matches is [] (parse failure)
-                # we let the page cap bound us rather than stopping prematurely.
-                new = [m for m in page_matches if m.id not in seen]
-                if not new:
-                    stop = True
-                    break
-                seen.update(m.id for m in new)
-                matches.extend(new)
-        if stop:
-            break
-        page += batch_size
-
-    return matches
+
+def results_archive(redis_client: Redis) -> archive.Listing:
+    """
+    Function to get the archive of completed match results, for cursor pagination
+
+    :param redis_client: A redis instance
+    :return: The listing
+    """
+    return archive.Listing(
+        "matches:results",
+        completed_matches_url,
+        lambda content: parse_results_page(content, redis_client),
+        schemas.Match,
+        is_empty=lambda content, _: not count_result_cards(content),
+    )
 
 
 async def parse_matches(dates: ResultSet, match_data: ResultSet, client: Redis) -> list[schemas.Match]:
@@ -664,7 +1334,7 @@ async def _fallback_fetch_ids(
 ) -> tuple[str | None, str | None, str | None]:
     """Fetch team and event IDs via match_by_id, bounded by semaphore."""
     async with semaphore:
-        data = await match_by_id(match_id, client)
+        data = await match_by_id(match_id, client, _FALLBACK_SECTIONS)
     team1_id = data.teams[0].id if len(data.teams) > 0 else None
     team2_id = data.teams[1].id if len(data.teams) > 1 else None
     event_id = data.event.id if data.event else None
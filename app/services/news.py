@@ -1,6 +1,8 @@
-import asyncio
 import http
 import re
+from contextlib import aclosing
+from operator import attrgetter
+from typing import AsyncIterator
 
 import dateutil.parser
 from bs4 import BeautifulSoup, Tag
@@ -9,7 +11,9 @@ from app.exceptions import ScrapingError
 
 from app import schemas
 import app.constants as constants
+from app.core import metrics
 from app.core.connections import get_http_client
+from app.services import archive, pagination
 from app.utils import expand_url, fix_datetime_tz, get_image_url
 
 
@@ -85,81 +89,13 @@ def news_url(page: int) -> str:
     return f"{constants.NEWS_URL}?page={page}"
 
 
+@metrics.parser
 def parse_news_list(content: bytes) -> list[schemas.NewsItem]:
     """Parse all news cards from a single page of HTML."""
     soup = BeautifulSoup(content, "lxml")
     return [parse_news(news) for news in soup.find_all("a", class_="wf-module-item")]
 
 
-async def fetch_additional_news(client, pages: int, seen: set[str] | None = None) -> list[schemas.NewsItem]:
-    """
-    Fetch news beyond page 1, preserving order (page 2, then 3, ...).
-
-    :param client: The shared HTTP client.
-    :param pages: Total pages wanted (already clamped by caller for bounded mode).
-        ``> 1`` fetches pages ``2..pages`` concurrently; ``<= 0`` fetches every remaining
-        page in batches up to ``MAX_PAGINATION_PAGES`` total, stopping once a page returns
-        no items or contributes no new urls. A non-200 on any page raises ScrapingError
-        rather than returning a partial list (page 1 is already validated by the caller).
-    :param seen: Set of news item urls already collected (page 1). New items are filtered
-        against this set in all modes; full-history mode also stops when a page adds none.
-        NewsItem uses ``url`` as its natural unique key (no separate id field).
-    :return: The parsed news items from the additional pages, in order.
-    """
-    items: list[schemas.NewsItem] = []
-    if seen is None:
-        seen = set()
-
-    if pages > 1:
-        # Fetch pages 2..N in batches (not one big fan-out) to bound concurrent load on VLR.
-        stop = False
-        for start in range(2, pages + 1, NEWS_PAGE_BATCH_SIZE):
-            batch = range(start, min(start + NEWS_PAGE_BATCH_SIZE, pages + 1))
-            responses = await asyncio.gather(*(client.get(news_url(p)) for p in batch))
-            for response in responses:
-                if response.status_code != http.HTTPStatus.OK:
-                    raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-                page_items = parse_news_list(response.content)
-                if not page_items:
-                    stop = True
-                    break
-                new = [item for item in page_items if item.url not in seen]
-                seen.update(item.url for item in new)
-                items.extend(new)
-            if stop:
-                break
-        return items
-
-    # pages <= 0: fetch all remaining pages in batches until empty, zero new urls,
-    # or MAX_PAGINATION_PAGES total pages (including the already-fetched page 1) is reached.
-    page = 2
-    pages_crawled = 1  # page 1 already counted
-    while pages_crawled < constants.MAX_PAGINATION_PAGES:
-        batch_size = min(NEWS_PAGE_BATCH_SIZE, constants.MAX_PAGINATION_PAGES - pages_crawled)
-        batch = list(range(page, page + batch_size))
-        responses = await asyncio.gather(*(client.get(news_url(p)) for p in batch))
-        pages_crawled += len(batch)
-        stop = False
-        for response in responses:
-            if response.status_code != http.HTTPStatus.OK:
-                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-            page_items = parse_news_list(response.content)
-            if not page_items:
-                stop = True
-                break
-            new = [item for item in page_items if item.url not in seen]
-            if not new:
-                stop = True
-                break
-            seen.update(item.url for item in new)
-            items.extend(new)
-        if stop:
-            break
-        page += batch_size
-
-    return items
-
-
 async def news_list(pages: int = 1) -> list[schemas.NewsItem]:
     """
     Function to parse a list of news items from the VLR.gg news page
@@ -168,20 +104,39 @@ async def news_list(pages: int = 1) -> list[schemas.NewsItem]:
         A value ``<= 0`` fetches ALL pages, requesting more until a page returns no items.
     :return: The parsed news items
     """
-    async with get_http_client() as client:
-        response = await client.get(constants.NEWS_URL)
-        if response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+    async with get_http_client() as client, aclosing(iter_news(client, pages)) as history:
+        return [item async for page in history for item in page]
 
-        # Page 1 has been fetched above; grab any additional pages while the client is open.
-        news_items = parse_news_list(response.content)
-        if news_items and pages != 1:
-            seen: set[str] = {item.url for item in news_items}
-            # Clamp bounded mode; full-history mode cap is enforced inside the helper.
-            effective_pages = min(pages, constants.MAX_PAGINATION_PAGES) if pages >= 1 else pages
-            news_items.extend(await fetch_additional_news(client, effective_pages, seen))
 
-    return news_items
+async def iter_news(client, pages: int = 1) -> AsyncIterator[list[schemas.NewsItem]]:
+    """
+    Function to get news items from VLR.gg a page at a time
+    :param client: The shared HTTP client
+    :param pages: How many pages of news to fetch, as in :func:`news_list`. A non-200 on any page
+        raises ScrapingError rather than returning a partial list.
+    :return: The parsed news items of each page, in order
+    """
+    response = await client.get(constants.NEWS_URL)
+    if response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+
+    news_items = parse_news_list(response.content)
+    yield news_items
+    if news_items and pages != 1:
+        # NewsItem uses ``url`` as its natural unique key (no separate id field).
+        seen: set[str] = {item.url for item in news_items}
+        async for page in pagination.paginate(
+            client, news_url, parse_news_list, attrgetter("url"), pages, seen, NEWS_PAGE_BATCH_SIZE
+        ):
+            yield page
+
+
+def news_archive() -> archive.Listing:
+    """
+    Function to get the news list's archive, for cursor pagination
+    :return: The listing
+    """
+    return archive.Listing("news", news_url, parse_news_list, schemas.NewsItem, key=attrgetter("url"))
 
 
 def parse_news(data: Tag) -> schemas.NewsItem:
@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timedelta
+
+from firebase_admin import messaging
+from redis.asyncio import Redis
+
+from app import cache, schemas
+import app.constants as constants
+from app.constants import MatchSection, MatchStatus
+from app.services import matches
+
+_ID_SECTIONS = frozenset({MatchSection.TEAMS, MatchSection.EVENT})
+
+
+def sent_key(match_id: str) -> str:
+    return f"fcm:sent:{match_id}"
+
+
+async def upcoming_matches(client: Redis, now: datetime) -> list[schemas.Match]:
+    """
+    Function to get the matches starting within the notification window
+
+    :param client: The redis client
+    :param now: The current time
+    :return: The matches, from the cached match list (or VLR, if nothing is cached)
+    """
+    if cached := await client.get("matches"):
+        match_list = schemas.MatchListAdapter.validate_json(cached)
+    else:
+        match_list = await matches.get_upcoming_matches(redis_client=client)
+    return [
+        match
+        for match in match_list
+        if match.status == MatchStatus.UPCOMING
+        and 0 < (match.time - now).total_seconds() < constants.NOTIFICATION_WINDOW
+    ]
+
+
+async def claim(client: Redis, match_ids: list[str]) -> list[str]:
+    """
+    Function to mark matches as notified, so no later run notifies about them again
+
+    :param client: The redis client
+    :param match_ids: The matches about to be notified
+    :return: The ones not already notified
+    """
+    pipeline = client.pipeline(transaction=False)
+    for match_id in match_ids:
+        pipeline.set(sent_key(match_id), 1, ex=constants.NOTIFICATION_SENT_TTL, nx=True)
+    return [match_id for match_id, claimed in zip(match_ids, await pipeline.execute()) if claimed]
+
+
+async def release(client: Redis, match_ids: list[str]) -> None:
+    """
+    Function to let matches whose notification failed be notified by the next run
+
+    :param client: The redis client
+    :param match_ids: The matches
+    :return: Nothing
+    """
+    if match_ids:
+        await client.delete(*[sent_key(match_id) for match_id in match_ids])
+
+
+async def build_message(client: Redis, match: schemas.Match, now: datetime) -> messaging.Message:
+    """
+    Function to build the notification of a match
+
+    The topics come from the match list, with any IDs it is missing filled in from the match's details. A
+    stream link is only added if the details happen to be cached, and they are only scraped if they aren't and
+    the list is missing an ID.
+
+    :param client: The redis client
+    :param match: The match
+    :param now: The current time
+    :return: The message
+    """
+    team_ids, event_id, streams = [match.team1.id, match.team2.id], match.event_id, []
+    details = None
+    if cached := await cache.get(matches.match_cache_key(match.id), client=client):
+        details = schemas.MatchWithDetails.model_validate_json(cached)
+        streams = details.videos.streams if details.videos else []
+    elif None in team_ids or event_id is None:
+        details = await matches.match_by_id(match.id, client, _ID_SECTIONS)
+    if details is not None:
+        detail_team_ids = [team.id for team in details.teams[:2]] + [None, None]
+        team_ids = [team_id or detail_team_id for team_id, detail_team_id in zip(team_ids, detail_team_ids)]
+        event_id = event_id or (details.event.id if details.event else None)
+
+    payload = {
+        "title": f"{match.team1.name} vs {match.team2.name}",
+        "body": f"Match is starting in {int((match.time - now).total_seconds() // 60)} minutes",
+        "timestamp": match.time.isoformat(),
+        "match_id": match.id,
+    }
+    if streams:
+        payload |= {"stream_url": streams[0].url.unicode_string()}
+
+    topics = [f"event-{event_id}"] if event_id else []
+    topics += [f"match-{match.id}"] + [f"team-{team_id}" for team_id in team_ids if team_id]
+    return messaging.Message(
+        data=payload,
+        condition=" || ".join(f"'{topic}' in topics" for topic in topics),
+        android=messaging.AndroidConfig(ttl=timedelta(minutes=30)),
+    )
+
+
+async def send(messages: list[messaging.Message], app) -> list[bool]:
+    """
+    Function to send notifications, in as few requests as FCM allows
+
+    :param messages: The messages
+    :param app: The Firebase app
+    :return: Whether each message was sent
+    """
+    sent = []
+    for start in range(0, len(messages), constants.FCM_BATCH_SIZE):
+        batch = messages[start : start + constants.FCM_BATCH_SIZE]
+        try:
+            response = await messaging.send_each_async(messages=batch, dry_run=False, app=app)
+        except Exception:
+            logging.exception("Failed to send a batch of notifications")
+            sent += [False] * len(batch)
+        else:
+            sent += [result.success for result in response.responses]
+    return sent
@@ -0,0 +1,126 @@
+import asyncio
+import http
+import inspect
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+import app.constants as constants
+from app.exceptions import ScrapingError
+
+
+async def paginate(
+    client,
+    url: Callable[[int], str],
+    parse: Callable[[bytes], list | Awaitable[list]],
+    key: Callable[[Any], str],
+    pages: int,
+    seen: set[str],
+    batch_size: int,
+    is_empty: Callable[[bytes, list], bool] | None = None,
+) -> AsyncIterator[list]:
+    """
+    Function to walk the pages of a listing beyond page 1, yielding each page's new items as it is parsed
+
+    Pages are requested in batches of ``batch_size`` (not one big fan-out) to bound concurrent load on VLR,
+    and yielded in order (page 2, then 3, ...). A non-200 on any page raises ScrapingError rather than
+    ending the listing early, as a partial history could be cached and silently undercount.
+
+    :param client: The shared HTTP client
+    :param url: Builds the URL of a page
+    :param parse: Parses a page's items, either directly or as an awaitable
+    :param key: The ID of an item
+    :param pages: Total pages wanted. ``> 1`` fetches pages ``2..pages`` (at most ``MAX_PAGINATION_PAGES``),
+        stopping at the first empty page. ``<= 0`` fetches every remaining page up to ``MAX_PAGINATION_PAGES``,
+        also stopping once a page contributes no new ids.
+    :param seen: IDs already collected (page 1); updated in place, and used to drop repeated items
+    :param batch_size: How many pages to request at once
+    :param is_empty: Decides from a page's content and parsed items whether it is the end of the listing.
+        Defaults to the page having no items.
+    :return: The new items of each page, in order
+    """
+    limit = min(pages, constants.MAX_PAGINATION_PAGES) if pages >= 1 else constants.MAX_PAGINATION_PAGES
+    page = 2
+    while page <= limit:
+        batch = range(page, min(page + batch_size, limit + 1))
+        responses = await asyncio.gather(*(client.get(url(p)) for p in batch))
+        for response in responses:
+            if response.status_code != http.HTTPStatus.OK:
+                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+            items = parse(response.content)
+            if inspect.isawaitable(items):
+                items = await items
+            if is_empty(response.content, items) if is_empty else not items:
+                return
+            new = [item for item in items if key(item) not in seen]
+            if pages <= 0 and items and not new:
+                # Every item was already seen: the listing is looping rather than ending.
+                return
+            seen.update(key(item) for item in new)
+            if new:
+                yield new
+        page += batch_size
+
+
+async def extend_pages(
+    items: list, pages: AsyncIterator[list], on_page: Callable[[int], Awaitable[None]] | None = None
+) -> list:
+    """
+    Function to add the items of a listing's remaining pages to those of its first
+
+    :param items: The first page's items; extended in place
+    :param pages: The remaining pages
+    :param on_page: Called with the number of pages read so far, after the first page and each one after it
+    :return: The items of every page
+    """
+    count = 1
+    if on_page:
+        await on_page(count)
+    async for page in pages:
+        items.extend(page)
+        count += 1
+        if on_page:
+            await on_page(count)
+    return items
+
+
+def ndjson(rows: list[BaseModel]) -> bytes:
+    """
+    Function to serialize rows as NDJSON
+
+    :param rows: The rows
+    :return: One JSON line per row
+    """
+    return b"".join(row.model_dump_json().encode() + b"\n" for row in rows)
+
+
+async def stream_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Function to start an NDJSON stream once its first chunk is ready
+
+    The first chunk is awaited before anything is sent, so a failure fetching the first page still
+    becomes an error response. A later failure can only be reported in the body, as a final
+    ``{"error": {"status": ..., "detail": ...}}`` line.
+
+    :param chunks: The stream's chunks
+    :return: The same chunks, to be sent as they are produced
+    """
+    first = await anext(chunks, b"")
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        except HTTPException as exc:
+            yield (
+                json.dumps({"error": {"status": exc.status_code, "detail": exc.detail}}, separators=(",", ":")).encode()
+                + b"\n"
+            )
+        finally:
+            # The client may go away mid-stream; don't leave the upstream fetches open.
+            await chunks.aclose()
+
+    return body()
@@ -1,5 +1,9 @@
 import asyncio
 import http
+from contextlib import aclosing
+from functools import partial
+from operator import itemgetter
+from typing import AsyncIterator, Awaitable, Callable
 
 import dateutil.parser
 from bs4 import BeautifulSoup, Tag
@@ -8,7 +12,9 @@ from app.exceptions import ScrapingError
 
 from app import schemas, utils, cache
 import app.constants as constants
+from app.core import admission, metrics
 from app.core.connections import get_http_client
+from app.services import archive, pagination, stale
 from app.utils import clean_number_string, expand_url, get_image_url, is_twitter_url, twitter_profile_url
 
 
@@ -17,30 +23,70 @@ from app.utils import clean_number_string, expand_url, get_image_url, is_twitter
 PLAYER_MATCHES_PAGE_BATCH_SIZE = 5
 
 
-async def get_player_data(id: str, match_pages: int = 1) -> schemas.Player:
+def player_cache_key(id: str, match_pages: int = 1) -> str:
+    return f"player:{id}:{match_pages}"
+
+
+async def get_player_data(
+    id: str, match_pages: int = 1, on_page: Callable[[int], Awaitable[None]] | None = None
+) -> schemas.Player:
     """
     Function get a player's data from VLR and return a parsed version
     :param id: The player's ID
     :param match_pages: How many pages of match history to fold into the response (VLR serves
         50 per page). Defaults to ``1`` (the first 50 recent matches). A value ``<= 0`` fetches
         the player's FULL match history. See :func:`get_player_matches`.
+    :param on_page: Called with the number of match history pages read so far, as each is read
     :return: The parsed data
     """
-
     # Short-TTL cache (no cron for by-id pages): collapses duplicate live fetches.
-    cache_key = f"player:{id}:{match_pages}"
-    if cached := await cache.get(cache_key):
-        return schemas.Player.model_validate_json(cached)
-
-    async with get_http_client() as client:
-        response, matches = await asyncio.gather(
-            client.get(constants.PLAYER_URL.format(id)),
-            get_player_matches(id, pages=match_pages),
-        )
+    if cached := await cache.get(player_cache_key(id, match_pages)):
+        return metrics.validate(schemas.Player, cached)
+    return await stale.fetch_or_stale(
+        player_cache_key(id, match_pages),
+        lambda: fetch_player_data(id, match_pages, on_page),
+        schemas.Player.model_validate_json,
+    )
+
+
+async def fetch_player_data(
+    id: str,
+    match_pages: int = 1,
+    on_page: Callable[[int], Awaitable[None]] | None = None,
+    ttl: int = constants.CACHE_TTL_PLAYER,
+) -> schemas.Player:
+    """
+    Function to scrape a player's data from VLR, and cache it
+
+    :param id: The player's ID
+    :param match_pages: How many pages of match history to include, as in :func:`get_player_data`
+    :param on_page: Called with the number of match history pages read so far, as each is read
+    :param ttl: How long to cache it for
+    :return: The parsed data
+    """
+    async with get_http_client() as client, aclosing(iter_player_matches(client, id, match_pages)) as history:
+        response, matches = await asyncio.gather(client.get(constants.PLAYER_URL.format(id)), anext(history))
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+        await pagination.extend_pages(matches, history, on_page)
+
+    player_data = parse_player_profile(response.content)
+    player_data["matches"] = matches
+    result = metrics.validate(schemas.Player, player_data)
+    await cache.set(
+        player_cache_key(id, match_pages), metrics.serialize(result), ttl=ttl, stale_ttl=constants.CACHE_TTL_STALE
+    )
+    return result
 
-    soup = BeautifulSoup(response.content, "lxml")
+
+@metrics.parser
+def parse_player_profile(content: bytes) -> dict:
+    """
+    Function to parse everything but the match history from a player's page on VLR
+    :param content: The player's page
+    :return: The parsed data
+    """
+    soup = BeautifulSoup(content, "lxml")
     player_info = soup.find("div", class_="player-header")
     player_summary_container_1 = soup.find("div", class_="player-summary-container-1")
     player_summary_container_2 = soup.find("div", class_="player-summary-container-2")
@@ -53,7 +99,6 @@ async def get_player_data(id: str, match_pages: int = 1) -> schemas.Player:
         "agents": [parse_agent_data(agent.find_all("td")) for agent in agent_data.find_all("tr") if agent]
         if (agent_data := soup.find("tbody"))
         else [],
-        "matches": matches,
     }
 
     for header in player_summary_container_2.find_all("h2"):
@@ -90,9 +135,8 @@ async def get_player_data(id: str, match_pages: int = 1) -> schemas.Player:
             player_data["twitter"] = twitter_profile_url(link.get_text())
         elif "twitch.tv" in href:
             player_data["twitch"] = expand_url(href)
-    result = schemas.Player.model_validate(player_data)
-    await cache.set(cache_key, result.model_dump_json(), ttl=constants.CACHE_TTL_PLAYER)
-    return result
+
+    return player_data
 
 
 def parse_agent_data(agent_data: ResultSet) -> dict:
@@ -159,20 +203,60 @@ async def get_player_matches(id: str, pages: int = 1) -> list[schemas.PlayerMatc
     :return: The parsed matches, newest first
     """
 
-    async with get_http_client() as client:
-        response = await client.get(player_matches_url(id, 1))
+    async with get_http_client() as client, aclosing(iter_player_matches(client, id, pages)) as history:
+        return [match async for page in history for match in page]
+
+
+async def iter_player_matches(client, id: str, pages: int = 1) -> AsyncIterator[list[schemas.PlayerMatch]]:
+    """
+    Function to get a player's match history from VLR a page at a time
+
+    :param client: The shared HTTP client
+    :param id: The player's ID
+    :param pages: How many pages of match history to fetch, as in :func:`get_player_matches`
+    :return: The parsed matches of each page, newest first
+    """
+    response = await client.get(player_matches_url(id, 1))
+    if response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+
+    matches = parse_player_matches(response.content)
+    yield [schemas.PlayerMatch.model_validate(match) for match in matches]
+    if matches and pages != 1:
+        seen: set[str] = {m["id"] for m in matches}
+        async for page in pagination.paginate(
+            client,
+            lambda p: player_matches_url(id, p),
+            parse_player_matches,
+            itemgetter("id"),
+            pages,
+            seen,
+            PLAYER_MATCHES_PAGE_BATCH_SIZE,
+        ):
+            yield [schemas.PlayerMatch.model_validate(match) for match in page]
+
+
+async def stream_player_data(id: str, match_pages: int = 1) -> AsyncIterator[bytes]:
+    """
+    Function to stream a player's data from VLR as NDJSON, sending the match history as each page is parsed
+
+    :param id: The player's ID
+    :param match_pages: How many pages of match history to include, as in :func:`get_player_data`
+    :return: The player (without ``matches``) on the first line, then one match per line, newest first
+    """
+    async with (
+        admission.admit(),
+        get_http_client() as client,
+        aclosing(iter_player_matches(client, id, match_pages)) as history,
+    ):
+        response, matches = await asyncio.gather(client.get(constants.PLAYER_URL.format(id)), anext(history))
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-        # Page 1 has been fetched above; grab any additional pages while the client is open.
-        matches = parse_player_matches(response.content)
-        if matches and pages != 1:
-            seen: set[str] = {m["id"] for m in matches}
-            # Clamp bounded mode; full-history mode cap is enforced inside the helper.
-            effective_pages = min(pages, constants.MAX_PAGINATION_PAGES) if pages >= 1 else pages
-            matches.extend(await fetch_additional_player_matches(client, id, effective_pages, seen))
-
-    return [schemas.PlayerMatch.model_validate(match) for match in matches]
+        player = schemas.Player.model_validate({**parse_player_profile(response.content), "matches": []})
+        yield player.model_dump_json(exclude={"matches"}).encode() + b"\n" + pagination.ndjson(matches)
+        async for matches in history:
+            yield pagination.ndjson(matches)
 
 
 def player_matches_url(id: str, page: int) -> str:
@@ -180,81 +264,25 @@ def player_matches_url(id: str, page: int) -> str:
     return f"{constants.PLAYER_MATCHES_URL.format(id)}/?page={page}"
 
 
+@metrics.parser
 def parse_player_matches(content: bytes) -> list[dict]:
     """Parse all match-history cards from a single page of HTML."""
     soup = BeautifulSoup(content, "lxml")
     return [parse_player_match(match) for match in soup.find_all("a", class_="wf-card fc-flex m-item")]
 
 
-async def fetch_additional_player_matches(
-    client, id: str, pages: int, seen: set[str] | None = None
-) -> list[dict]:
+def matches_archive(id: str) -> archive.Listing:
     """
-    Fetch match-history pages beyond page 1, preserving order (page 2, then 3, ...).
-
-    :param client: The shared HTTP client.
-    :param id: The player's ID.
-    :param pages: Total pages wanted (already clamped by caller for bounded mode).
-        ``> 1`` fetches pages ``2..pages`` concurrently; ``<= 0`` fetches every remaining
-        page in batches up to ``MAX_PAGINATION_PAGES`` total, stopping once a page returns
-        no cards or contributes no new ids. A non-200 on any page raises ScrapingError
-        rather than returning a partial history (which could be cached and undercount).
-    :param seen: Set of match ids already collected (page 1). New items are filtered against
-        this set in all modes; full-history mode also stops when a page adds zero new ids.
-    :return: The parsed matches from the additional pages, in order.
+    Function to get the archive of a player's match history, for cursor pagination
+    :param id: The player's ID
+    :return: The listing
     """
-    matches: list[dict] = []
-    if seen is None:
-        seen = set()
-
-    if pages > 1:
-        # Fetch pages 2..N in batches (not one big fan-out) to bound concurrent load on VLR.
-        stop = False
-        for start in range(2, pages + 1, PLAYER_MATCHES_PAGE_BATCH_SIZE):
-            batch = range(start, min(start + PLAYER_MATCHES_PAGE_BATCH_SIZE, pages + 1))
-            responses = await asyncio.gather(*(client.get(player_matches_url(id, p)) for p in batch))
-            for response in responses:
-                if response.status_code != http.HTTPStatus.OK:
-                    raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-                page_matches = parse_player_matches(response.content)
-                if not page_matches:
-                    stop = True
-                    break
-                new = [m for m in page_matches if m["id"] not in seen]
-                seen.update(m["id"] for m in new)
-                matches.extend(new)
-            if stop:
-                break
-        return matches
-
-    # pages <= 0: fetch all remaining pages in batches until empty, zero new ids,
-    # or MAX_PAGINATION_PAGES total pages (including the already-fetched page 1) is reached.
-    page = 2
-    pages_crawled = 1  # page 1 already counted
-    while pages_crawled < constants.MAX_PAGINATION_PAGES:
-        batch_size = min(PLAYER_MATCHES_PAGE_BATCH_SIZE, constants.MAX_PAGINATION_PAGES - pages_crawled)
-        batch = list(range(page, page + batch_size))
-        responses = await asyncio.gather(*(client.get(player_matches_url(id, p)) for p in batch))
-        pages_crawled += len(batch)
-        stop = False
-        for response in responses:
-            if response.status_code != http.HTTPStatus.OK:
-                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-            page_matches = parse_player_matches(response.content)
-            if not page_matches:
-                stop = True
-                break
-            new = [m for m in page_matches if m["id"] not in seen]
-            if not new:
-                stop = True
-                break
-            seen.update(m["id"] for m in new)
-            matches.extend(new)
-        if stop:
-            break
-        page += batch_size
-
-    return matches
+    return archive.Listing(
+        f"player:{id}:matches",
+        partial(player_matches_url, id),
+        lambda content: [schemas.PlayerMatch.model_validate(match) for match in parse_player_matches(content)],
+        schemas.PlayerMatch,
+    )
 
 
 def parse_player_match(match_data: Tag) -> dict:
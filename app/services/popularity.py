@@ -0,0 +1,23 @@
+from redis.asyncio import Redis
+
+from app import cache
+
+# What is counted; the by-id pages that get pre-warmed.
+TEAM = "team"
+PLAYER = "player"
+
+
+def popularity_key(kind: str) -> str:
+    return f"popularity:{kind}"
+
+
+async def record(kind: str, ids: list[str], client: Redis | None = None) -> None:
+    """
+    Function to count a read of some teams or players towards their popularity
+
+    :param kind: :data:`TEAM` or :data:`PLAYER`
+    :param ids: The IDs read
+    :param client: A pre-existing redis client
+    :return: Nothing
+    """
+    await cache.zincrby(popularity_key(kind), ids, client=client)
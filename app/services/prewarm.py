@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+
+import app.constants as constants
+from app.core.config import settings
+from app.services import player, popularity, rankings, team
+
+# Ranked teams get this score every run, so they are warmed before anything is requested, without outranking
+# teams that are actually read.
+SEED_SCORE = 1.0
+
+_COSTS = {popularity.TEAM: constants.PREWARM_COST_TEAM, popularity.PLAYER: constants.PREWARM_COST_PLAYER}
+
+
+async def seed(client: Redis) -> None:
+    """
+    Function to give the teams in the cached rankings a starting popularity
+
+    :param client: The redis client
+    :return: Nothing
+    """
+    if not (paths := await client.get(rankings.REGIONS_KEY)):
+        return
+    keys = [rankings.region_key(rankings.region_slug(path)) for path in json.loads(paths)]
+    ids = {
+        str(ranked["id"])
+        for entry in await client.mget(keys)
+        if entry
+        for ranked in json.loads(entry)["teams"][: rankings.RANKED_TEAMS_PER_REGION]
+    }
+    if ids:
+        await client.zadd(popularity.popularity_key(popularity.TEAM), dict.fromkeys(ids, SEED_SCORE), gt=True)
+
+
+async def hottest(client: Redis, top_n: int, budget: int) -> list[tuple[str, str]]:
+    """
+    Function to pick the most requested teams and players that fit the upstream budget
+
+    :param client: The redis client
+    :param top_n: How many of each to consider
+    :param budget: How many upstream requests their refreshes may take
+    :return: ``(kind, id)`` pairs, most requested first
+    """
+    scored = [
+        (score, kind, member.decode())
+        for kind in _COSTS
+        for member, score in await client.zrevrange(popularity.popularity_key(kind), 0, top_n - 1, withscores=True)
+    ]
+    picked = []
+    for _, kind, id in sorted(scored, key=lambda entry: entry[0], reverse=True):
+        if _COSTS[kind] <= budget:
+            budget -= _COSTS[kind]
+            picked.append((kind, id))
+    return picked
+
+
+async def decay(client: Redis) -> None:
+    """
+    Function to age the request counts, and drop the least requested
+
+    :param client: The redis client
+    :return: Nothing
+    """
+    for kind in _COSTS:
+        key = popularity.popularity_key(kind)
+        await client.zunionstore(key, {key: constants.POPULARITY_DECAY})
+        await client.zremrangebyrank(key, 0, -constants.POPULARITY_KEEP - 1)
+
+
+async def prewarm(client: Redis) -> list[tuple[str, str]]:
+    """
+    Function to refresh the cached pages of the most requested teams and players
+
+    :param client: The redis client
+    :return: The ``(kind, id)`` pairs refreshed
+    """
+    await seed(client)
+    picked = await hottest(client, settings.PREWARM_TOP_N, settings.PREWARM_BUDGET)
+    semaphore = asyncio.Semaphore(constants.MAX_CONCURRENT_BATCH_FETCHES)
+
+    async def refresh(kind: str, id: str) -> bool:
+        async with semaphore:
+            try:
+                if kind == popularity.TEAM:
+                    await team.fetch_team_data(id, ttl=constants.CACHE_TTL_PREWARMED)
+                else:
+                    await player.fetch_player_data(id, ttl=constants.CACHE_TTL_PREWARMED)
+            except HTTPException as exc:
+                logging.warning(f"Failed to prewarm {kind} {id}: {exc.detail}")
+                return False
+            except Exception:
+                # One broken page shouldn't cost the other refreshes, or the decay.
+                logging.exception(f"Failed to prewarm {kind} {id}")
+                return False
+            return True
+
+    try:
+        refreshed = await asyncio.gather(*[refresh(kind, id) for kind, id in picked])
+    finally:
+        await decay(client)
+    return [entry for entry, ok in zip(picked, refreshed) if ok]
@@ -0,0 +1,113 @@
+import re
+import types
+from functools import lru_cache
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+from app.core import metrics
+from app.exceptions import BadRequestError
+
+# A path segment: a field name, optionally limited to the first N items of a list, e.g. `upcoming[:3]`.
+_SEGMENT = re.compile(r"(\w+)(?:\[:(\d+)\])?")
+
+
+@lru_cache(maxsize=256)
+def include_tree(model: type[BaseModel], fields: str) -> dict:
+    """
+    Function to compile a ``fields`` projection into the ``include`` tree pydantic serializes with
+
+    Compiled trees are cached per model and projection, so a repeated projection costs a lookup.
+
+    :param model: The model being projected
+    :param fields: Comma-separated dotted paths, e.g. ``name,img,upcoming[:3].opponent``
+    :return: The include tree
+    """
+    paths = [path.split(".") for path in (path.strip() for path in fields.split(",")) if path]
+    if not paths:
+        raise BadRequestError(detail="No fields given")
+    return _compile(model, paths, "")
+
+
+def check(model: type[BaseModel], fields: str | None) -> None:
+    """
+    Function to compile a projection before anything is fetched, so a bad one is a 400 without a scrape
+
+    The tree is cached, so serializing with the same projection afterwards doesn't compile it again.
+
+    :param model: The model being projected
+    :param fields: The projection; ``None`` for every field
+    :return: Nothing
+    """
+    if fields is not None:
+        include_tree(model, fields)
+
+
+def dump(value: BaseModel, fields: str | None) -> bytes:
+    """
+    Function to serialize a model, keeping only the projected fields
+
+    :param value: The model
+    :param fields: The projection; ``None`` for every field
+    :return: The JSON
+    """
+    include = include_tree(type(value), fields) if fields is not None else None
+    with metrics.timed(metrics.PYDANTIC_SECONDS, type(value).__name__, "serialize"):
+        return value.model_dump_json(include=include).encode()
+
+
+def dump_list(adapter: TypeAdapter, model: type[BaseModel], items: list, fields: str | None) -> bytes:
+    """
+    Function to serialize a list of models, keeping only the projected fields of each
+
+    :param adapter: The list's TypeAdapter
+    :param model: The model of the list's items
+    :param items: The items
+    :param fields: The projection; ``None`` for every field
+    :return: The JSON
+    """
+    include = {"__all__": include_tree(model, fields)} if fields is not None else None
+    with metrics.timed(metrics.PYDANTIC_SECONDS, f"list[{model.__name__}]", "serialize"):
+        return adapter.dump_json(items, include=include)
+
+
+def _compile(model: type[BaseModel], paths: list[list[str]], prefix: str) -> dict:
+    grouped: dict[str, list[list[str]]] = {}
+    limits: dict[str, int] = {}
+    for first, *rest in paths:
+        if not (match := _SEGMENT.fullmatch(first)) or match[1] not in model.model_fields:
+            raise BadRequestError(detail=f"Unknown field: {prefix}{first}")
+        name, limit = match[1], match[2]
+        if limit is not None:
+            if not _field_type(model, name)[1]:
+                raise BadRequestError(detail=f"Only lists can be limited: {prefix}{first}")
+            if limits.setdefault(name, int(limit)) != int(limit):
+                raise BadRequestError(detail=f"Conflicting limits for {prefix}{name}")
+        grouped.setdefault(name, []).append(rest)
+
+    tree: dict[str, Any] = {}
+    for name, rests in grouped.items():
+        submodel, is_list = _field_type(model, name)
+        if not all(rests):
+            # The field itself was asked for, which covers any of its subfields.
+            include: Any = True
+        elif submodel is None:
+            raise BadRequestError(detail=f"{prefix}{name} has no fields")
+        else:
+            include = _compile(submodel, rests, f"{prefix}{name}.")
+        if is_list:
+            tree[name] = dict.fromkeys(range(limits[name]) if name in limits else ["__all__"], include)
+        else:
+            tree[name] = include
+    return tree
+
+
+def _field_type(model: type[BaseModel], name: str) -> tuple[type[BaseModel] | None, bool]:
+    """The model a field holds (if any), and whether it holds a list of them."""
+    annotation = model.model_fields[name].annotation
+    if get_origin(annotation) in (Union, types.UnionType):
+        annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), annotation)
+    is_list = get_origin(annotation) is list
+    if is_list:
+        annotation = get_args(annotation)[0]
+    return (annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None), is_list
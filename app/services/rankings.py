@@ -1,15 +1,50 @@
 import asyncio
 import http
-import os
-from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import struct
+import time
+from bisect import bisect_right
+from datetime import UTC, datetime
 
+import httpx
 from bs4 import BeautifulSoup
-from app.exceptions import ScrapingError
+from lxml import etree
+from redis.asyncio import Redis
+from app.exceptions import NotFoundError, ScrapingError
 
-from app import schemas, utils
+from app import cache, schemas, utils
 import app.constants as constants
+from app.core import metrics
 from app.core.connections import get_http_client
 
+# Teams kept per region; the region pages list every ranked team (1-14 MB of HTML).
+RANKED_TEAMS_PER_REGION = 25
+
+RANK_ITEM_CLASS = "rank-item wf-card fc-flex"
+
+# Cache layout: the ordered region paths, and per region its serialized ranking plus the
+# refresh state (HTTP validators and when it is next due).
+REGIONS_KEY = "rankings:regions"
+
+
+def region_key(slug: str) -> str:
+    return f"rankings:region:{slug}"
+
+
+def region_state_key(slug: str) -> str:
+    return f"rankings:region:{slug}:state"
+
+
+# Each team's history is an append-only string of fixed-width records (unix time, rank, points),
+# so a range is found by bisecting the timestamps in place. Only changes are appended; rank 0
+# records the team dropping out of its region's ranked list.
+HISTORY_RECORD = struct.Struct("<IHI")
+
+
+def history_key(team_id: int) -> str:
+    return f"rankings:history:{team_id}"
+
 
 async def ranking_list() -> list[schemas.Ranking]:
     """
@@ -17,67 +52,349 @@ async def ranking_list() -> list[schemas.Ranking]:
 
     :return: The parsed ranks
     """
+    if not (paths := await region_paths()):
+        return []
+
+    # Each region is parsed as it downloads, so fetching them concurrently overlaps both.
+    return [ranking for ranking, _ in await asyncio.gather(*[fetch_region(path) for path in paths])]
+
+
+async def region_paths() -> list[str]:
+    """
+    Function to get the paths of the ranked regions from the VLR.gg rankings page
+
+    :return: The region paths, e.g. ``/rankings/europe``
+    """
     async with get_http_client() as client:
         response = await client.get(constants.RANKINGS_URL)
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-    soup = BeautifulSoup(response.content, "lxml")
+    return parse_region_paths(response.content)
+
 
-    region_paths = [
+@metrics.parser
+def parse_region_paths(content: bytes) -> list[str]:
+    """
+    Function to parse the paths of the ranked regions from the rankings page
+
+    :param content: The page
+    :return: The region paths, e.g. ``/rankings/europe``
+    """
+    soup = BeautifulSoup(content, "lxml")
+
+    return [
         region["href"]
         for region in soup.find_all("a", class_="zx-tab", href=lambda href: href and href.startswith("/rankings/"))
         if not region["href"].endswith("/gc")
     ]
 
-    if not region_paths:
-        return []
 
-    # Fetch all region pages concurrently (I/O parallelism via asyncio)
-    responses = await asyncio.gather(*[_fetch_region(path) for path in region_paths])
-
-    # Parse all pages in parallel (CPU parallelism via ProcessPoolExecutor)
-    # Each page is 1-14 MB of HTML, parsing takes 100ms-2s per page
-    loop = asyncio.get_running_loop()
-    n_workers = min(len(region_paths), os.cpu_count() or 4)
-    with ProcessPoolExecutor(max_workers=n_workers) as pool:
-        results = await asyncio.gather(
-            *[
-                loop.run_in_executor(pool, _parse_ranking_page, path, html)
-                for path, html in zip(region_paths, responses)
-            ]
-        )
+async def fetch_region(path: str, validators: dict | None = None) -> tuple[schemas.Ranking | None, dict]:
+    """
+    Function to stream a region's ranking page and parse it as it arrives
 
-    return list(results)
+    The body is fed to an incremental parser chunk by chunk, and the download is dropped as soon as
+    :data:`RANKED_TEAMS_PER_REGION` rank items are complete, so neither the full page nor its full
+    tree is ever held in memory.
 
+    :param path: The region's path, e.g. ``/rankings/europe``
+    :param validators: The ``etag``/``last_modified`` from a previous fetch, sent as a conditional GET
+    :return: The parsed ranking, or ``None`` if the page is unchanged since ``validators``; and the
+        validators of this response
+    """
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
 
-async def _fetch_region(path: str) -> bytes:
-    """Fetch a region's ranking page HTML."""
+    parser = RankingPageParser()
     async with get_http_client() as client:
-        response = await client.get(constants.RANKING_URL_REGION.format(path))
-        if response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-    return response.content
+        async with client.stream("GET", constants.RANKING_URL_REGION.format(path), headers=headers) as response:
+            if headers and response.status_code == http.HTTPStatus.NOT_MODIFIED:
+                return None, validators
+            if response.status_code != http.HTTPStatus.OK:
+                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+            async for chunk in response.aiter_bytes():
+                if parser.feed(chunk):
+                    break
+    return schemas.Ranking(region=region_name(path), teams=parser.close()), {
+        "etag": response.headers.get("etag", ""),
+        "last_modified": response.headers.get("last-modified", ""),
+    }
 
 
-def _parse_ranking_page(path: str, content: bytes) -> schemas.Ranking:
-    """Parse a region's ranking page. Runs in a subprocess for CPU parallelism."""
-    soup = BeautifulSoup(content, "lxml")
+async def refresh_rankings(redis_client: Redis) -> None:
+    """
+    Function to refresh the cached rankings of every region that is due
+
+    Regions refresh independently: each has its own next-due time, a failing region keeps its
+    last-known-good ranking and is retried on the next run, and an unchanged page (HTTP 304) is
+    never re-parsed.
+
+    :param redis_client: The redis client
+    :return: Nothing
+    """
+    try:
+        paths = await region_paths()
+    except (ScrapingError, httpx.HTTPError) as exc:
+        if not (cached := await redis_client.get(REGIONS_KEY)):
+            raise
+        logging.warning("rankings index fetch failed; using the cached region list", exc_info=exc)
+        paths = json.loads(cached)
+    else:
+        await redis_client.set(REGIONS_KEY, json.dumps(paths), ex=constants.CACHE_TTL_RANKINGS)
+
+    if not paths:
+        return
+
+    now = time.time()
+    states = [
+        json.loads(state) if state else {}
+        for state in await redis_client.mget([region_state_key(region_slug(path)) for path in paths])
+    ]
+    due = [(path, state) for path, state in zip(paths, states) if state.get("next_refresh", 0) <= now]
+    results = await asyncio.gather(
+        *[refresh_region(redis_client, path, state) for path, state in due], return_exceptions=True
+    )
+    for (path, _), result in zip(due, results):
+        if isinstance(result, Exception):
+            logging.warning("rankings refresh failed for %s; keeping last known good", path, exc_info=result)
+
+
+async def refresh_region(redis_client: Redis, path: str, state: dict) -> None:
+    """
+    Function to refresh a single region's cached ranking
+
+    :param redis_client: The redis client
+    :param path: The region's path
+    :param state: The region's refresh state from the previous run
+    :return: Nothing
+    """
+    slug = region_slug(path)
+    ranking, validators = await fetch_region(path, state)
+    if ranking is None and not await redis_client.expire(region_key(slug), constants.CACHE_TTL_RANKINGS):
+        # Unchanged upstream, but the cached copy is gone: fetch it unconditionally.
+        ranking, validators = await fetch_region(path)
+    if ranking is not None:
+        previous = await redis_client.get(region_key(slug))
+        await redis_client.set(region_key(slug), ranking.model_dump_json(), ex=constants.CACHE_TTL_RANKINGS)
+        await record_history(
+            redis_client,
+            schemas.Ranking.model_validate_json(previous) if previous else None,
+            ranking,
+            int(time.time()),
+        )
+    await redis_client.set(
+        region_state_key(slug),
+        json.dumps(validators | {"next_refresh": time.time() + constants.RANKINGS_REFRESH_INTERVAL}),
+        ex=constants.CACHE_TTL_RANKINGS,
+    )
+
+
+def ranking_changes(previous: schemas.Ranking | None, current: schemas.Ranking) -> dict[int, tuple[int, int]]:
+    """
+    Function to diff two snapshots of a region's ranking
+
+    :param previous: The previous snapshot, if any
+    :param current: The new snapshot
+    :return: The new ``(rank, points)`` of every team that changed by its ID, ``(0, 0)`` for teams that dropped out
+    """
+    before = {team.id: (team.rank, team.points) for team in previous.teams} if previous else {}
+    after = {team.id: (team.rank, team.points) for team in current.teams}
+    changes = {team_id: value for team_id, value in after.items() if before.get(team_id) != value}
+    return changes | dict.fromkeys(before.keys() - after.keys(), (0, 0))
+
 
-    region_name = path.split("/")[-1]
-    region_name = constants.REGION_NAME_MAPPING.get(region_name.lower()) or " ".join(region_name.split("-")).title()
-
-    return schemas.Ranking(
-        region=region_name,
-        teams=[
-            schemas.TeamRanking(
-                name=team.find("a")["data-sort-value"].strip(),
-                id=team.find("a")["href"].split("/")[2],
-                logo=utils.get_image_url(team.find("img")["src"]),  # type: ignore
-                rank=int(utils.clean_number_string(team.find("div", class_="rank-item-rank").get_text())),
-                points=int(utils.clean_number_string(team.find("div", class_="rank-item-rating").get_text())),
-                country=utils.clean_string(team.find("div", class_="rank-item-team-country").get_text()),
+async def record_history(
+    redis_client: Redis, previous: schemas.Ranking | None, current: schemas.Ranking, when: int
+) -> None:
+    """
+    Function to append the changes between two snapshots to each team's ranking history
+
+    :param redis_client: The redis client
+    :param previous: The previous snapshot, if any
+    :param current: The new snapshot
+    :param when: The unix time of the new snapshot
+    :return: Nothing
+    """
+    if not (changes := ranking_changes(previous, current)):
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    for team_id, (rank, points) in changes.items():
+        pipe.append(history_key(team_id), HISTORY_RECORD.pack(when, rank, points))
+    await pipe.execute()
+
+
+async def ranking_history(
+    team_id: int, redis_client: Redis | None, start: datetime | None = None, end: datetime | None = None
+) -> schemas.RankingHistory:
+    """
+    Function to get a team's ranking history over a time range
+
+    :param team_id: The team ID
+    :param redis_client: The redis client
+    :param start: Start of the range; the entry in effect at ``start`` is included
+    :param end: End of the range, inclusive
+    :return: The history, oldest first
+    """
+    if not (data := await cache.get(history_key(team_id), client=redis_client)):
+        raise NotFoundError(detail=f"No ranking history for team {team_id}")
+
+    def timestamp(index: int) -> int:
+        return HISTORY_RECORD.unpack_from(data, index * HISTORY_RECORD.size)[0]
+
+    # Naive bounds are taken as UTC, like the recorded times.
+    indices = range(len(data) // HISTORY_RECORD.size)
+    first = max(bisect_right(indices, _unix_time(start), key=timestamp) - 1, 0) if start else 0
+    last = bisect_right(indices, _unix_time(end), key=timestamp) if end else len(indices)
+    return schemas.RankingHistory(
+        team_id=team_id,
+        history=[
+            schemas.RankingHistoryEntry(
+                time=datetime.fromtimestamp(when, tz=UTC), rank=rank or None, points=points if rank else None
+            )
+            for when, rank, points in (
+                HISTORY_RECORD.unpack_from(data, index * HISTORY_RECORD.size) for index in indices[first:last]
             )
-            for team in soup.find_all("div", class_="rank-item wf-card fc-flex")[:25]
         ],
     )
+
+
+def _unix_time(value: datetime) -> float:
+    return (value if value.tzinfo else value.replace(tzinfo=UTC)).timestamp()
+
+
+async def rankings_json(redis_client: Redis | None) -> bytes | None:
+    """
+    Function to assemble the cached rankings of every region into one JSON array
+
+    The per-region entries are already serialized, so they are joined as they are.
+
+    :param redis_client: The redis client
+    :return: The JSON array, or ``None`` if nothing is cached
+    """
+    if not (paths := await cache.get(REGIONS_KEY, client=redis_client)):
+        return None
+    keys = [region_key(region_slug(path)) for path in json.loads(paths)]
+    if not (entries := [entry for entry in await cache.mget(keys, client=redis_client) or [] if entry]):
+        return None
+    return b"[" + b",".join(entries) + b"]"
+
+
+async def region_ranking_json(region: str, redis_client: Redis | None) -> bytes:
+    """
+    Function to get a single region's ranking, from the cache or live
+
+    :param region: The region slug, e.g. ``europe``
+    :param redis_client: The redis client
+    :return: The serialized ranking
+    """
+    slug = region.lower()
+    if cached := await cache.get(region_key(slug), client=redis_client):
+        return cached
+
+    cached_paths = await cache.get(REGIONS_KEY, client=redis_client)
+    paths = json.loads(cached_paths) if cached_paths else await region_paths()
+    if not (path := next((path for path in paths if region_slug(path) == slug), None)):
+        raise NotFoundError(detail=f"Unknown rankings region {region!r}")
+    ranking, _ = await fetch_region(path)
+    return ranking.model_dump_json().encode()
+
+
+def region_slug(path: str) -> str:
+    """
+    Function to get the cache slug of a region from its rankings path
+
+    :param path: The region's path
+    :return: The slug, e.g. ``europe``
+    """
+    return path.rstrip("/").split("/")[-1].lower()
+
+
+def region_name(path: str) -> str:
+    """
+    Function to get the display name of a region from its rankings path
+
+    :param path: The region's path
+    :return: The region name
+    """
+    region = path.split("/")[-1]
+    return constants.REGION_NAME_MAPPING.get(region.lower()) or " ".join(region.split("-")).title()
+
+
+class RankingPageParser:
+    """Incremental parser that collects the top rank items of a region page as it is fed."""
+
+    def __init__(self, limit: int = RANKED_TEAMS_PER_REGION):
+        self.limit = limit
+        self.teams: list[schemas.TeamRanking] = []
+        self.parse_seconds = 0.0
+        self._parser = etree.HTMLPullParser(events=("end",), tag="div", encoding="utf-8")
+
+    @property
+    def done(self) -> bool:
+        return len(self.teams) >= self.limit
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Function to feed the next chunk of the page
+
+        :param chunk: The raw bytes
+        :return: Whether enough rank items have been parsed to stop reading
+        """
+        start = time.perf_counter()
+        self._parser.feed(chunk)
+        self._read_events()
+        self.parse_seconds += time.perf_counter() - start
+        return self.done
+
+    def close(self) -> list[schemas.TeamRanking]:
+        """
+        Function to finish parsing; the trailing, unfed part of the page is simply never parsed
+
+        :return: The parsed teams
+        """
+        start = time.perf_counter()
+        if not self.done:
+            self._parser.close()
+            self._read_events()
+        # The page is parsed a chunk at a time as it downloads, but observed as a single parse like any other.
+        self.parse_seconds += time.perf_counter() - start
+        metrics.PARSE_SECONDS.labels("rankings.RankingPageParser").observe(self.parse_seconds)
+        return self.teams
+
+    def _read_events(self) -> None:
+        for _, element in self._parser.read_events():
+            if self.done or element.get("class") != RANK_ITEM_CLASS:
+                continue
+            self.teams.append(parse_rank_item(element))
+            # Drop the parsed item and everything before it, keeping the tree at a handful of nodes.
+            element.clear()
+            while (previous := element.getprevious()) is not None:
+                element.getparent().remove(previous)
+
+
+def parse_rank_item(element: etree._Element) -> schemas.TeamRanking:
+    """
+    Function to parse a single ``rank-item`` from a rankings page
+
+    :param element: The rank item
+    :return: The parsed team ranking
+    """
+    team = element.find(".//a")
+    return schemas.TeamRanking(
+        name=team.get("data-sort-value").strip(),
+        id=int(team.get("href").split("/")[2]),
+        logo=utils.get_image_url(element.find(".//img").get("src")),
+        rank=int(utils.clean_number_string(_class_text(element, "rank-item-rank"))),
+        points=int(utils.clean_number_string(_class_text(element, "rank-item-rating"))),
+        country=utils.clean_string(_class_text(element, "rank-item-team-country")),
+    )
+
+
+def _class_text(element: etree._Element, class_name: str) -> str:
+    """Text of the first descendant ``div`` carrying ``class_name``, or ``""`` if there is none."""
+    div = next((div for div in element.iter("div") if class_name in (div.get("class") or "").split()), None)
+    return "".join(div.itertext()) if div is not None else ""
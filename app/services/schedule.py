@@ -0,0 +1,83 @@
+import time
+from datetime import datetime
+
+from redis.asyncio import Redis
+
+from app import schemas
+import app.constants as constants
+from app.constants import EventStatus, MatchStatus
+from app.core.config import settings
+
+
+def schedule_key(name: str) -> str:
+    return f"schedule:{name}"
+
+
+async def is_due(client: Redis, name: str) -> bool:
+    """
+    Function to check whether a listing's cron should refresh it
+
+    :param client: The redis client
+    :param name: The listing
+    :return: Whether it is due; a listing that has never been (or failed to be) refreshed is always due
+    """
+    return await client.get(schedule_key(name)) is None
+
+
+async def defer(client: Redis, name: str, delay: int) -> None:
+    """
+    Function to hold off a listing's next refresh
+
+    :param client: The redis client
+    :param name: The listing
+    :param delay: Seconds until it is due again
+    :return: Nothing
+    """
+    # The key lapses when the refresh is due; its value says when that is, for anyone inspecting it.
+    await client.set(schedule_key(name), int(time.time()) + delay, ex=delay)
+
+
+def cache_ttl(ttl: int, delay: int) -> int:
+    """
+    Function to get the TTL of a listing refreshed after ``delay``, which outlasts a missed refresh
+
+    :param ttl: The listing's usual TTL
+    :param delay: Seconds until its next refresh
+    :return: The TTL
+    """
+    return max(ttl, 2 * delay)
+
+
+def matches_delay(match_list: list[schemas.Match], now: datetime) -> int:
+    """
+    Function to work out when the match list is next worth refreshing
+
+    While any match is live, as soon as the bounds allow. Otherwise, when the next match is due to start;
+    a match still listed as upcoming past its start time counts as starting now, unless it is so far past
+    that it was most likely postponed.
+
+    :param match_list: The match list
+    :param now: The current time
+    :return: Seconds until the next refresh, within the configured bounds
+    """
+    low, high = settings.MATCHES_REFRESH_MIN, settings.MATCHES_REFRESH_MAX
+    if any(match.status in constants.LIVE_MATCH_STATUSES for match in match_list):
+        return low
+    starts = (
+        seconds
+        for match in match_list
+        if match.status == MatchStatus.UPCOMING and (seconds := (match.time - now).total_seconds()) > -high
+    )
+    return int(max(low, min(min(starts, default=high), high)))
+
+
+def events_delay(event_list: list[schemas.Event], low: int, high: int) -> int:
+    """
+    Function to work out when a listing that follows the events is next worth refreshing
+
+    :param event_list: The events
+    :param low: The refresh interval while any event is ongoing
+    :param high: The refresh interval otherwise
+    :return: Seconds until the next refresh
+    """
+    return low if any(event.status == EventStatus.ONGOING for event in event_list) else high
@@ -5,6 +5,7 @@ from app.exceptions import ScrapingError
 
 from app import schemas, utils
 import app.constants as constants
+from app.core import metrics
 from app.core.connections import get_http_client
 
 
@@ -22,7 +23,18 @@ async def get_data(search_category: constants.SearchCategory, search_term: str)
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-    soup = BeautifulSoup(response.content, "lxml")
+    return parse_results(response.content)
+
+
+@metrics.parser
+def parse_results(content: bytes) -> list[schemas.SearchResult]:
+    """
+    Function to parse the results from the search page
+
+    :param content: The page
+    :return: The parsed results
+    """
+    soup = BeautifulSoup(content, "lxml")
     return [parse_result(result) for result in soup.find_all("a", class_="search-item")]
 
 
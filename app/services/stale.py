@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, TypeVar
+
+from redis.asyncio import Redis
+
+from app import cache
+from app.core import admission
+from app.exceptions import OverloadedError, UpstreamUnavailableError
+
+T = TypeVar("T")
+
+# The ages of the stale values served for the current request, for its response to say so.
+_ages: ContextVar[list[int] | None] = ContextVar("stale_ages", default=None)
+
+
+@contextmanager
+def track() -> Iterator[list[int]]:
+    """
+    Function to collect the ages of the stale values served within the context
+
+    :return: The ages, in seconds, filled in as stale values are served
+    """
+    ages: list[int] = []
+    token = _ages.set(ages)
+    try:
+        yield ages
+    finally:
+        _ages.reset(token)
+
+
+async def fetch_or_stale(
+    key: str, fetch: Callable[[], Awaitable[T]], parse: Callable[[bytes], T], client: Redis | None = None
+) -> T:
+    """
+    Function to fetch a value, falling back to its last-known-good copy while VLR is unavailable
+
+    Fetching takes a slot of the request's admission limit (see :func:`admission.admit`), and a request turned away
+    for lack of one is served the copy too.
+
+    :param key: The cache key the value is stored under (with a last-known-good copy, see :func:`cache.get_stale`)
+    :param fetch: Fetches the value
+    :param parse: Parses the stored copy
+    :param client: A pre-existing redis client
+    :return: The value, fresh or stale
+    """
+    try:
+        async with admission.admit():
+            return await fetch()
+    except (UpstreamUnavailableError, OverloadedError):
+        if (stale := await cache.get_stale(key, client=client)) is None:
+            raise
+        data, age = stale
+        if (ages := _ages.get()) is not None:
+            ages.append(age)
+        return parse(data)
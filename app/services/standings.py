@@ -6,6 +6,7 @@ from pydantic import HttpUrl
 
 from app import schemas, utils
 import app.constants as constants
+from app.core import metrics
 from app.core.connections import get_http_client
 
 
@@ -21,7 +22,19 @@ async def standings_list(year: int) -> schemas.Standings:
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-    soup = BeautifulSoup(response.content, "lxml")
+    return parse_standings(year, response.content)
+
+
+@metrics.parser
+def parse_standings(year: int, content: bytes) -> schemas.Standings:
+    """
+    Function to parse the standings page
+
+    :param year: The VCT year
+    :param content: The page
+    :return: The parsed standings
+    """
+    soup = BeautifulSoup(content, "lxml")
 
     circuits = []
     for group in soup.find_all("div", class_="eg-standing-group"):
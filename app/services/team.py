@@ -1,13 +1,20 @@
 import asyncio
 import http
+from contextlib import aclosing
+from functools import partial
+from operator import itemgetter
+from typing import AsyncIterator, Awaitable, Callable
 
 import dateutil.parser
+import httpx
 from bs4 import BeautifulSoup, Tag
 from app.exceptions import ScrapingError
 
 from app import schemas, utils, cache
 import app.constants as constants
+from app.core import admission, metrics
 from app.core.connections import get_http_client
+from app.services import archive, pagination, stale
 
 
 # VLR returns 50 completed match cards per page. When fetching "all" pages we request
@@ -15,7 +22,13 @@ from app.core.connections import get_http_client
 COMPLETED_PAGE_BATCH_SIZE = 5
 
 
-async def get_team_data(id: str, completed_pages: int = 1) -> schemas.Team:
+def team_cache_key(id: str, completed_pages: int = 1) -> str:
+    return f"team:{id}:{completed_pages}"
+
+
+async def get_team_data(
+    id: str, completed_pages: int = 1, on_page: Callable[[int], Awaitable[None]] | None = None
+) -> schemas.Team:
     """
     Function get a team's data from VLR and return a parsed version
     :param id: The team's ID
@@ -23,45 +36,107 @@ async def get_team_data(id: str, completed_pages: int = 1) -> schemas.Team:
         Defaults to ``1`` (the first 50 completed matches, preserving the previous behaviour).
         A value ``<= 0`` fetches ALL pages, requesting more until a page returns no matches.
         Upcoming matches are always limited to a single page.
+    :param on_page: Called with the number of completed-match pages read so far, as each is read
     :return: The parsed data
     """
-
     # Short-TTL cache (no cron for by-id pages): collapses duplicate live fetches.
-    cache_key = f"team:{id}:{completed_pages}"
-    if cached := await cache.get(cache_key):
-        return schemas.Team.model_validate_json(cached)
+    if cached := await cache.get(team_cache_key(id, completed_pages)):
+        return metrics.validate(schemas.Team, cached)
+    return await stale.fetch_or_stale(
+        team_cache_key(id, completed_pages),
+        lambda: fetch_team_data(id, completed_pages, on_page),
+        schemas.Team.model_validate_json,
+    )
+
+
+async def fetch_team_data(
+    id: str,
+    completed_pages: int = 1,
+    on_page: Callable[[int], Awaitable[None]] | None = None,
+    ttl: int = constants.CACHE_TTL_TEAM,
+) -> schemas.Team:
+    """
+    Function to scrape a team's data from VLR, and cache it
 
-    async with get_http_client() as client:
-        response, upcoming_matches_response, completed_matches_response = await asyncio.gather(
+    :param id: The team's ID
+    :param completed_pages: How many pages of completed matches to fetch, as in :func:`get_team_data`
+    :param on_page: Called with the number of completed-match pages read so far, as each is read
+    :param ttl: How long to cache it for
+    :return: The parsed data
+    """
+    async with get_http_client() as client, aclosing(iter_completed_matches(client, id, completed_pages)) as history:
+        response, upcoming_matches_response, completed_match_list = await asyncio.gather(
             client.get(constants.TEAM_URL.format(id)),
             client.get(constants.TEAM_UPCOMING_MATCHES_URL.format(id)),
-            client.get(constants.TEAM_COMPLETED_MATCHES_URL.format(id)),
+            anext(history),
+        )
+        check_team_responses(response, upcoming_matches_response)
+        await pagination.extend_pages(completed_match_list, history, on_page)
+
+    team_data = parse_team_profile(response.content, upcoming_matches_response.content)
+    team_data["completed"] = completed_match_list
+    result = metrics.validate(schemas.Team, team_data)
+    await cache.set(
+        team_cache_key(id, completed_pages), metrics.serialize(result), ttl=ttl, stale_ttl=constants.CACHE_TTL_STALE
+    )
+    return result
+
+
+async def stream_team_data(id: str, completed_pages: int = 1) -> AsyncIterator[bytes]:
+    """
+    Function to stream a team's data from VLR as NDJSON, sending the completed matches as each page is parsed
+
+    :param id: The team's ID
+    :param completed_pages: How many pages of completed matches to include, as in :func:`get_team_data`
+    :return: The team (without ``completed``) on the first line, then one completed match per line
+    """
+    async with (
+        admission.admit(),
+        get_http_client() as client,
+        aclosing(iter_completed_matches(client, id, completed_pages)) as history,
+    ):
+        response, upcoming_matches_response, matches = await asyncio.gather(
+            client.get(constants.TEAM_URL.format(id)),
+            client.get(constants.TEAM_UPCOMING_MATCHES_URL.format(id)),
+            anext(history),
+        )
+        check_team_responses(response, upcoming_matches_response)
+
+        team = schemas.Team.model_validate(
+            {**parse_team_profile(response.content, upcoming_matches_response.content), "completed": []}
         )
+        yield team.model_dump_json(exclude={"completed"}).encode() + b"\n" + completed_ndjson(matches)
+        async for matches in history:
+            yield completed_ndjson(matches)
+
+
+def completed_ndjson(matches: list[dict]) -> bytes:
+    return pagination.ndjson([schemas.CompletedMatch.model_validate(match) for match in matches])
+
+
+def check_team_responses(*responses: httpx.Response) -> None:
+    """
+    Function to make sure VLR served each of a team's pages
+
+    :param responses: The responses
+    :return: Nothing
+    """
+    for response in responses:
         if response.status_code != http.HTTPStatus.OK:
             raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
 
-        if upcoming_matches_response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(
-                url=str(upcoming_matches_response.url), upstream_status=upcoming_matches_response.status_code
-            )
-
-        if completed_matches_response.status_code != http.HTTPStatus.OK:
-            raise ScrapingError(
-                url=str(completed_matches_response.url), upstream_status=completed_matches_response.status_code
-            )
-
-        # Page 1 has been fetched above; grab any additional pages while the client is open.
-        completed_match_list = parse_completed_matches(completed_matches_response.content)
-        if completed_match_list and completed_pages != 1:
-            seen: set[str] = {m["id"] for m in completed_match_list}
-            # Clamp bounded mode; full-history mode cap is enforced inside the helper.
-            effective_pages = (
-                min(completed_pages, constants.MAX_PAGINATION_PAGES) if completed_pages >= 1 else completed_pages
-            )
-            completed_match_list.extend(await fetch_additional_completed_matches(client, id, effective_pages, seen))
-
-    soup = BeautifulSoup(response.content, "lxml")
-    upcoming_matches = BeautifulSoup(upcoming_matches_response.content, "lxml")
+
+@metrics.parser
+def parse_team_profile(content: bytes, upcoming_content: bytes) -> dict:
+    """
+    Function to parse everything but the completed matches from a team's pages on VLR
+    :param content: The team's page
+    :param upcoming_content: The team's upcoming matches page
+    :return: The parsed data
+    """
+
+    soup = BeautifulSoup(content, "lxml")
+    upcoming_matches = BeautifulSoup(upcoming_content, "lxml")
 
     team_info = soup.find("div", class_="team-header")
     name = utils.clean_string(team_info.find("h1").get_text())
@@ -106,23 +181,18 @@ async def get_team_data(id: str, completed_pages: int = 1) -> schemas.Team:
     upcoming_match_list = [
         parse_match(match) for match in upcoming_matches.find_all("a", class_="wf-card fc-flex m-item")
     ]
-    result = schemas.Team.model_validate(
-        {
-            "name": name,
-            "tag": tag,
-            "img": img,
-            "website": website,
-            "twitter": twitter,
-            "country": country,
-            "rank": rank,
-            "region": region,
-            "roster": roster,
-            "upcoming": upcoming_match_list,
-            "completed": completed_match_list,
-        }
-    )
-    await cache.set(cache_key, result.model_dump_json(), ttl=constants.CACHE_TTL_TEAM)
-    return result
+    return {
+        "name": name,
+        "tag": tag,
+        "img": img,
+        "website": website,
+        "twitter": twitter,
+        "country": country,
+        "rank": rank,
+        "region": region,
+        "roster": roster,
+        "upcoming": upcoming_match_list,
+    }
 
 
 def completed_matches_url(id: str, page: int) -> str:
@@ -130,81 +200,55 @@ def completed_matches_url(id: str, page: int) -> str:
     return f"{constants.TEAM_COMPLETED_MATCHES_URL.format(id)}&page={page}"
 
 
+@metrics.parser
 def parse_completed_matches(content: bytes) -> list[dict]:
     """Parse all completed-match cards from a single page of HTML."""
     soup = BeautifulSoup(content, "lxml")
     return [parse_match(match) for match in soup.find_all("a", class_="wf-card fc-flex m-item")]
 
 
-async def fetch_additional_completed_matches(
-    client, id: str, completed_pages: int, seen: set[str] | None = None
-) -> list[dict]:
+async def iter_completed_matches(client, id: str, completed_pages: int = 1) -> AsyncIterator[list[dict]]:
     """
-    Fetch completed matches beyond page 1, preserving order (page 2, then 3, ...).
-
-    :param client: The shared HTTP client.
-    :param id: The team's ID.
-    :param completed_pages: Total pages wanted (already clamped by caller for bounded mode).
-        ``> 1`` fetches pages ``2..completed_pages`` concurrently; ``<= 0`` fetches every
-        remaining page in batches up to ``MAX_PAGINATION_PAGES`` total, stopping once a page
-        returns no cards or contributes no new ids. A non-200 on any page raises ScrapingError
-        rather than returning a partial history (which could be cached and silently undercount).
-    :param seen: Set of match ids already collected (page 1). New items are filtered against
-        this set in all modes; full-history mode also stops when a page adds zero new ids.
-    :return: The parsed matches from the additional pages, in order.
+    Function to get a team's completed matches from VLR a page at a time
+
+    :param client: The shared HTTP client
+    :param id: The team's ID
+    :param completed_pages: How many pages of completed matches to fetch, as in :func:`get_team_data`.
+        A non-200 on any page raises ScrapingError rather than returning a partial history.
+    :return: The parsed matches of each page, in order
+    """
+    response = await client.get(constants.TEAM_COMPLETED_MATCHES_URL.format(id))
+    if response.status_code != http.HTTPStatus.OK:
+        raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
+
+    matches = parse_completed_matches(response.content)
+    yield matches
+    if matches and completed_pages != 1:
+        seen: set[str] = {m["id"] for m in matches}
+        async for page in pagination.paginate(
+            client,
+            lambda p: completed_matches_url(id, p),
+            parse_completed_matches,
+            itemgetter("id"),
+            completed_pages,
+            seen,
+            COMPLETED_PAGE_BATCH_SIZE,
+        ):
+            yield page
+
+
+def completed_archive(id: str) -> archive.Listing:
     """
-    matches: list[dict] = []
-    if seen is None:
-        seen = set()
-
-    if completed_pages > 1:
-        # Fetch pages 2..N in batches (not one big fan-out) to bound concurrent load on VLR.
-        stop = False
-        for start in range(2, completed_pages + 1, COMPLETED_PAGE_BATCH_SIZE):
-            batch = range(start, min(start + COMPLETED_PAGE_BATCH_SIZE, completed_pages + 1))
-            responses = await asyncio.gather(*(client.get(completed_matches_url(id, p)) for p in batch))
-            for response in responses:
-                if response.status_code != http.HTTPStatus.OK:
-                    raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-                page_matches = parse_completed_matches(response.content)
-                if not page_matches:
-                    stop = True
-                    break
-                new = [m for m in page_matches if m["id"] not in seen]
-                seen.update(m["id"] for m in new)
-                matches.extend(new)
-            if stop:
-                break
-        return matches
-
-    # completed_pages <= 0: fetch all remaining pages in batches until empty, zero new ids,
-    # or MAX_PAGINATION_PAGES total pages (including the already-fetched page 1) is reached.
-    page = 2
-    pages_crawled = 1  # page 1 already counted
-    while pages_crawled < constants.MAX_PAGINATION_PAGES:
-        batch_size = min(COMPLETED_PAGE_BATCH_SIZE, constants.MAX_PAGINATION_PAGES - pages_crawled)
-        batch = list(range(page, page + batch_size))
-        responses = await asyncio.gather(*(client.get(completed_matches_url(id, p)) for p in batch))
-        pages_crawled += len(batch)
-        stop = False
-        for response in responses:
-            if response.status_code != http.HTTPStatus.OK:
-                raise ScrapingError(url=str(response.url), upstream_status=response.status_code)
-            page_matches = parse_completed_matches(response.content)
-            if not page_matches:
-                stop = True
-                break
-            new = [m for m in page_matches if m["id"] not in seen]
-            if not new:
-                stop = True
-                break
-            seen.update(m["id"] for m in new)
-            matches.extend(new)
-        if stop:
-            break
-        page += batch_size
-
-    return matches
+    Function to get the archive of a team's completed matches, for cursor pagination
+    :param id: The team's ID
+    :return: The listing
+    """
+    return archive.Listing(
+        f"team:{id}:completed",
+        partial(completed_matches_url, id),
+        lambda content: [schemas.CompletedMatch.model_validate(match) for match in parse_completed_matches(content)],
+        schemas.CompletedMatch,
+    )
 
 
 def parse_player(player_data: Tag) -> dict:
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import hmac
+import http
+import json
+import logging
+import secrets
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+from arq.connections import ArqRedis
+from arq.worker import Retry
+from redis.asyncio import Redis
+
+from app import schemas
+import app.constants as constants
+from app.constants import WebhookEventType
+from app.core.connections import get_http_client
+from app.exceptions import NotFoundError
+
+# Registered webhooks, by ID.
+WEBHOOKS_KEY = "webhooks"
+
+# The name deliveries are queued under on the arq worker.
+DELIVER_FUNCTION = "deliver_webhook"
+
+# Deliveries in flight per endpoint, in this process.
+_endpoint_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(constants.WEBHOOK_CONCURRENCY)
+)
+
+
+async def list_webhooks(client: Redis) -> list[schemas.Webhook]:
+    """
+    Function to list the registered webhooks
+
+    :param client: The redis client
+    :return: The webhooks
+    """
+    return [schemas.Webhook.model_validate_json(data) for data in (await client.hgetall(WEBHOOKS_KEY)).values()]
+
+
+async def create_webhook(client: Redis, webhook: schemas.WebhookCreate) -> schemas.Webhook:
+    """
+    Function to register a webhook, with a new secret to sign its deliveries with
+
+    :param client: The redis client
+    :param webhook: The endpoint and what it subscribes to
+    :return: The webhook
+    """
+    result = schemas.Webhook(id=uuid.uuid4().hex, secret=secrets.token_hex(32), **webhook.model_dump())
+    await client.hset(WEBHOOKS_KEY, mapping={result.id: result.model_dump_json()})
+    return result
+
+
+async def delete_webhook(client: Redis, id: str) -> None:
+    """
+    Function to unregister a webhook; deliveries already queued for it are dropped
+
+    :param client: The redis client
+    :param id: The webhook's ID
+    :return: Nothing
+    """
+    if not await client.hdel(WEBHOOKS_KEY, id):
+        raise NotFoundError(detail="No such webhook")
+
+
+def accepts(webhook: schemas.Webhook, type: WebhookEventType, event: dict) -> bool:
+    """
+    Function to check whether a webhook subscribes to a change
+
+    :param webhook: The webhook
+    :param type: The kind of change
+    :param event: The change event, as published to streams
+    :return: Whether it should be delivered
+    """
+    if webhook.types and type not in webhook.types:
+        return False
+    if not (webhook.match_ids or webhook.team_ids or webhook.event_ids):
+        return True
+    return (
+        event.get("match_id") in webhook.match_ids
+        or event.get("event_id") in webhook.event_ids
+        or not set(webhook.team_ids).isdisjoint(event.get("team_ids", ()))
+    )
+
+
+async def dispatch(client: Redis, type: WebhookEventType, events: list[dict]) -> None:
+    """
+    Function to queue a delivery of changes to every webhook subscribed to any of them
+
+    Each webhook gets one delivery with all of its changes, rather than one per change.
+
+    :param client: The redis client
+    :param type: The kind of change
+    :param events: The change events
+    :return: Nothing
+    """
+    if not events or not (webhooks := await list_webhooks(client)):
+        return
+    queue = ArqRedis(pool_or_conn=client.connection_pool)
+    for webhook in webhooks:
+        if accepted := [event for event in events if accepts(webhook, type, event)]:
+            await queue.enqueue_job(DELIVER_FUNCTION, webhook.id, type.value, accepted, uuid.uuid4().hex)
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """
+    Function to sign a delivery, so its receiver can check that it came from us and is recent
+
+    :param secret: The webhook's secret
+    :param timestamp: When it is sent, in unix time
+    :param body: The delivery's body
+    :return: The ``X-Webhook-Signature`` header: the HMAC-SHA256 of ``{timestamp}.{body}``
+    """
+    return "sha256=" + hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+
+
+async def deliver(ctx: dict, webhook_id: str, type: str, events: list[dict], delivery_id: str) -> None:
+    """
+    Function to POST a batch of changes to a webhook on the arq worker, retrying with backoff while it fails
+
+    A delivery to an endpoint that already has :data:`constants.WEBHOOK_CONCURRENCY` in flight is retried later too.
+
+    :param ctx: Context dict
+    :param webhook_id: The webhook's ID
+    :param type: The kind of change
+    :param events: The change events
+    :param delivery_id: The delivery's ID, the same on every try, so receivers can drop duplicates
+    :return: Nothing
+    """
+    if not (data := await ctx["redis"].hget(WEBHOOKS_KEY, webhook_id)):
+        return
+    webhook = schemas.Webhook.model_validate_json(data)
+    body = json.dumps({"id": delivery_id, "type": type, "events": events}, separators=(",", ":")).encode()
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Id": delivery_id,
+        "X-Webhook-Timestamp": str(timestamp),
+        "X-Webhook-Signature": sign(webhook.secret, timestamp, body),
+    }
+
+    if (slot := _endpoint_slots[webhook.id]).locked():
+        # Waiting for a slot could outlast the job's timeout, and arq doesn't retry a job that timed out.
+        failure = "endpoint busy"
+    else:
+        try:
+            async with slot, get_http_client() as client:
+                response = await client.post(
+                    str(webhook.url), content=body, headers=headers, timeout=constants.WEBHOOK_TIMEOUT
+                )
+        except httpx.HTTPError as exc:
+            failure = repr(exc)
+        else:
+            if response.is_success:
+                return
+            failure = f"HTTP {response.status_code}"
+            # The receiver rejected it outright; trying again won't help.
+            if response.is_client_error and response.status_code not in (
+                http.HTTPStatus.REQUEST_TIMEOUT,
+                http.HTTPStatus.TOO_MANY_REQUESTS,
+            ):
+                logging.warning(f"Webhook {webhook.id} rejected delivery {delivery_id}: {failure}")
+                return
+
+    if (job_try := ctx.get("job_try", 1)) >= constants.WEBHOOK_MAX_TRIES:
+        logging.warning(f"Giving up on delivery {delivery_id} to webhook {webhook.id}: {failure}")
+        return
+    raise Retry(defer=constants.WEBHOOK_RETRY_DELAY * 2 ** (job_try - 1))
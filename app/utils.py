@@ -1,14 +1,17 @@
 import re
 from datetime import datetime
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException
-from sentry_sdk.types import Event, Hint
 
 from app.constants import PREFIX, VLR_IMAGE
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from sentry_sdk.types import Event, Hint
+
 _TZ_LOCAL = ZoneInfo(settings.TIMEZONE)
 _TZ_UTC = ZoneInfo("UTC")
 
@@ -135,7 +138,18 @@ def expand_url(url: str | list[str] | None) -> str | None:
         return f"https://{url}"
 
 
-def before_send(event: Event, hint: Hint) -> Event | None:
+def url_pattern(url: str) -> str:
+    """
+    Function to group a URL with others of the same kind, for fingerprinting errors and labelling metrics
+    :param url: The URL
+    :return: The URL without its query, and with numeric path segments as `{id}`: /event/2760/foo → /event/{id}/foo
+    """
+    if not url:
+        return "unknown"
+    return re.sub(r"/\d+", "/{id}", url.split("?")[0])
+
+
+def before_send(event: "Event", hint: "Hint") -> "Event | None":
     """
     Filter and enrich Sentry events.
     - Drop client errors (4xx) — not actionable
@@ -156,13 +170,10 @@ def before_send(event: Event, hint: Hint) -> Event | None:
                 "upstream_status": exc_value.upstream_status,
             }
             # Fingerprint by URL pattern — normalize IDs to {id} to avoid cardinality explosion
-            url_pattern = exc_value.url.split("?")[0] if exc_value.url else "unknown"
-            # Replace numeric path segments: /event/2760/foo → /event/{id}/foo
-            url_pattern = re.sub(r"/\d+", "/{id}", url_pattern)
             event["fingerprint"] = [
                 "scraping-error",
                 str(exc_value.upstream_status or "unknown"),
-                url_pattern,
+                url_pattern(exc_value.url),
             ]
 
     return event
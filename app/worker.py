@@ -0,0 +1,58 @@
+"""
+Standalone arq worker, run with ``python -m app.worker``
+
+It runs the jobs and, while it holds the leader lease, the crons, outside the API processes; set
+``ENABLE_API_WORKER=false`` for the API to leave them to it.
+"""
+
+import asyncio
+import logging
+import signal
+
+import redis.asyncio as redis
+from prometheus_client import start_http_server
+
+from app.core import connections, telemetry, upstream
+from app.core.config import settings
+from app.cron import arq_worker, redis_settings
+
+
+async def main() -> None:
+    """
+    Function to run the worker until it is interrupted or terminated
+    :return: Nothing
+    """
+    if not settings.ENABLE_CACHE:
+        raise SystemExit("The worker needs the cache to be enabled (ENABLE_CACHE=true)")
+
+    if settings.WORKER_METRICS_PORT is not None:
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+    connections.http_client = upstream.create_http_client()
+    connections.redis_pool = redis.ConnectionPool(
+        host=settings.REDIS_HOST,
+        password=settings.REDIS_PASSWORD,
+        port=settings.REDIS_PORT,
+    )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    try:
+        logging.info("Starting arq worker")
+        await arq_worker.start(handle_signals=False, redis_settings=redis_settings())
+        await stopping.wait()
+    finally:
+        logging.info("Stopping arq worker")
+        try:
+            await arq_worker.stop()
+        finally:
+            await connections.redis_pool.aclose()
+            await connections.http_client.aclose()
+
+
+if __name__ == "__main__":
+    telemetry.setup()
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 #!/bin/sh
-# Deploy: pull the latest, sync the venv, and restart the service.
+# Deploy: pull the latest, sync the venv, and restart the services.
 #
 # `uv sync` runs here rather than in the unit so startup stays deterministic
 # and never tries to mutate the environment.
@@ -12,5 +12,7 @@ uv=$(command -v uv 2>/dev/null || echo "$HOME/.local/bin/uv")
 
 git pull --ff-only
 "$uv" sync --locked
-systemctl --user restart vlrgg-scraper.service
-systemctl --user --no-pager status vlrgg-scraper.service | head -n 8
+for unit_name in vlrgg-scraper.service vlrgg-scraper-worker.service; do
+    systemctl --user restart "$unit_name"
+    systemctl --user --no-pager status "$unit_name" | head -n 8
+done
@@ -1,26 +1,29 @@
 #!/bin/sh
-# Install the vlrgg-scraper systemd user unit (one-time per host).
+# Install the vlrgg-scraper systemd user units (one-time per host).
 #
-# Copies deploy/systemd/vlrgg-scraper.service into the user unit directory,
-# syncs the venv (the unit runs --no-sync), enables it, and starts it. Re-run
-# this script to pick up unit changes. Stop any process already using
-# gunicorn.sock before installation so the service can bind it.
+# Copies the API and worker units from deploy/systemd into the user unit
+# directory, syncs the venv (the units run --no-sync), enables them, and
+# starts them. Re-run this script to pick up unit changes. Stop any process
+# already using gunicorn.sock before installation so the service can bind it.
 set -eu
 
 root=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd)
-unit_name=vlrgg-scraper.service
-unit_src=$root/deploy/systemd/$unit_name
+units="vlrgg-scraper.service vlrgg-scraper-worker.service"
 unit_dir=${XDG_CONFIG_HOME:-$HOME/.config}/systemd/user
 
 uv=$(command -v uv 2>/dev/null || echo "$HOME/.local/bin/uv")
 [ -x "$uv" ] || { echo "uv not found at $uv" >&2; exit 1; }
 
 install -d -m 0755 "$unit_dir"
-install -m 0644 "$unit_src" "$unit_dir/$unit_name"
+for unit_name in $units; do
+    install -m 0644 "$root/deploy/systemd/$unit_name" "$unit_dir/$unit_name"
+done
 
 cd "$root"
 "$uv" sync --locked
 
 systemctl --user daemon-reload
-systemctl --user enable --now "$unit_name"
-systemctl --user --no-pager status "$unit_name" | head -n 8
+for unit_name in $units; do
+    systemctl --user enable --now "$unit_name"
+    systemctl --user --no-pager status "$unit_name" | head -n 8
+done
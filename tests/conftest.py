@@ -1,10 +1,18 @@
 from concurrent.futures import Executor, Future
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
 
 import pytest
+from redis.exceptions import WatchError
 
 from tests.live_upstream import UPSTREAM_NETWORK_ERRORS, is_upstream_outage
 
+from app import schemas
+from app.constants import MatchStatus
+from app.core.config import settings
 from app.exceptions import ScrapingError
+from app.schemas.team import UpcomingMatch
 
 
 LIVE_MARKERS = ("live_golden", "live_health")
@@ -50,8 +58,172 @@ class InlineExecutor(Executor):
         return future
 
 
-@pytest.fixture(autouse=True)
-def use_inline_executor_for_rankings(monkeypatch):
-    from app.services import rankings
+class FakeRedis:
+    """Just enough of an in-memory Redis client for the cache code under test."""
 
-    monkeypatch.setattr(rankings, "ProcessPoolExecutor", InlineExecutor)
+    def __init__(self, data: dict | None = None):
+        self.data = dict(data or {})
+        self.published: list[tuple[str, str]] = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, keepttl=False, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def append(self, key, value):
+        self.data[key] = self.data.get(key, b"") + value
+
+    async def hgetall(self, name):
+        return {key.encode(): value for key, value in self.data.get(name, {}).items()}
+
+    async def hset(self, name, mapping):
+        self.data.setdefault(name, {}).update(
+            {key: value.encode() if isinstance(value, str) else value for key, value in mapping.items()}
+        )
+
+    async def hget(self, name, key):
+        return self.data.get(name, {}).get(key)
+
+    async def hdel(self, name, *keys):
+        return sum(self.data.get(name, {}).pop(key, None) is not None for key in keys)
+
+    async def sadd(self, name, *values):
+        self.data.setdefault(name, set()).update(values)
+
+    async def smismember(self, name, values):
+        return [int(value in self.data.get(name, set())) for value in values]
+
+    async def zincrby(self, name, amount, member):
+        zset = self.data.setdefault(name, {})
+        member = member.encode() if isinstance(member, str) else str(member).encode()
+        zset[member] = zset.get(member, 0) + amount
+        return zset[member]
+
+    async def zadd(self, name, mapping, gt=False):
+        zset = self.data.setdefault(name, {})
+        for member, score in mapping.items():
+            member = member.encode() if isinstance(member, str) else str(member).encode()
+            if not gt or score > zset.get(member, float("-inf")):
+                zset[member] = score
+
+    async def zrevrange(self, name, start, end, withscores=False):
+        ranked = sorted(self.data.get(name, {}).items(), key=lambda item: item[1], reverse=True)
+        ranked = ranked[start : None if end == -1 else end + 1]
+        return ranked if withscores else [member for member, _ in ranked]
+
+    async def zunionstore(self, dest, keys):
+        union = {}
+        for key, weight in keys.items():
+            for member, score in self.data.get(key, {}).items():
+                union[member] = union.get(member, 0) + score * weight
+        self.data[dest] = union
+
+    async def zremrangebyrank(self, name, start, end):
+        ranked = sorted(self.data.get(name, {}).items(), key=lambda item: item[1])
+        for member, _ in ranked[start : None if end == -1 else end + 1]:
+            del self.data[name][member]
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+        # The watched keys' values, checked on execute(). Until multi(), commands run right away, as in redis-py.
+        self.watching: dict | None = None
+        self.immediate = False
+
+    def __getattr__(self, name):
+        if self.immediate:
+            return getattr(self.redis, name)
+        return lambda *args, **kwargs: self.commands.append(getattr(self.redis, name)(*args, **kwargs))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands, self.watching, self.immediate = [], None, False
+
+    async def watch(self, *keys):
+        self.watching = {key: self.redis.data.get(key) for key in keys}
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    async def execute(self):
+        commands, watching = self.commands, self.watching
+        self.commands, self.watching = [], None
+        if watching and any(self.redis.data.get(key) != value for key, value in watching.items()):
+            for command in commands:
+                command.close()
+            raise WatchError
+        return [await command for command in commands]
+
+
+def fake_redis() -> FakeRedis:
+    redis = FakeRedis()
+    redis.connection_pool = None
+    return redis
+
+
+def arq_pool() -> MagicMock:
+    pool = MagicMock()
+    pool.return_value.enqueue_job = AsyncMock()
+    return pool
+
+
+def make_team(upcoming: int = 5) -> schemas.Team:
+    match = {
+        "event": "Masters",
+        "stage": "Playoffs",
+        "opponent": "PRX",
+        "date": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    }
+    return schemas.Team(
+        name="Sentinels",
+        tag="SEN",
+        img="https://owcdn.net/img/sen.png",
+        country="United States",
+        rank=1,
+        region="North America",
+        roster=[],
+        upcoming=[UpcomingMatch(id=str(i), **match) for i in range(upcoming)],
+        completed=[schemas.CompletedMatch(id="99", score="2:1", **match)],
+    )
+
+
+def upcoming_match(id: str, minutes: int, event_id: str | None = "99") -> schemas.Match:
+    return schemas.Match(
+        id=id,
+        team1=schemas.MatchTeam(name="Team A", id="1"),
+        team2=schemas.MatchTeam(name="Team B", id="2"),
+        status=MatchStatus.UPCOMING,
+        time=datetime.now(tz=ZoneInfo(settings.TIMEZONE)) + timedelta(minutes=minutes),
+        event="Champions",
+        series="Playoffs",
+        event_id=event_id,
+    )
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app import cache
+from app.core import admission, deadline
+from app.exceptions import OverloadedError
+from app.services import stale
+from tests.conftest import FakeRedis
+
+
+async def hold(slots: admission.Admission, release: asyncio.Event, granted: list[int], n: int) -> None:
+    async with slots.slot():
+        granted.append(n)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_slot_queues_then_turns_requests_away():
+    slots = admission.Admission(limit=1, queue=1)
+    releases = [asyncio.Event(), asyncio.Event()]
+    granted = []
+    tasks = [asyncio.create_task(hold(slots, releases[n], granted, n)) for n in range(2)]
+    await asyncio.sleep(0)
+    assert granted == [0] and len(slots.waiters) == 1
+
+    # The queue is full, so the next request is turned away without waiting.
+    with pytest.raises(OverloadedError) as exc:
+        async with slots.slot():
+            pass
+    assert exc.value.status_code == 503 and exc.value.headers["Retry-After"] == "2"
+
+    releases[0].set()
+    await tasks[0]
+    await asyncio.sleep(0)
+    assert granted == [0, 1] and slots.active == 1
+    releases[1].set()
+    await asyncio.gather(*tasks)
+    assert slots.active == 0 and not slots.waiters
+
+
+@pytest.mark.asyncio
+async def test_slot_gives_up_waiting_at_the_request_deadline():
+    slots = admission.Admission(limit=1, queue=5)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(slots, release, [], 0))
+    await asyncio.sleep(0)
+
+    token = deadline._deadline.set(time.monotonic() + 0.01)
+    try:
+        with pytest.raises(OverloadedError):
+            async with slots.slot():
+                pass
+    finally:
+        deadline._deadline.reset(token)
+    assert not slots.waiters
+
+    release.set()
+    await holder
+    assert slots.active == 0
+
+
+@pytest.mark.asyncio
+async def test_gated_scrapes_take_one_slot_and_fall_back_to_stale_copies():
+    slots = admission.Admission(limit=1, queue=0)
+    redis = FakeRedis()
+
+    async def scrape() -> bytes:
+        # Nested scrapes don't wait on a second slot.
+        async with admission.admit():
+            return b"fresh"
+
+    # Outside of a gated route, nothing is limited.
+    assert await stale.fetch_or_stale("team:2:1", scrape, bytes) == b"fresh"
+
+    async def request() -> tuple[bytes, list[int]]:
+        admission.gate(slots)
+        assert await stale.fetch_or_stale("team:2:1", scrape, bytes, redis) == b"fresh"
+        async with slots.slot():
+            # Every slot is taken: turned away, the request is served the last-known-good copy.
+            with stale.track() as ages:
+                data = await stale.fetch_or_stale("team:2:1", scrape, bytes, redis)
+        return data, ages
+
+    with patch("app.cache.cache.settings.ENABLE_CACHE", True):
+        await cache.set("team:2:1", "stored", client=redis, stale_ttl=60)
+        data, ages = await asyncio.create_task(request())
+
+    assert data == b"stored" and ages == [0]
@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
 from app.agent.tools import build_tools
+from tests.conftest import make_team
 
 
 @pytest.mark.asyncio
@@ -82,3 +84,27 @@ async def test_get_events_tool_is_module_level_and_patchable():
         out = await dispatch["get_events"](pages=2)
     assert out == [{"id": "1"}]
     assert m.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_team_projects_fields():
+    _, dispatch = build_tools(redis_client=None)
+    with patch("app.agent.tools.team.get_team_data", new=AsyncMock(return_value=make_team(4))):
+        out = await dispatch["get_team"](id="2", fields="name,upcoming[:2].id,completed.score")
+    assert out["name"] == "Sentinels"
+    assert out["upcoming"] == [{"id": "0"}, {"id": "1"}]
+    assert out["completed"] == [{"score": "2:1"}]
+    assert "roster" not in out
+
+
+@pytest.mark.asyncio
+async def test_get_team_filters_on_fields_left_out_of_the_projection_and_checks_them_first():
+    _, dispatch = build_tools(redis_client=None)
+    with patch("app.agent.tools.team.get_team_data", new=AsyncMock(return_value=make_team(1))) as get_team_data:
+        assert (await dispatch["get_team"](id="2", fields="completed.score", opponent="FNC")) == {"completed": []}
+        assert (await dispatch["get_team"](id="2", fields="completed.score", opponent="prx")) == {
+            "completed": [{"score": "2:1"}]
+        }
+        with pytest.raises(HTTPException):
+            await dispatch["get_team"](id="2", fields="nope")
+    assert get_team_data.await_count == 2
@@ -0,0 +1,108 @@
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.services import archive
+from tests.conftest import FakeRedis
+
+PAGE_SIZE = 3
+
+
+class Item(BaseModel):
+    id: str
+
+
+class Upstream:
+    """A listing of IDs, newest first, served PAGE_SIZE to a page."""
+
+    def __init__(self, ids: list[str]):
+        self.ids = ids
+        self.requested: list[int] = []
+
+    async def get(self, url: str, *args, **kwargs) -> httpx.Response:
+        page = int(url.rsplit("=", 1)[1])
+        self.requested.append(page)
+        ids = self.ids[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+        return httpx.Response(200, content=json.dumps(ids).encode(), request=httpx.Request("GET", url))
+
+
+LISTING = archive.Listing(
+    "test",
+    "https://vlr.test/?page={}".format,
+    lambda content: [Item(id=id) for id in json.loads(content)],
+    Item,
+)
+
+
+async def read(redis: FakeRedis, upstream: Upstream, limit: int, cursor: str | None = None):
+    with (
+        patch("app.services.archive.settings.ENABLE_CACHE", True),
+        patch("httpx.AsyncClient.get", side_effect=upstream.get),
+    ):
+        page = await archive.archive_page(LISTING, limit, cursor, redis)
+    return [item.id for item in page.items], page.next_cursor
+
+
+async def read_all(redis: FakeRedis, upstream: Upstream, limit: int, cursor: str | None = None) -> list[str]:
+    ids, cursor = await read(redis, upstream, limit, cursor)
+    while cursor:
+        more, cursor = await read(redis, upstream, limit, cursor)
+        ids += more
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_archive_fetches_each_upstream_page_once():
+    redis, upstream = FakeRedis(), Upstream([str(i) for i in range(8)])
+
+    assert await read_all(redis, upstream, 2) == upstream.ids
+    # Pages 1-3 hold the items and page 4 is empty, which ends the listing.
+    assert upstream.requested == [1, 2, 3, 4]
+
+    # Walking it again is served from the archive entirely, as the newest page is still fresh.
+    assert await read_all(redis, upstream, 5) == upstream.ids
+    assert upstream.requested == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_archive_cursor_survives_new_items():
+    redis, upstream = FakeRedis(), Upstream([str(i) for i in range(8)])
+    first, cursor = await read(redis, upstream, 2)
+
+    # Two new items push everything down by two places, so page 2 now repeats part of page 1.
+    upstream.ids[:0] = ["new-1", "new-0"]
+    await redis.delete(LISTING.fresh_key)
+
+    assert first + await read_all(redis, upstream, 2, cursor) == [str(i) for i in range(8)]
+    assert await read_all(redis, upstream, 4) == upstream.ids
+
+
+@pytest.mark.asyncio
+async def test_archive_restarts_when_too_much_is_new():
+    redis, upstream = FakeRedis(), Upstream([str(i) for i in range(8)])
+    _, cursor = await read(redis, upstream, 2)
+
+    # A whole page of new items leaves a gap between them and what was archived.
+    upstream.ids[:0] = ["new-2", "new-1", "new-0"]
+    await redis.delete(LISTING.fresh_key)
+
+    assert await read_all(redis, upstream, 4) == upstream.ids
+    with pytest.raises(HTTPException) as exc:
+        await read(redis, upstream, 2, cursor)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_archive_rejects_bad_cursors_and_needs_the_cache():
+    redis, upstream = FakeRedis(), Upstream(["1"])
+    with pytest.raises(HTTPException) as exc:
+        await read(redis, upstream, 2, "not a cursor")
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        await archive.archive_page(LISTING, 2, None, redis)
+    assert exc.value.status_code == 503
@@ -0,0 +1,43 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app import schemas
+from app.exceptions import BadRequestError, NotFoundError
+from app.services import batch
+
+
+def test_parse_batch_ids():
+    assert batch.parse_batch_ids(" 3,1,,3 ") == ["3", "1"]
+    with pytest.raises(BadRequestError):
+        batch.parse_batch_ids(" , ")
+    with pytest.raises(BadRequestError):
+        batch.parse_batch_ids(",".join(map(str, range(batch.constants.MAX_BATCH_IDS + 1))))
+
+
+@pytest.mark.asyncio
+async def test_batch_lookup_serves_hits_from_one_mget_then_streams_misses():
+    cached = schemas.MatchTeam(name="Cached").model_dump_json().encode()
+    mget = AsyncMock(return_value=[None, cached, None, None])
+
+    async def fetch(id: str) -> schemas.MatchTeam:
+        if id == "3":
+            raise NotFoundError(detail="No such thing")
+        if id == "4":
+            raise AttributeError("'NoneType' object has no attribute 'find'")
+        return schemas.MatchTeam(name=f"Team {id}")
+
+    with patch("app.services.batch.cache.mget", new=mget):
+        lines = [
+            json.loads(line) async for line in batch.batch_lookup(["1", "2", "3", "4"], "key:{}".format, fetch, None)
+        ]
+
+    mget.assert_awaited_once_with(["key:1", "key:2", "key:3", "key:4"], client=None)
+    assert lines[0] == {"id": "2", "data": json.loads(cached)}
+    assert sorted(lines[1:], key=lambda line: line["id"]) == [
+        {"id": "1", "data": {"name": "Team 1", "id": None, "score": None}},
+        {"id": "3", "error": {"status": 404, "detail": "No such thing"}},
+        # A scrape that breaks unexpectedly doesn't take the rest of the batch down with it.
+        {"id": "4", "error": {"status": 500, "detail": "Internal Server Error"}},
+    ]
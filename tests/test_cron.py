@@ -1,47 +1,95 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime
 from types import SimpleNamespace
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from zoneinfo import ZoneInfo
 
+import firebase_admin
 import pytest
 
-from app import cron
-from app.constants import MatchStatus
+from app import constants, cron, schemas
+from app.core import lease
+from app.core.lease import Lease
+from app.services import notifications
+from tests.conftest import FakeRedis, upcoming_match
+
+
+def batch_response(*success: bool) -> SimpleNamespace:
+    return SimpleNamespace(responses=[SimpleNamespace(success=ok) for ok in success])
 
 
 @pytest.mark.asyncio
-async def test_fcm_notification_cron_uses_async_send_with_reused_app():
-    current_time = datetime.now(tz=ZoneInfo(cron.settings.TIMEZONE))
-    upcoming_match = SimpleNamespace(
-        id="123",
-        status=MatchStatus.UPCOMING,
-        time=current_time + timedelta(minutes=10),
-        team1=SimpleNamespace(name="Team A"),
-        team2=SimpleNamespace(name="Team B"),
-    )
-    match_details = SimpleNamespace(
-        teams=[SimpleNamespace(id="1"), SimpleNamespace(id="2")],
-        event=SimpleNamespace(id="99"),
-        videos=SimpleNamespace(streams=[]),
-    )
+async def test_fcm_notification_cron_notifies_from_the_cached_list_once():
+    matches = [upcoming_match("123", 10), upcoming_match("124", 10, event_id=None), upcoming_match("125", 60)]
+    redis = FakeRedis({"matches": schemas.MatchListAdapter.dump_json(matches)})
+    details = schemas.MatchWithDetails(event={"id": "98", "img": "https://vlr.test/e.png", "series": "", "stage": ""})
     app = object()
 
     with (
-        patch("app.cron.matches.get_upcoming_matches", AsyncMock(return_value=[upcoming_match])),
-        patch("app.cron.matches.match_by_id", AsyncMock(return_value=match_details)),
+        patch("app.services.notifications.matches.get_upcoming_matches", AsyncMock()) as get_upcoming_matches,
+        patch("app.services.notifications.matches.match_by_id", AsyncMock(return_value=details)) as match_by_id,
         patch("app.cron._get_fcm_app", return_value=app) as get_fcm_app,
-        patch("app.cron.messaging.send_each_async", AsyncMock()) as send_each_async,
+        patch("app.services.notifications.messaging.send_each_async", AsyncMock()) as send_each_async,
+    ):
+        send_each_async.return_value = batch_response(True, False)
+        await cron.fcm_notification_cron({"redis": redis})
+        send_each_async.return_value = batch_response(True)
+        await cron.fcm_notification_cron({"redis": redis})
+
+    get_upcoming_matches.assert_not_awaited()
+    get_fcm_app.assert_called_with()
+    # Only the match without an event ID in the list needs its details.
+    assert {call.args[0] for call in match_by_id.await_args_list} == {"124"}
+
+    first, second = (call.kwargs for call in send_each_async.await_args_list)
+    assert first["app"] is app and first["dry_run"] is False
+    assert [message.data["match_id"] for message in first["messages"]] == ["123", "124"]
+    assert first["messages"][0].data["title"] == "Team A vs Team B"
+    assert first["messages"][0].condition == "'event-99' in topics || 'match-123' in topics || " + (
+        "'team-1' in topics || 'team-2' in topics"
+    )
+    assert first["messages"][1].condition.startswith("'event-98' in topics")
+    # 123 was sent, so only 124, whose send failed, is retried.
+    assert [message.data["match_id"] for message in second["messages"]] == ["124"]
+
+
+@pytest.mark.asyncio
+async def test_notification_fills_missing_ids_from_cached_details():
+    match = upcoming_match("126", 10, event_id=None)
+    match.team2.id = None
+    details = schemas.MatchWithDetails(
+        teams=[
+            {"name": "Team A", "score": 0, "img": "https://vlr.test/a.png", "id": "1"},
+            {"name": "Team B", "score": 0, "img": "https://vlr.test/b.png", "id": "3"},
+        ],
+        event={"id": "98", "img": "https://vlr.test/e.png", "series": "", "stage": ""},
+    )
+    redis = FakeRedis({"match:126": details.model_dump_json().encode()})
+
+    with (
+        patch("app.cache.cache.settings.ENABLE_CACHE", True),
+        patch("app.services.notifications.matches.match_by_id", AsyncMock()) as match_by_id,
+    ):
+        message = await notifications.build_message(redis, match, datetime.now(tz=ZoneInfo(cron.settings.TIMEZONE)))
+
+    match_by_id.assert_not_awaited()
+    assert message.condition == "'event-98' in topics || 'match-126' in topics || 'team-1' in topics || " + (
+        "'team-3' in topics"
+    )
+
+
+@pytest.mark.asyncio
+async def test_notifications_are_sent_in_batches():
+    messages = [object()] * 5
+    with (
+        patch("app.services.notifications.constants.FCM_BATCH_SIZE", 2),
+        patch("app.services.notifications.messaging.send_each_async", AsyncMock()) as send_each_async,
     ):
-        await cron.fcm_notification_cron({"redis": AsyncMock()})
+        send_each_async.side_effect = [batch_response(True, True), RuntimeError("boom"), batch_response(False)]
+        sent = await notifications.send(messages, object())
 
-    get_fcm_app.assert_called_once_with()
-    send_each_async.assert_awaited_once()
-    _, kwargs = send_each_async.await_args
-    assert kwargs["app"] is app
-    assert kwargs["dry_run"] is False
-    assert len(kwargs["messages"]) == 1
-    assert kwargs["messages"][0].data["title"] == "Team A vs Team B"
-    assert kwargs["messages"][0].data["match_id"] == "123"
+    assert [len(call.kwargs["messages"]) for call in send_each_async.await_args_list] == [2, 2, 1]
+    assert sent == [True, True, False, False, False]
 
 
 @pytest.mark.asyncio
@@ -49,20 +97,20 @@ async def test_close_fcm_app_uses_worker_safe_cleanup():
     app = object()
 
     with (
-        patch("app.cron.get_app", return_value=app),
+        patch("firebase_admin.get_app", return_value=app),
         patch("app.cron.asyncio.to_thread", AsyncMock()) as to_thread,
     ):
         await cron._close_fcm_app()
 
-    to_thread.assert_awaited_once_with(cron.delete_app, app)
+    to_thread.assert_awaited_once_with(firebase_admin.delete_app, app)
 
 
 def test_get_fcm_app_returns_existing_app_without_initializing():
     app = object()
 
     with (
-        patch("app.cron.get_app", return_value=app) as get_app,
-        patch("app.cron.initialize_app") as initialize_app,
+        patch("firebase_admin.get_app", return_value=app) as get_app,
+        patch("firebase_admin.initialize_app") as initialize_app,
     ):
         result = cron._get_fcm_app()
 
@@ -84,9 +132,9 @@ def test_get_fcm_app_returns_existing_app_if_concurrent_init_wins():
         return app
 
     with (
-        patch("app.cron.get_app", side_effect=get_app_side_effect) as get_app,
-        patch("app.cron.credentials.Certificate", return_value=credential),
-        patch("app.cron.initialize_app", side_effect=ValueError()) as initialize_app,
+        patch("firebase_admin.get_app", side_effect=get_app_side_effect) as get_app,
+        patch("firebase_admin.credentials.Certificate", return_value=credential),
+        patch("firebase_admin.initialize_app", side_effect=ValueError()) as initialize_app,
     ):
         result = cron._get_fcm_app()
 
@@ -103,9 +151,9 @@ def test_get_fcm_app_initializes_when_missing():
     credential = object()
 
     with (
-        patch("app.cron.get_app", side_effect=[ValueError(), ValueError()]) as get_app,
-        patch("app.cron.credentials.Certificate", return_value=credential),
-        patch("app.cron.initialize_app", return_value=app) as initialize_app,
+        patch("firebase_admin.get_app", side_effect=[ValueError(), ValueError()]) as get_app,
+        patch("firebase_admin.credentials.Certificate", return_value=credential),
+        patch("firebase_admin.initialize_app", return_value=app) as initialize_app,
     ):
         result = cron._get_fcm_app()
 
@@ -122,9 +170,9 @@ def test_get_fcm_app_reraises_original_init_error_when_no_app_exists():
     init_error = ValueError("invalid service account")
 
     with (
-        patch("app.cron.get_app", side_effect=[ValueError(), ValueError()]),
-        patch("app.cron.credentials.Certificate", return_value=credential),
-        patch("app.cron.initialize_app", side_effect=init_error),
+        patch("firebase_admin.get_app", side_effect=[ValueError(), ValueError()]),
+        patch("firebase_admin.credentials.Certificate", return_value=credential),
+        patch("firebase_admin.initialize_app", side_effect=init_error),
     ):
         with pytest.raises(ValueError, match="invalid service account"):
             cron._get_fcm_app()
@@ -133,7 +181,7 @@ def test_get_fcm_app_reraises_original_init_error_when_no_app_exists():
 @pytest.mark.asyncio
 async def test_close_fcm_app_skips_missing_app():
     with (
-        patch("app.cron.get_app", side_effect=ValueError),
+        patch("firebase_admin.get_app", side_effect=ValueError),
         patch("app.cron.asyncio.to_thread", AsyncMock()) as to_thread,
     ):
         await cron._close_fcm_app()
@@ -146,11 +194,64 @@ async def test_close_fcm_app_logs_and_continues_on_cleanup_failure():
     app = object()
 
     with (
-        patch("app.cron.get_app", return_value=app),
+        patch("firebase_admin.get_app", return_value=app),
         patch("app.cron.asyncio.to_thread", AsyncMock(side_effect=RuntimeError("boom"))) as to_thread,
         patch("app.cron.logging.exception") as log_exception,
     ):
         await cron._close_fcm_app()
 
-    to_thread.assert_awaited_once_with(cron.delete_app, app)
+    to_thread.assert_awaited_once_with(firebase_admin.delete_app, app)
     log_exception.assert_called_once_with("Failed to delete Firebase app during shutdown: %s", "vlrgg-fcm")
+
+
+class LeaseRedis(FakeRedis):
+    """Runs the lease's scripts, which only act for the holder."""
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.data.get(key) != token.encode():
+            return 0
+        if script == lease._RELEASE:
+            del self.data[key]
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_lease_is_held_by_one_holder_at_a_time():
+    redis, first, second = LeaseRedis(), Lease("leader", 30), Lease("leader", 30)
+
+    assert await first.acquire(redis)
+    assert not await second.acquire(redis)
+    # The holder renews it.
+    assert await first.acquire(redis)
+
+    # Releasing it lets someone else take it, and only the holder can release it.
+    await first.release(redis)
+    assert await second.acquire(redis)
+    await first.release(redis)
+    assert not await first.acquire(redis)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_crons_only_while_leader():
+    worker = cron.ArqWorker()
+    worker.redis = LeaseRedis()
+    cron_worker = MagicMock(async_run=AsyncMock(), close=AsyncMock())
+
+    async def sleep(seconds):
+        if not cron_worker.close.await_count:
+            # Another process takes the lease over, e.g. after this one failed to renew it in time.
+            worker.redis.data[constants.LEADER_LEASE_KEY] = b"another-worker"
+            return
+        raise asyncio.CancelledError
+
+    with (
+        patch("app.cron.create_worker", return_value=cron_worker) as create_worker,
+        patch("app.cron.asyncio.sleep", side_effect=sleep),
+        pytest.raises(asyncio.CancelledError),
+    ):
+        await worker.lead()
+
+    create_worker.assert_called_once()
+    assert create_worker.call_args.args[0]["queue_name"] == constants.CRON_QUEUE_NAME
+    cron_worker.close.assert_awaited_once()
+    assert worker.cron_worker is None
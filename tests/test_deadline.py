@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import deadline, upstream
+
+
+def test_budget_prefers_the_header_then_the_longest_matching_route():
+    assert deadline.budget("/api/v1/team/2", None) == 120.0
+    assert deadline.budget("/api/v1/matches/batch", None) == 120.0
+    assert deadline.budget("/api/v1/matches/", None) == 30.0
+    assert deadline.budget("/api/v1/matches/", "5") == 5.0
+    # Past the max, or not a usable number, the header is capped or ignored.
+    assert deadline.budget("/api/v1/team/2", "9000") == 300.0
+    assert deadline.budget("/api/v1/team/2", "soon") == deadline.budget("/api/v1/team/2", "-1") == 120.0
+
+
+def test_upstream_calls_stop_at_the_request_deadline():
+    attempts = []
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.extensions["timeout"]["read"])
+        await asyncio.Event().wait()  # VLR never answers
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow() -> None:
+        transport = upstream.ResilientTransport(httpx.MockTransport(handle))
+        async with httpx.AsyncClient(transport=transport, timeout=20) as client:
+            await client.get("https://vlr.test/")
+
+    app.add_middleware(deadline.DeadlineMiddleware)  # type: ignore[arg-type]
+    response = TestClient(app).get("/slow", headers={"X-Request-Timeout": "0.05"})
+
+    assert response.status_code == 504
+    # The attempt's own timeouts were cut down to what was left of the budget.
+    assert len(attempts) == 1 and attempts[0] <= 0.05
+
+
+@pytest.mark.asyncio
+async def test_middleware_cancels_the_request_when_the_client_disconnects():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def app(scope, receive, send) -> None:
+        await receive()
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b""}]
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop()
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "path": "/api/v1/team/2", "headers": []}
+    await asyncio.wait_for(deadline.DeadlineMiddleware(app)(scope, receive, None), 1)  # type: ignore[arg-type]
+
+    assert cancelled.is_set() and deadline.remaining() is None
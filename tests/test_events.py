@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, patch
 from pathlib import Path
 from bs4 import BeautifulSoup
 
+from app.schemas import Event
 from app.services import events
 from app.constants import EventStatus, EVENTS_URL
 from app.exceptions import ScrapingError
@@ -237,27 +238,23 @@ def _build_event_card(status_class: str, status_text: str) -> BeautifulSoup:
     return BeautifulSoup(html, "lxml").find("a", class_="wf-card")
 
 
-@pytest.mark.asyncio
-async def test_parse_event_paused_status():
+def test_parse_event_paused_status():
     event_tag = _build_event_card("mod-paused", "paused")
-    mock_redis = AsyncMock()
 
-    result = await events.parse_event(event_tag, mock_redis)
+    result = events.parse_event(event_tag)
 
     assert result.status == EventStatus.PAUSED
     assert result.id == "9999"
     assert result.title == "Some Event"
 
 
-@pytest.mark.asyncio
-async def test_parse_event_unknown_status_falls_back(caplog):
+def test_parse_event_unknown_status_falls_back(caplog):
     event_tag = _build_event_card("mod-suspended", "suspended")
-    mock_redis = AsyncMock()
 
     import logging
 
     with caplog.at_level(logging.WARNING):
-        result = await events.parse_event(event_tag, mock_redis)
+        result = events.parse_event(event_tag)
 
     assert result.status == EventStatus.UNKNOWN
     assert any("Unknown VLR event status" in record.message for record in caplog.records)
@@ -510,6 +507,18 @@ async def test_get_events_fetch_all_pages_stops_on_empty():
     assert len(all_pages) == len(two_pages)
 
 
+@pytest.mark.asyncio
+async def test_stream_events_sends_one_chunk_per_page():
+    mock_redis = AsyncMock()
+    with patch("httpx.AsyncClient.get", side_effect=_build_paged_mock_get()):
+        all_pages = await events.get_events(mock_redis, pages=0)
+        chunks = [chunk async for chunk in events.stream_events(mock_redis, pages=0)]
+
+    assert len(chunks) == 2
+    rows = b"".join(chunks).splitlines()
+    assert [Event.model_validate_json(row) for row in rows] == all_pages
+
+
 @pytest.mark.asyncio
 async def test_get_events_later_page_error_raises_not_partial():
     """A non-200 on a later page must raise ScrapingError, never return a partial list."""
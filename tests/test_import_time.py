@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core import telemetry
+
+# What importing the app may take, in microseconds as `-X importtime` reports it. It takes about a second now; the
+# headroom is for slow CI machines, while the optional subsystems below are checked for exactly.
+IMPORT_TIME_BUDGET = 2_500_000
+# Only loaded once FCM, the LLM or Sentry is configured.
+OPTIONAL_PACKAGES = {"firebase_admin", "google", "openai", "sentry_sdk"}
+
+
+def import_times(module: str) -> dict[str, int]:
+    env = {
+        k: v for k, v in os.environ.items() if k not in {"SENTRY_DSN", "LLM_API_KEY", "GOOGLE_APPLICATION_CREDENTIALS"}
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=Path(__file__).parents[1],
+        check=True,
+    )
+    # Lines look like `import time:       292 |     304211 |   fastapi` (self, cumulative, nested name).
+    return {
+        name.strip(): int(cumulative)
+        for _, cumulative, name in (line.split("|") for line in result.stderr.splitlines()[1:] if "|" in line)
+    }
+
+
+def test_app_imports_within_budget_without_optional_subsystems():
+    times = import_times("app.main")
+
+    assert not {name for name in times if name.split(".")[0] in OPTIONAL_PACKAGES}
+    assert times["app.main"] < IMPORT_TIME_BUDGET
+
+
+def test_release_is_read_from_the_checkout(tmp_path: Path):
+    (tmp_path / "refs" / "heads").mkdir(parents=True)
+    (tmp_path / "HEAD").write_text("ref: refs/heads/master\n")
+    (tmp_path / "packed-refs").write_text("# pack-refs with: peeled\nabc123 refs/heads/master\n")
+
+    with patch("app.core.telemetry._GIT_DIR", tmp_path), patch.dict(os.environ, {}, clear=False) as env:
+        env.pop("GIT_SHA", None)
+        assert telemetry._release() == "abc123"
+        (tmp_path / "refs" / "heads" / "master").write_text("def456\n")
+        assert telemetry._release() == "def456"
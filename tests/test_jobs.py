@@ -0,0 +1,96 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.constants import JobKind, JobStatus
+from app.exceptions import ScrapingError
+from app.services import jobs
+from tests.conftest import arq_pool, fake_redis, make_team
+
+
+async def scrape_two_pages(id, completed_pages=1, on_page=None):
+    await on_page(1)
+    await on_page(2)
+    return make_team()
+
+
+@pytest.mark.asyncio
+async def test_submit_queues_a_scrape_once():
+    redis, pool = fake_redis(), arq_pool()
+    with patch("app.services.jobs.ArqRedis", pool):
+        first = await jobs.submit(redis, JobKind.TEAM, "2", 0)
+        again = await jobs.submit(redis, JobKind.TEAM, "2", -1)
+
+    # Every "all pages" value is the same scrape.
+    assert first == again
+    assert (first.id, first.status) == ("team:2:0", JobStatus.QUEUED)
+    pool.return_value.enqueue_job.assert_awaited_once_with(jobs.JOB_FUNCTION, "team", "2", 0, _job_id="team:2:0")
+
+
+@pytest.mark.asyncio
+async def test_run_job_saves_progress_and_result_for_reuse():
+    redis, pool = fake_redis(), arq_pool()
+    with patch("app.services.jobs.team.get_team_data", side_effect=scrape_two_pages):
+        await jobs.run_job({"redis": redis}, "team", "2", 0)
+
+    published = [json.loads(message) for _, message in redis.published]
+    assert [(job["status"], job["pages"]) for job in published] == [
+        ("running", 0),
+        ("running", 1),
+        ("running", 2),
+        ("complete", 2),
+    ]
+    job, data = await jobs.job_result(redis, "team:2:0")
+    assert job.status == JobStatus.COMPLETE
+    assert data == make_team().model_dump_json().encode()
+
+    # The same scrape is served from the stored result rather than run again.
+    with patch("app.services.jobs.ArqRedis", pool):
+        assert (await jobs.submit(redis, JobKind.TEAM, "2", 0)).status == JobStatus.COMPLETE
+    pool.return_value.enqueue_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_its_error_and_can_run_again():
+    redis, pool = fake_redis(), arq_pool()
+    error = ScrapingError(url="https://www.vlr.gg/team/2", upstream_status=502)
+    with patch("app.services.jobs.team.get_team_data", side_effect=error):
+        await jobs.run_job({"redis": redis}, "team", "2", 0)
+
+    with pytest.raises(HTTPException) as exc:
+        await jobs.job_result(redis, "team:2:0")
+    assert (exc.value.status_code, exc.value.detail) == (500, error.detail)
+
+    with patch("app.services.jobs.ArqRedis", pool):
+        assert (await jobs.submit(redis, JobKind.TEAM, "2", 0)).status == JobStatus.QUEUED
+    pool.return_value.enqueue_job.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_watch_follows_a_job_until_it_finishes():
+    redis, queue = fake_redis(), asyncio.Queue()
+    with patch("app.services.jobs.team.get_team_data", side_effect=scrape_two_pages):
+        await jobs.run_job({"redis": redis}, "team", "2", 0)
+    # Subscribed while the job was still queued: every change after that arrives as a message.
+    await jobs.save_job(redis, jobs.schemas.Job(id="team:2:0", status=JobStatus.QUEUED), 60)
+    for _, message in redis.published[:-1]:
+        queue.put_nowait(message.encode())
+
+    @asynccontextmanager
+    async def subscribe(accepts):
+        yield queue
+
+    with patch.object(jobs.job_events, "subscribe", subscribe):
+        seen = [(job.status, job.pages) async for job in jobs.watch(redis, "team:2:0")]
+
+    assert seen == [
+        (JobStatus.QUEUED, 0),
+        (JobStatus.RUNNING, 0),
+        (JobStatus.RUNNING, 1),
+        (JobStatus.RUNNING, 2),
+        (JobStatus.COMPLETE, 2),
+    ]
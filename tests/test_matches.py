@@ -1,4 +1,5 @@
-from unittest.mock import AsyncMock, patch
+import json
+from unittest.mock import AsyncMock, Mock, patch
 from pathlib import Path
 
 import pytest
@@ -6,7 +7,10 @@ from bs4 import BeautifulSoup
 
 import app.constants as constants
 from app.constants import MAX_PAGINATION_PAGES
+from app.exceptions import BadRequestError
+from app import schemas
 from app.services import matches
+from tests.conftest import FakeRedis
 
 
 @pytest.mark.asyncio
@@ -97,6 +101,66 @@ def test_parse_div_based_overview_scoreboard():
     ]
 
 
+def _bo5_map_stats():
+    html = (Path(__file__).parent / "fixtures" / "match_maps_bo5.html").read_text()
+    return BeautifulSoup(html, "lxml").find_all("div", class_="vm-stats")
+
+
+def test_get_map_data_parses_every_played_map_in_one_walk():
+    """A best-of-5 page: four played maps (table and overview layouts), one disabled TBD map."""
+    data, map_count = matches.get_map_data(_bo5_map_stats())
+
+    assert map_count == 4
+    assert [m["map"] for m in data] == ["Bind", "Haven", "Split", "Ascent"]
+    assert [[team["score"] for team in m["teams"]] for m in data] == [
+        ["9", "15"],
+        ["9", "13"],
+        ["15", "5"],
+        ["13", "10"],
+    ]
+    assert all([team["name"] for team in m["teams"]] == ["Alpha Esports", "Beta Gaming"] for m in data)
+    assert [len(m["members"]) for m in data] == [10, 10, 10, 10]
+    assert [len(m["rounds"]) for m in data] == [24, 22, 20, 23]
+
+    bind = data[0]
+    # Short names come from the first `vlr-rounds` block and map back to the full team name.
+    assert {member["team"] for member in bind["members"]} == {"Alpha Esports", "Beta Gaming"}
+    assert bind["members"][9] == {
+        "id": "2109",
+        "name": "Player9",
+        "team": "Beta Gaming",
+        "agents": [{"title": "Breach", "img": "https://www.vlr.gg/img/vlr/game/agents/breach.png"}],
+        "rating": 1.11,
+        "acs": 256,
+        "kills": 26,
+        "deaths": 21,
+        "assists": 8,
+        "kast": 80,
+        "adr": 87,
+        "headshot_percent": 40,
+        "first_kills": 0,
+        "first_deaths": 1,
+        "first_kills_diff": -1,
+    }
+    assert bind["rounds"][11:14] == [
+        {"round_number": "12", "round_score": "6-6", "winner": "team2", "side": "defense", "win_type": "Time out"},
+        {"round_number": "13", "round_score": "6-7", "winner": "team2", "side": "defense", "win_type": "Defused"},
+        {"round_number": "14", "round_score": "7-7", "winner": "team1", "side": "attack", "win_type": "Elimination"},
+    ]
+    # Haven uses the div-based overview scoreboard rather than `tbody` tables.
+    assert data[1]["members"][0]["team"] == "Alpha Esports"
+    assert data[1]["members"][0]["rating"] == 264
+
+
+def test_get_map_data_worker_pool_matches_inline_parse():
+    from tests.conftest import InlineExecutor
+
+    with InlineExecutor() as executor:
+        pooled = matches.get_map_data(_bo5_map_stats(), executor=executor)
+
+    assert pooled == matches.get_map_data(_bo5_map_stats())
+
+
 @pytest.mark.asyncio
 async def test_match_list_keeps_first_upcoming_date_group(monkeypatch):
     fixture_dir = Path(__file__).parent / "fixtures"
@@ -201,6 +265,19 @@ async def test_completed_matches_fetch_all_stops_on_empty(monkeypatch):
     assert len(result) == 100
 
 
+@pytest.mark.asyncio
+async def test_stream_completed_matches_sends_one_chunk_per_page(monkeypatch):
+    monkeypatch.setattr(matches.settings, "ENABLE_ID_MAP_DB", False)
+    mock_redis = AsyncMock()
+
+    with patch("httpx.AsyncClient.get", side_effect=_build_completed_mock_get()):
+        result = await matches.get_completed_matches(mock_redis, pages=0)
+        chunks = [chunk async for chunk in matches.stream_completed_matches(mock_redis, pages=0)]
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [50, 50]
+    assert [schemas.Match.model_validate_json(row) for row in b"".join(chunks).splitlines()] == result
+
+
 @pytest.mark.asyncio
 async def test_completed_matches_later_page_error_raises_not_partial(monkeypatch):
     """A non-200 on a later page must raise ScrapingError, never return a partial list."""
@@ -273,6 +350,64 @@ async def test_match_by_id():
                 assert isinstance(round_info.round_number, int)
 
 
+def _match_fixture_response() -> AsyncMock:
+    mock_response = AsyncMock()
+    mock_response.status_code = 200
+    mock_response.content = (Path(__file__).parent / "fixtures" / "match_12345.html").read_bytes()
+    return mock_response
+
+
+def test_parse_sections():
+    assert matches.parse_sections(None) == constants.ALL_MATCH_SECTIONS
+    assert matches.parse_sections(" , ") == constants.ALL_MATCH_SECTIONS
+    assert matches.parse_sections("Teams, event") == {constants.MatchSection.TEAMS, constants.MatchSection.EVENT}
+    with pytest.raises(BadRequestError):
+        matches.parse_sections("teams,lineups")
+
+
+@pytest.mark.asyncio
+async def test_match_by_id_skips_unrequested_sections():
+    with (
+        patch("httpx.AsyncClient.get", return_value=_match_fixture_response()),
+        patch("app.services.matches.cache.get", new=AsyncMock(return_value=None)),
+        patch("app.services.matches.cache.set", new=AsyncMock()) as cset,
+        patch("app.services.matches.get_map_data") as map_data,
+        patch("app.services.matches.get_previous_encounters_data") as h2h,
+    ):
+        result = await matches.match_by_id("12345", AsyncMock(), matches.parse_sections("teams,event"))
+
+    map_data.assert_not_called()
+    h2h.assert_not_called()
+    # A partial match must never land in the shared cache key.
+    cset.assert_not_called()
+    assert [team.name for team in result.teams] == ["Team A", "Team B"]
+    assert result.event is not None
+    assert result.videos is None
+    assert result.data == []
+
+
+@pytest.mark.asyncio
+async def test_match_json_by_id_slices_cached_match_like_fresh_parse():
+    with (
+        patch("httpx.AsyncClient.get", return_value=_match_fixture_response()),
+        patch("app.services.matches.cache.get", new=AsyncMock(return_value=None)),
+        patch("app.services.matches.cache.set", new=AsyncMock()) as cset,
+    ):
+        full = await matches.match_by_id("12345", AsyncMock())
+        sections = matches.parse_sections("teams,maps,rounds")
+        fresh = await matches.match_json_by_id("12345", AsyncMock(), sections)
+
+    # Only the complete parse is cached.
+    cset.assert_awaited_once()
+    cached = cset.await_args.args[1]
+    sliced = json.loads(matches.slice_match_json(cached.encode(), sections))
+    assert sliced == json.loads(fresh)
+    assert set(sliced) == {"teams", "bans", "map_count", "data"}
+    assert all("members" not in map_data and "rounds" in map_data for map_data in sliced["data"])
+    assert sliced["teams"] == full.model_dump(mode="json")["teams"]
+    assert matches.slice_match_json(cached.encode(), constants.ALL_MATCH_SECTIONS) == cached.encode()
+
+
 @pytest.mark.asyncio
 async def test_completed_matches_page_cap(monkeypatch):
     """Requesting pages=9999 (bounded mode) must issue at most MAX_PAGINATION_PAGES HTTP fetches."""
@@ -351,3 +486,187 @@ async def test_completed_matches_raw_card_count_stop(monkeypatch):
     assert matches.completed_matches_url(3) in requested_urls
     # Only page 1's matches are returned (page 2 had cards but nothing parseable).
     assert len(result) == 50
+
+
+def _listed_match(match_id: str, status: str) -> dict:
+    return {
+        "id": match_id,
+        "team1": {"name": "Team A", "score": 0},
+        "team2": {"name": "Team B", "score": 0},
+        "status": status,
+        "time": "2026-01-01T10:00:00+05:30",
+        "event": "Event",
+        "series": "Series",
+    }
+
+
+@pytest.mark.asyncio
+async def test_poll_live_matches_patches_only_changes_into_cached_list():
+    redis = FakeRedis(
+        {
+            "matches": json.dumps([_listed_match("1", "live"), _listed_match("2", "upcoming")]).encode(),
+            matches.LIVE_STATE_KEY: {"9": b"{}"},
+        }
+    )
+    state = {"team1": 1, "team2": 0, "current_map": "Bind", "current_round": 7}
+
+    with patch("app.services.matches.live_match_state", new=AsyncMock(return_value=state)) as live_match_state:
+        assert await matches.poll_live_matches(redis) == {"1": state}
+        # Unchanged on the next poll: nothing to patch.
+        assert await matches.poll_live_matches(redis) == {}
+
+    # Only live matches are polled, and finished ones drop out of the state hash.
+    assert [call.args[0] for call in live_match_state.await_args_list] == ["1", "1"]
+    assert set(redis.data[matches.LIVE_STATE_KEY]) == {"1"}
+    live, upcoming = schemas.MatchListAdapter.validate_json(redis.data["matches"])
+    assert (live.team1.score, live.current_map, live.current_round) == (1, "Bind", 7)
+    assert upcoming.current_map is None
+
+
+@pytest.mark.asyncio
+async def test_poll_live_matches_patches_a_list_refreshed_meanwhile():
+    redis = FakeRedis({"matches": json.dumps([_listed_match("1", "live")]).encode()})
+    state = {"team1": 1, "team2": 0, "current_map": "Bind", "current_round": 7}
+    refreshed = schemas.MatchListAdapter.validate_python([_listed_match("1", "live"), _listed_match("3", "upcoming")])
+
+    async def poll_during_refresh(match_id: str, redis_client: FakeRedis) -> dict:
+        # The full refresh lands while the live match is being scraped.
+        await matches.store_match_list(redis, refreshed, refreshed, [])
+        return state
+
+    with patch("app.services.matches.live_match_state", new=poll_during_refresh):
+        assert await matches.poll_live_matches(redis) == {"1": state}
+
+    # The refreshed list was patched, not the one the poll started from written back over it.
+    live, upcoming = schemas.MatchListAdapter.validate_json(redis.data["matches"])
+    assert (live.current_map, upcoming.id) == ("Bind", "3")
+    # Under the next version, whose changelog entry holds just the patched match.
+    assert redis.data[matches.MATCHES_VERSION_KEY] == 2
+    changes = schemas.MatchChanges.model_validate_json(redis.data[matches.changelog_key(2)])
+    assert [match.id for match in changes.matches] == ["1"]
+
+
+def _match_details(series: tuple[int, int], *maps: tuple[str, int, int]) -> schemas.MatchWithDetails:
+    return schemas.MatchWithDetails(
+        teams=[
+            {"name": "Team A", "score": series[0], "img": "https://owcdn.net/a.png"},
+            {"name": "Team B", "score": series[1], "img": "https://owcdn.net/b.png"},
+        ],
+        map_count=3,
+        data=[
+            {"map": name, "teams": [{"name": "Team A", "score": score1}, {"name": "Team B", "score": score2}]}
+            for name, score1, score2 in maps
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_live_match_state_reads_first_undecided_map():
+    details = _match_details((1, 0), ("Bind", 14, 12), ("Haven", 5, 3), ("Split", 0, 0))
+
+    with patch("app.services.matches.scrape_match", new=AsyncMock(return_value=details)) as scrape_match:
+        state = await matches.live_match_state("1", AsyncMock())
+
+    assert scrape_match.await_args.args[2] == matches.LIVE_SECTIONS
+    assert state == {"team1": 1, "team2": 0, "current_map": "Haven", "current_round": 9}
+
+
+@pytest.mark.asyncio
+async def test_live_match_state_reports_no_round_once_the_maps_are_decided():
+    between_maps = _match_details((1, 1), ("Bind", 14, 12), ("Haven", 9, 13))
+    finished = _match_details((2, 0), ("Bind", 14, 12), ("Haven", 13, 9))
+
+    with patch("app.services.matches.scrape_match", new=AsyncMock(side_effect=[between_maps, finished])):
+        assert await matches.live_match_state("1", AsyncMock()) == {
+            "team1": 1,
+            "team2": 1,
+            "current_map": "Haven",
+            "current_round": None,
+        }
+        assert await matches.live_match_state("1", AsyncMock()) == {
+            "team1": 2,
+            "team2": 0,
+            "current_map": None,
+            "current_round": None,
+        }
+
+
+def test_diff_match_lists_reports_changed_and_new_matches():
+    previous = schemas.MatchListAdapter.validate_python([_listed_match("1", "live"), _listed_match("2", "upcoming")])
+    current = schemas.MatchListAdapter.validate_python(
+        [_listed_match("1", "live"), _listed_match("2", "live"), _listed_match("3", "upcoming")]
+    )
+    current[0].team1.id = "10"
+
+    events = matches.diff_match_lists(previous, current)
+
+    assert [(event["match_id"], set(event["changes"])) for event in events] == [
+        ("2", {"status"}),
+        ("3", {"status", "team1", "team2", "current_map", "current_round"}),
+    ]
+
+
+def test_match_change_filter():
+    event = {"match_id": "1", "event_id": "5", "team_ids": ["10", "11"], "changes": {}}
+
+    assert matches.match_change_filter(None, None, None)(event)
+    assert matches.match_change_filter(["1"], None, None)(event)
+    assert matches.match_change_filter(["2"], ["11"], None)(event)
+    assert matches.match_change_filter(None, None, ["5"])(event)
+    assert not matches.match_change_filter(["2"], ["12"], ["6"])(event)
+
+
+@pytest.mark.asyncio
+async def test_poll_live_matches_publishes_changes_and_streams_them():
+    redis = FakeRedis({"matches": json.dumps([_listed_match("1", "live")]).encode()})
+    state = {"team1": 1, "team2": 0, "current_map": "Bind", "current_round": 7}
+
+    with patch("app.services.matches.live_match_state", new=AsyncMock(return_value=state)):
+        await matches.poll_live_matches(redis)
+
+    [(channel, message)] = redis.published
+    assert channel == matches.MATCH_CHANGES_CHANNEL
+    assert json.loads(message) == {"match_id": "1", "event_id": None, "team_ids": [], "changes": state}
+
+    async def idle(self):
+        pass
+
+    with patch("app.core.pubsub.Broker._listen", idle):
+        stream = matches.match_change_stream(matches.match_change_filter(["1"], None, None))
+        assert await anext(stream) == b": connected\n\n"
+        matches.match_changes.dispatch(message.encode())
+        assert await anext(stream) == b"event: match\ndata: " + message.encode() + b"\n\n"
+        await stream.aclose()
+    assert not matches.match_changes.subscriptions
+
+
+@pytest.mark.asyncio
+async def test_match_changes_since_merges_deltas_and_falls_back_to_full_list():
+    redis = FakeRedis()
+    one, two, three = (_listed_match(match_id, "upcoming") for match_id in "123")
+    versions = [[one, two], [one | {"status": "live"}, two], [one | {"status": "completed"}, three]]
+    previous = []
+    for raw in versions:
+        current = schemas.MatchListAdapter.validate_python(raw)
+        await matches.store_match_list(redis, current, *matches.match_list_delta(previous, current))
+        previous = current
+
+    adapter = Mock(wraps=schemas.MatchListAdapter)
+    with (
+        patch("app.services.matches.cache.settings.ENABLE_CACHE", True),
+        patch("app.services.matches.schemas.MatchListAdapter", adapter),
+    ):
+        delta = await matches.match_changes_since(1, redis)
+        unchanged = await matches.match_changes_since(3, redis)
+        # Serving a delta doesn't validate the whole cached list.
+        assert not adapter.validate_json.called
+        del redis.data[matches.changelog_key(2)]
+        evicted = await matches.match_changes_since(1, redis)
+        unknown = await matches.match_changes_since(7, redis)
+
+    assert (delta.version, delta.full, delta.removed) == (3, False, ["2"])
+    assert [(match.id, match.status) for match in delta.matches] == [("1", "completed"), ("3", "upcoming")]
+    assert (unchanged.full, unchanged.matches, unchanged.removed) == (False, [], [])
+    for full in (evicted, unknown):
+        assert full.full and full.version == 3
+        assert [match.id for match in full.matches] == ["1", "3"]
@@ -0,0 +1,89 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core import metrics, upstream
+from app.core.config import settings
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_upstream_requests_are_timed_and_counted_by_url_pattern():
+    before = sample("vlr_upstream_bytes_total", pattern="https://www.vlr.gg/team/{id}/")
+    before_count = sample("vlr_upstream_request_seconds_count", pattern="https://www.vlr.gg/team/{id}/", status="200")
+
+    # Streamed, as VLR's responses are, rather than with the body already read.
+    transport = upstream.ResilientTransport(
+        httpx.MockTransport(lambda request: httpx.Response(200, stream=httpx.ByteStream(b"x" * 10)))
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
+        for team_id in (2, 1034):
+            assert (await client.get(f"https://www.vlr.gg/team/{team_id}/")).content == b"x" * 10
+
+    assert sample("vlr_upstream_bytes_total", pattern="https://www.vlr.gg/team/{id}/") == before + 20
+    assert (
+        sample("vlr_upstream_request_seconds_count", pattern="https://www.vlr.gg/team/{id}/", status="200")
+        == before_count + 2
+    )
+
+
+def test_cache_lookups_by_family_and_parsers_by_name():
+    hits = sample("vlr_cache_lookups_total", family="team", result="hit")
+    misses = sample("vlr_cache_lookups_total", family="team", result="miss")
+    metrics.cache_lookup("team:2:1", True)
+    metrics.cache_lookup("team_fields:2", False)
+    assert sample("vlr_cache_lookups_total", family="team", result="hit") == hits + 1
+    assert sample("vlr_cache_lookups_total", family="team", result="miss") == misses + 1
+
+    @metrics.parser
+    def parse_page(html: str) -> str:
+        return html.upper()
+
+    assert parse_page("a") == "A" and parse_page.__name__ == "parse_page"
+    assert sample("vlr_parse_seconds_count", parser="test_metrics.parse_page") == 1
+
+
+def test_page_parsers_record_one_parse_per_page():
+    from app.services import rankings, search
+
+    searches = sample("vlr_parse_seconds_count", parser="search.parse_results")
+    assert search.parse_results(b"<html><body></body></html>") == []
+    assert sample("vlr_parse_seconds_count", parser="search.parse_results") == searches + 1
+
+    # A ranking page is parsed a chunk at a time as it downloads, but observed once.
+    pages = sample("vlr_parse_seconds_count", parser="rankings.RankingPageParser")
+    parser = rankings.RankingPageParser()
+    for chunk in (b"<html><body>", b"<div>", b"</div></body></html>"):
+        parser.feed(chunk)
+    assert parser.close() == []
+    assert sample("vlr_parse_seconds_count", parser="rankings.RankingPageParser") == pages + 1
+
+
+@pytest.mark.asyncio
+async def test_cron_records_duration_and_last_success():
+    @metrics.cron
+    async def flaky_cron(ctx: dict) -> None:
+        if ctx.get("fail"):
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        await flaky_cron({"fail": True})
+    assert sample("vlr_cron_last_success_timestamp_seconds", cron="flaky_cron") == 0
+    await flaky_cron({})
+
+    assert sample("vlr_cron_run_seconds_count", cron="flaky_cron", outcome="error") == 1
+    assert sample("vlr_cron_run_seconds_count", cron="flaky_cron", outcome="ok") == 1
+    assert sample("vlr_cron_last_success_timestamp_seconds", cron="flaky_cron") > 0
+
+
+def test_metrics_endpoint_needs_the_internal_token():
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/metrics").status_code in (401, 403)
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {settings.INTERNAL_API_KEY}"})
+    assert response.status_code == 200 and "vlr_upstream_request_seconds" in response.text
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
@@ -7,7 +8,9 @@ from bs4 import BeautifulSoup
 
 import app.constants as constants
 from app import schemas
-from app.services import player
+from app.exceptions import ScrapingError
+from app.services import archive, pagination, player
+from tests.conftest import FakeRedis
 from app.constants import MAX_PAGINATION_PAGES
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures"
@@ -231,3 +234,66 @@ async def test_player_data_cache_miss_fetches_and_stores():
     cset.assert_awaited_once()
     assert cset.await_args.args[0] == f"player:{PLAYER_ID}:1"
     assert cset.await_args.kwargs["ttl"] == constants.CACHE_TTL_PLAYER
+
+
+@pytest.mark.asyncio
+async def test_stream_player_data_sends_each_page_as_it_is_parsed():
+    with patch("httpx.AsyncClient.get", side_effect=_build_mock_get()):
+        full = await player.get_player_data(PLAYER_ID, match_pages=0)
+        chunks = [chunk async for chunk in player.stream_player_data(PLAYER_ID, match_pages=0)]
+
+    # Page 1 comes with the player itself, then one chunk per further page (50 + 50 + 8).
+    assert [chunk.count(b"\n") for chunk in chunks] == [51, 50, 50, 8]
+    header, *rows = b"".join(chunks).splitlines()
+    assert json.loads(header) == full.model_dump(mode="json", exclude={"matches"})
+    assert [schemas.PlayerMatch.model_validate_json(row) for row in rows] == full.matches
+
+
+@pytest.mark.asyncio
+async def test_stream_player_data_reports_a_failed_page_in_the_body():
+    mock_get = _build_mock_get()
+
+    async def failing_get(url: str, *args, **kwargs):
+        response = await mock_get(url)
+        if url == player.player_matches_url(PLAYER_ID, 3):
+            response.status_code = 503
+        return response
+
+    with patch("httpx.AsyncClient.get", side_effect=failing_get):
+        body = await pagination.stream_ndjson(player.stream_player_data(PLAYER_ID, match_pages=0))
+        lines = b"".join([chunk async for chunk in body]).splitlines()
+
+    # The first two pages were already sent, so the failure can only end the stream.
+    assert len(lines) == 1 + 100 + 1
+    assert json.loads(lines[-1]) == {"error": {"status": 500, "detail": "VLR.gg server returned an error"}}
+
+
+@pytest.mark.asyncio
+async def test_stream_player_data_fails_before_sending_anything():
+    mock_get = _build_mock_get()
+
+    async def failing_get(url: str, *args, **kwargs):
+        response = await mock_get(url)
+        if url == player.player_matches_url(PLAYER_ID, 1):
+            response.status_code = 503
+        return response
+
+    with patch("httpx.AsyncClient.get", side_effect=failing_get), pytest.raises(ScrapingError):
+        await pagination.stream_ndjson(player.stream_player_data(PLAYER_ID, match_pages=0))
+
+
+@pytest.mark.asyncio
+async def test_player_matches_archive_pages_through_full_history():
+    redis = FakeRedis()
+    with (
+        patch("httpx.AsyncClient.get", side_effect=_build_mock_get()),
+        patch("app.services.archive.settings.ENABLE_CACHE", True),
+    ):
+        full = await player.get_player_matches(PLAYER_ID, pages=0)
+        page = await archive.archive_page(player.matches_archive(PLAYER_ID), 40, None, redis)
+        matches = page.items
+        while page.next_cursor:
+            page = await archive.archive_page(player.matches_archive(PLAYER_ID), 40, page.next_cursor, redis)
+            matches += page.items
+
+    assert matches == full
@@ -0,0 +1,78 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.constants as constants
+from app.api import deps
+from app.exceptions import NotFoundError
+from app.main import app
+from app.services import popularity, prewarm, rankings
+from tests.conftest import FakeRedis
+
+
+async def record(redis: FakeRedis, kind: str, ids: list[str]) -> None:
+    with patch("app.cache.cache.settings.ENABLE_CACHE", True):
+        await popularity.record(kind, ids, client=redis)
+
+
+def test_reads_are_counted_by_the_route():
+    redis = FakeRedis()
+    app.dependency_overrides[deps.get_redis_client] = lambda: redis
+    try:
+        with (
+            patch("app.cache.cache.settings.ENABLE_CACHE", True),
+            patch("app.api.v1.endpoints.player.player.get_player_data", AsyncMock()),
+            patch("app.api.v1.endpoints.player.projection.dump", return_value=b"{}"),
+        ):
+            assert TestClient(app).get("/api/v1/player/9").status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+    assert redis.data[popularity.popularity_key(popularity.PLAYER)] == {b"9": 1}
+
+
+@pytest.mark.asyncio
+async def test_hottest_picks_the_most_requested_within_the_budget():
+    redis = FakeRedis()
+    for _ in range(3):
+        await record(redis, popularity.TEAM, ["2", "624"])
+    await record(redis, popularity.TEAM, ["2"])
+    await record(redis, popularity.PLAYER, ["9", "9", "17"])
+
+    # Teams cost 3 requests and players 2: the next team (624) no longer fits, but a player still does.
+    assert await prewarm.hottest(redis, top_n=10, budget=5) == [(popularity.TEAM, "2"), (popularity.PLAYER, "9")]
+    assert await prewarm.hottest(redis, top_n=1, budget=100) == [(popularity.TEAM, "2"), (popularity.PLAYER, "9")]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_seeds_from_rankings_refreshes_and_decays():
+    ranking = {"region": "Europe", "teams": [{"id": 2}, {"id": 624}]}
+    redis = FakeRedis(
+        {
+            rankings.REGIONS_KEY: json.dumps(["/rankings/europe"]).encode(),
+            rankings.region_key("europe"): json.dumps(ranking).encode(),
+        }
+    )
+    await record(redis, popularity.TEAM, ["624", "624"])
+    await record(redis, popularity.PLAYER, ["9"])
+
+    fetch_team = AsyncMock(side_effect=[None, NotFoundError(detail="gone")])
+    fetch_player = AsyncMock(side_effect=httpx.ConnectError("down"))
+    with (
+        patch("app.services.prewarm.team.fetch_team_data", fetch_team),
+        patch("app.services.prewarm.player.fetch_player_data", fetch_player),
+    ):
+        refreshed = await prewarm.prewarm(redis)
+
+    # 624 is read most, then the seeded team and the player tie; the failed refreshes are left out.
+    assert [call.args[0] for call in fetch_team.await_args_list] == ["624", "2"]
+    assert fetch_team.await_args.kwargs == {"ttl": constants.CACHE_TTL_PREWARMED}
+    fetch_player.assert_awaited_once_with("9", ttl=constants.CACHE_TTL_PREWARMED)
+    assert (popularity.TEAM, "2") not in refreshed and (popularity.TEAM, "624") in refreshed
+    assert (popularity.PLAYER, "9") not in refreshed
+
+    scores = redis.data[popularity.popularity_key(popularity.TEAM)]
+    assert scores == {b"624": 2 * constants.POPULARITY_DECAY, b"2": prewarm.SEED_SCORE * constants.POPULARITY_DECAY}
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import profiling
+from app.core.config import settings
+
+
+def spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_weights_stacks_by_wall_clock_time():
+    with profiling.Sampler(threading.get_ident(), interval=0.001) as sampler:
+        spin(0.05)
+    profile = sampler.speedscope("spin")
+
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    (sampled,) = profile["profiles"]
+    # Nearly all of the time profiled was spent in spin().
+    spinning = sum(
+        weight for stack, weight in zip(sampled["samples"], sampled["weights"]) if frames[stack[-1]] == "spin"
+    )
+    assert 0.04 <= spinning <= sampled["endValue"]
+
+
+def test_sampler_stops_once_full():
+    with profiling.Sampler(threading.get_ident(), interval=0.001, max_samples=5) as sampler:
+        spin(0.05)
+
+    # The profile ends at its last sample rather than when the context exits.
+    assert len(sampler.samples) == 5 and sampler.end - sampler.start < 0.05
+
+
+def test_middleware_profiles_requests_sent_with_the_internal_key():
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow() -> None:
+        spin(0.01)
+
+    app.add_middleware(profiling.ProfilingMiddleware)  # type: ignore[arg-type]
+    client = TestClient(app)
+
+    with patch("app.core.profiling.cache.set", new=AsyncMock()) as cset:
+        assert "X-Profile-Id" not in client.get("/slow", headers={"X-Profile": "wrong"}).headers
+        cset.assert_not_called()
+
+        response = client.get("/slow", headers={"X-Profile": settings.INTERNAL_API_KEY})
+
+    key, profile = cset.call_args.args
+    assert key == f"profile:{response.headers['X-Profile-Id']}"
+    assert json.loads(profile)["name"] == "GET /slow"
+
+
+def test_middleware_stores_an_event_streams_profile_once_it_starts():
+    app = FastAPI()
+    stored_while_streaming = []
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        def events():
+            yield b"data: 1\n\n"
+            stored_while_streaming.append(cset.called)
+            yield b"data: 2\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_middleware(profiling.ProfilingMiddleware)  # type: ignore[arg-type]
+
+    with patch("app.core.profiling.cache.set", new=AsyncMock()) as cset:
+        response = TestClient(app).get("/stream", headers={"X-Profile": settings.INTERNAL_API_KEY})
+
+    assert response.text == "data: 1\n\ndata: 2\n\n"
+    assert stored_while_streaming == [True] and cset.call_count == 1
@@ -0,0 +1,62 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app.main import app
+from app.schemas import Team
+from app.services import projection
+from tests.conftest import make_team
+
+
+def test_include_tree_compiles_nested_and_limited_paths():
+    tree = projection.include_tree(Team, "name, upcoming[:2].opponent,upcoming[:2].id,completed.score")
+    assert tree == {
+        "name": True,
+        "upcoming": {0: {"opponent": True, "id": True}, 1: {"opponent": True, "id": True}},
+        "completed": {"__all__": {"score": True}},
+    }
+    # Asking for a field covers any of its subfields that were also asked for.
+    assert projection.include_tree(Team, "completed,completed.score") == {"completed": {"__all__": True}}
+
+
+@pytest.mark.parametrize(
+    "fields",
+    ["", "nope", "name.length", "name[:2]", "upcoming[:1].id,upcoming[:2].id", "completed.nope", "roster[x]"],
+)
+def test_include_tree_rejects_bad_projections(fields):
+    with pytest.raises(HTTPException) as exc:
+        projection.include_tree(Team, fields)
+    assert exc.value.status_code == 400
+
+
+def test_dump_keeps_only_projected_fields():
+    team = make_team()
+    assert json.loads(projection.dump(team, "tag,upcoming[:3].id")) == {
+        "tag": "SEN",
+        "upcoming": [{"id": "0"}, {"id": "1"}, {"id": "2"}],
+    }
+    assert projection.dump(team, None) == team.model_dump_json().encode()
+
+
+def test_dump_list_projects_each_item():
+    adapter = TypeAdapter(list[Team])
+    teams = [make_team(1), make_team(0)]
+    assert json.loads(projection.dump_list(adapter, Team, teams, "rank,upcoming.id")) == [
+        {"rank": 1, "upcoming": [{"id": "0"}]},
+        {"rank": 1, "upcoming": []},
+    ]
+    assert projection.dump_list(adapter, Team, teams, None) == adapter.dump_json(teams)
+
+
+def test_a_bad_projection_is_rejected_before_scraping():
+    get_team_data = AsyncMock(return_value=make_team())
+    with patch("app.api.v1.endpoints.team.team.get_team_data", get_team_data):
+        client = TestClient(app)
+        assert client.get("/api/v1/team/2", params={"fields": "name,nope"}).status_code == 400
+        assert client.get("/api/v1/team/2", params={"fields": "name"}).json() == {"name": "Sentinels"}
+
+    assert get_team_data.await_count == 1
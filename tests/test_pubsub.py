@@ -0,0 +1,67 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.core.pubsub import Broker
+
+
+async def _idle(self):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_filtered_messages_and_drops_oldest():
+    broker = Broker("channel", queue_size=2)
+
+    with patch.object(Broker, "_listen", _idle):
+        async with (
+            broker.subscribe(lambda message: message["id"] % 2 == 0) as even,
+            broker.subscribe(lambda message: True) as every,
+        ):
+            for id in range(4):
+                broker.dispatch(json.dumps({"id": id}).encode())
+            broker.dispatch(b"not json")
+
+            assert [json.loads(even.get_nowait())["id"] for _ in range(even.qsize())] == [0, 2]
+            # A subscriber that falls behind keeps only the newest messages.
+            assert [json.loads(every.get_nowait())["id"] for _ in range(every.qsize())] == [2, 3]
+            assert broker._listener is not None
+
+    # The shared subscription stops with the last subscriber.
+    assert broker.subscriptions == set()
+    assert broker._listener is None
+
+
+@pytest.mark.asyncio
+async def test_broker_restarts_the_listener_for_a_subscriber_arriving_while_it_stops():
+    stopping, resume = asyncio.Event(), asyncio.Event()
+    started = []
+
+    async def listen(self):
+        started.append(asyncio.current_task())
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            # Closing the Redis subscription takes a moment.
+            stopping.set()
+            await resume.wait()
+            raise
+
+    broker = Broker("channel")
+    with patch.object(Broker, "_listen", listen):
+
+        async def first() -> None:
+            async with broker.subscribe(lambda message: True):
+                await asyncio.sleep(0)
+
+        leaving = asyncio.create_task(first())
+        await stopping.wait()
+        async with broker.subscribe(lambda message: True):
+            resume.set()
+            await leaving
+            await asyncio.sleep(0)
+            # The newcomer has a listener of its own, which outlived the old one being stopped.
+            assert len(started) == 2 and not started[1].done() and broker._listener is started[1]
+        assert broker._listener is None
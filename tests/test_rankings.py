@@ -1,8 +1,31 @@
+import json
+import time
+from datetime import UTC, datetime
+
+import httpx
 import pytest
 from unittest.mock import AsyncMock, patch
 from pathlib import Path
 
+from app import schemas
+from app.exceptions import NotFoundError, ScrapingError
 from app.services import rankings
+from tests.conftest import FakeRedis
+
+
+def _rank_item(rank: int) -> bytes:
+    return f"""
+        <div class="rank-item wf-card fc-flex">
+            <div class="rank-item-rank">{rank}</div>
+            <a href="/team/{rank}/team-{rank}" data-sort-value="Team {rank}">
+                <img src="/img/{rank}.png" alt="Team {rank}">
+                <div class="rank-item-team">
+                    <div class="rank-item-team-name">Team {rank}</div>
+                    <div class="rank-item-team-country">Country {rank}</div>
+                </div>
+            </a>
+            <div class="rank-item-rating">{1000 - rank}</div>
+        </div>""".encode()
 
 
 @pytest.mark.asyncio
@@ -12,12 +35,11 @@ async def test_ranking_list():
     with open(fixture_path, "r", encoding="utf-8") as f:
         html_content = f.read()
 
-    # Mock the HTTP response
-    mock_response = AsyncMock()
-    mock_response.status_code = 200
-    mock_response.content = html_content.encode("utf-8")
+    # Mock the HTTP response; region pages are streamed, so this goes through `send`
+    async def mock_send(request, **kwargs):
+        return httpx.Response(200, content=html_content.encode("utf-8"), request=request)
 
-    with patch("httpx.AsyncClient.get", return_value=mock_response):
+    with patch("httpx.AsyncClient.send", side_effect=mock_send):
         result = await rankings.ranking_list()
 
     # Assertions
@@ -35,3 +57,166 @@ async def test_ranking_list():
     assert sentinels.rank == 1
     assert sentinels.points == 775
     assert sentinels.country == "United States"
+
+
+@pytest.mark.asyncio
+async def test_fetch_region_stops_reading_after_ranked_teams():
+    chunks_read = 0
+
+    async def body():
+        nonlocal chunks_read
+        yield b'<html><body><div class="wf-card mod-rankings">'
+        for rank in range(1, 101):
+            chunks_read += 1
+            yield _rank_item(rank)
+        yield b"</div></body></html>"
+
+    async def mock_send(request, **kwargs):
+        return httpx.Response(200, content=body(), request=request)
+
+    with patch("httpx.AsyncClient.send", side_effect=mock_send):
+        result, _ = await rankings.fetch_region("/rankings/europe")
+
+    assert result.region == "Europe"
+    assert [team.rank for team in result.teams] == list(range(1, 26))
+    assert result.teams[-1].name == "Team 25"
+    assert result.teams[-1].points == 975
+    assert result.teams[-1].country == "Country 25"
+    # The item is only known to be complete once the next one starts arriving.
+    assert chunks_read <= rankings.RANKED_TEAMS_PER_REGION + 1
+
+
+def test_parse_rank_item_tolerates_a_missing_field():
+    page = _rank_item(7).replace(b'<div class="rank-item-team-country">Country 7</div>', b"")
+    parser = rankings.RankingPageParser()
+    parser.feed(b"<html><body>" + page + b"</body></html>")
+
+    [team] = parser.close()
+    assert (team.rank, team.points, team.country) == (7, 993, "")
+
+
+@pytest.mark.asyncio
+async def test_fetch_region_upstream_error_raises():
+    mock_send = AsyncMock(side_effect=lambda request, **kwargs: httpx.Response(503, request=request))
+
+    with patch("httpx.AsyncClient.send", new=mock_send):
+        with pytest.raises(ScrapingError):
+            await rankings.fetch_region("/rankings/europe")
+
+
+INDEX_PAGE = b"""<html><body>
+    <a class="zx-tab" href="/rankings">World</a>
+    <a class="zx-tab" href="/rankings/europe">Europe</a>
+    <a class="zx-tab" href="/rankings/china">China</a>
+</body></html>"""
+
+
+def _region_page(*ranks: int) -> bytes:
+    return (
+        b'<html><body><div class="wf-card mod-rankings">' + b"".join(map(_rank_item, ranks)) + b"</div></body></html>"
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_rankings_keeps_last_known_good_for_failing_region():
+    stale_china = b'{"region":"China","teams":[]}'
+    redis = FakeRedis({"rankings:region:china": stale_china})
+
+    async def mock_send(request, **kwargs):
+        if request.url.path == "/rankings":
+            return httpx.Response(200, content=INDEX_PAGE, request=request)
+        if request.url.path == "/rankings/europe":
+            return httpx.Response(200, content=_region_page(1, 2), headers={"ETag": '"eu-1"'}, request=request)
+        return httpx.Response(503, request=request)
+
+    with patch("httpx.AsyncClient.send", side_effect=mock_send):
+        await rankings.refresh_rankings(redis)
+
+    assert json.loads(redis.data["rankings:regions"]) == ["/rankings/europe", "/rankings/china"]
+    assert [team["rank"] for team in json.loads(redis.data["rankings:region:europe"])["teams"]] == [1, 2]
+    assert json.loads(redis.data["rankings:region:europe:state"])["etag"] == '"eu-1"'
+    # The failed region keeps serving its previous ranking and stays due for the next run.
+    assert redis.data["rankings:region:china"] == stale_china
+    assert "rankings:region:china:state" not in redis.data
+
+    with patch("app.services.rankings.cache.settings.ENABLE_CACHE", True):
+        body = await rankings.rankings_json(redis)
+    assert [region["region"] for region in json.loads(body)] == ["Europe", "China"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_rankings_skips_regions_not_due_and_unchanged_pages():
+    cached_europe = _region_page(1).decode()
+    redis = FakeRedis(
+        {
+            "rankings:region:europe": cached_europe.encode(),
+            "rankings:region:europe:state": json.dumps({"etag": '"eu-1"', "next_refresh": 0}).encode(),
+            "rankings:region:china:state": json.dumps({"next_refresh": time.time() + 600}).encode(),
+        }
+    )
+    requested = []
+
+    async def mock_send(request, **kwargs):
+        requested.append(request)
+        if request.url.path == "/rankings":
+            return httpx.Response(200, content=INDEX_PAGE, request=request)
+        return httpx.Response(304, request=request)
+
+    with (
+        patch("httpx.AsyncClient.send", side_effect=mock_send),
+        patch("app.services.rankings.RankingPageParser.feed") as feed,
+    ):
+        await rankings.refresh_rankings(redis)
+
+    # China is not due yet; Europe is asked conditionally, and its 304 is never parsed.
+    assert [request.url.path for request in requested] == ["/rankings", "/rankings/europe"]
+    assert requested[1].headers["If-None-Match"] == '"eu-1"'
+    feed.assert_not_called()
+    assert redis.data["rankings:region:europe"] == cached_europe.encode()
+    assert json.loads(redis.data["rankings:region:europe:state"])["next_refresh"] > time.time()
+
+
+def _ranking(*teams: tuple[int, int, int]) -> schemas.Ranking:
+    return schemas.Ranking(
+        region="Europe",
+        teams=[
+            schemas.TeamRanking(
+                name=f"Team {id}", id=id, logo="https://owcdn.net/x.png", rank=rank, points=points, country="X"
+            )
+            for id, rank, points in teams
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_ranking_history_records_only_changes_and_answers_ranges():
+    redis = FakeRedis()
+    snapshots = [
+        _ranking((1, 1, 900), (2, 2, 800)),
+        _ranking((1, 1, 900), (2, 2, 800)),
+        _ranking((2, 1, 950), (1, 2, 900)),
+        _ranking((2, 1, 960)),
+    ]
+    previous = None
+    for when, snapshot in zip((1000, 2000, 3000, 4000), snapshots):
+        await rankings.record_history(redis, previous, snapshot, when)
+        previous = snapshot
+
+    # Team 1: first seen, rank change, dropped out -- the unchanged snapshot adds nothing.
+    assert len(redis.data["rankings:history:1"]) == 3 * rankings.HISTORY_RECORD.size
+
+    def at(seconds: int) -> datetime:
+        return datetime.fromtimestamp(seconds, tz=UTC)
+
+    with patch("app.services.rankings.cache.settings.ENABLE_CACHE", True):
+        full = await rankings.ranking_history(1, redis)
+        window = await rankings.ranking_history(2, redis, start=at(2500), end=at(3500))
+        with pytest.raises(NotFoundError):
+            await rankings.ranking_history(3, redis)
+
+    assert [(entry.rank, entry.points) for entry in full.history] == [(1, 900), (2, 900), (None, None)]
+    # The entry in effect at `start` is carried in, so the range starts from a known state.
+    assert [(entry.time, entry.rank, entry.points) for entry in window.history] == [
+        (at(1000), 2, 800),
+        (at(3000), 1, 950),
+    ]
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app import cron, schemas
+from app.constants import EventStatus, MatchStatus
+from app.services import schedule
+from tests.conftest import FakeRedis
+
+NOW = datetime(2026, 5, 1, 12, tzinfo=timezone.utc)
+LOW, HIGH = 60, 1800
+
+
+def match(status: MatchStatus, starts_in: timedelta) -> schemas.Match:
+    return schemas.Match(
+        id="1",
+        team1={"name": "PRX"},
+        team2={"name": "SEN"},
+        status=status,
+        time=NOW + starts_in,
+        event="Masters",
+        series="Playoffs",
+    )
+
+
+@pytest.mark.parametrize(
+    ("match_list", "delay"),
+    [
+        # A live match wants the list refreshed as often as allowed.
+        ([match(MatchStatus.LIVE, -timedelta(minutes=20)), match(MatchStatus.UPCOMING, timedelta(hours=3))], LOW),
+        # Otherwise, refresh when the next match starts...
+        ([match(MatchStatus.UPCOMING, timedelta(minutes=10)), match(MatchStatus.UPCOMING, timedelta(hours=1))], 600),
+        # ...within the bounds,
+        ([match(MatchStatus.UPCOMING, timedelta(hours=5))], HIGH),
+        ([], HIGH),
+        # a match that should have started already is due now,
+        ([match(MatchStatus.UPCOMING, -timedelta(minutes=5))], LOW),
+        # unless it's long past its start, and was most likely postponed.
+        ([match(MatchStatus.UPCOMING, -timedelta(hours=2)), match(MatchStatus.COMPLETED, -timedelta(hours=1))], HIGH),
+    ],
+)
+def test_matches_delay_follows_the_match_calendar(match_list, delay):
+    with (
+        patch("app.services.schedule.settings.MATCHES_REFRESH_MIN", LOW),
+        patch("app.services.schedule.settings.MATCHES_REFRESH_MAX", HIGH),
+    ):
+        assert schedule.matches_delay(match_list, NOW) == delay
+
+
+def test_events_delay_is_short_while_an_event_is_ongoing():
+    def event(status: EventStatus) -> schemas.Event:
+        return schemas.Event(
+            id="1", title="Masters", status=status, prize="", dates="", location="", img="https://owcdn.net/img/x.png"
+        )
+
+    assert schedule.events_delay([event(EventStatus.UPCOMING), event(EventStatus.ONGOING)], 600, 7200) == 600
+    assert schedule.events_delay([event(EventStatus.UPCOMING), event(EventStatus.COMPLETED)], 600, 7200) == 7200
+
+
+@pytest.mark.asyncio
+async def test_matches_cron_only_refreshes_when_due():
+    redis = FakeRedis()
+    match_list = [match(MatchStatus.UPCOMING, timedelta(hours=5))]
+    with (
+        patch("app.cron.matches.match_list", AsyncMock(return_value=match_list)) as fetch,
+        patch("app.cron.matches.overlay_live_states", AsyncMock()),
+    ):
+        await cron.matches_cron({"redis": redis})
+        # Deferred until the next match starts (capped), so the next ticks are skipped.
+        await cron.matches_cron({"redis": redis})
+
+    fetch.assert_awaited_once()
+    assert not await schedule.is_due(redis, "matches")
+    assert redis.data["matches"] == schemas.MatchListAdapter.dump_json(match_list)
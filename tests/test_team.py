@@ -1,10 +1,14 @@
+import json
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 import app.constants as constants
 from app.constants import MAX_PAGINATION_PAGES
+from app.api.v1.endpoints import team as team_endpoint
 from app.services import team
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures"
@@ -94,10 +98,13 @@ async def test_team_multi_page_returns_more_matches():
 async def test_team_fetch_all_pages_stops_on_empty():
     # completed_pages <= 0 means "fetch all"; only pages 1 and 2 have matches here,
     # the batch walk should stop once it hits the empty out-of-range pages.
+    on_page = AsyncMock()
     with patch("httpx.AsyncClient.get", side_effect=_build_mock_get()):
-        result = await team.get_team_data(TEAM_ID, completed_pages=0)
+        result = await team.get_team_data(TEAM_ID, completed_pages=0, on_page=on_page)
 
     assert len(result.completed) == 100
+    # Progress is reported after each page that was read.
+    assert [call.args for call in on_page.await_args_list] == [(1,), (2,)]
 
 
 @pytest.mark.asyncio
@@ -235,3 +242,20 @@ async def test_team_later_page_error_raises_and_is_not_cached():
             await team.get_team_data(TEAM_ID, completed_pages=0)
 
     cset.assert_not_called()  # partial history must never be cached
+
+
+def test_team_endpoint_streams_completed_matches_as_ndjson():
+    app = FastAPI()
+    app.include_router(team_endpoint.router, prefix="/team")
+    client = TestClient(app)
+
+    with patch("httpx.AsyncClient.get", side_effect=_build_mock_get()):
+        full = client.get(f"/team/{TEAM_ID}", params={"completed_pages": 0})
+        streamed = client.get(f"/team/{TEAM_ID}", params={"completed_pages": 0, "stream": True})
+
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    header, *rows = map(json.loads, streamed.text.splitlines())
+    expected = full.json()
+    assert rows == expected.pop("completed")
+    assert header == expected
+    assert len(rows) == 100
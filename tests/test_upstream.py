@@ -0,0 +1,198 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import cache, schemas
+from app.api import deps
+from app.constants import UpstreamPriority
+from app.core import upstream
+from app.exceptions import UpstreamUnavailableError
+from app.main import app
+from tests.conftest import FakeRedis, upcoming_match
+
+INTERACTIVE, AGENT, BACKGROUND = UpstreamPriority.INTERACTIVE, UpstreamPriority.AGENT, UpstreamPriority.BACKGROUND
+
+
+async def queue(scheduler: upstream.Scheduler, lanes: list[UpstreamPriority], granted: list[UpstreamPriority]):
+    async def request(lane: UpstreamPriority) -> None:
+        await scheduler.acquire(lane)
+        granted.append(lane)
+
+    tasks = [asyncio.create_task(request(lane)) for lane in lanes]
+    await asyncio.sleep(0)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_scheduler_shares_slots_by_weight():
+    scheduler = upstream.Scheduler(1, {INTERACTIVE: (3, 1), BACKGROUND: (1, 1)})
+    await scheduler.acquire(BACKGROUND)
+    granted = []
+    tasks = await queue(scheduler, [BACKGROUND] * 4 + [INTERACTIVE] * 6, granted)
+
+    for i in range(10):
+        # Each request finishes in the order it was let through.
+        scheduler.release(([BACKGROUND] + granted)[i])
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    # Though queued first, background gets one slot in four while both wait (counting the one it held).
+    assert granted == [INTERACTIVE] * 4 + [BACKGROUND] + [INTERACTIVE] * 2 + [BACKGROUND] * 3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_caps_lanes_and_skips_cancelled_waiters():
+    scheduler = upstream.Scheduler(3, {INTERACTIVE: (8, 3), BACKGROUND: (1, 1)})
+    await scheduler.acquire(BACKGROUND)
+    granted = []
+    waiting = await queue(scheduler, [BACKGROUND, BACKGROUND], granted)
+    # Background is at its cap, but interactive requests still get the free slots.
+    await queue(scheduler, [INTERACTIVE, INTERACTIVE], granted)
+    assert granted == [INTERACTIVE, INTERACTIVE]
+
+    waiting[0].cancel()
+    await asyncio.sleep(0)
+    scheduler.release(BACKGROUND)
+    await asyncio.sleep(0)
+    assert granted == [INTERACTIVE, INTERACTIVE, BACKGROUND] and waiting[1].done()
+    assert scheduler.free == 0
+
+
+@pytest.mark.asyncio
+async def test_transport_holds_a_slot_of_the_contexts_lane_until_the_body_is_read():
+    scheduler = upstream.Scheduler(2, {INTERACTIVE: (8, 2), AGENT: (3, 1)})
+    seen = []
+
+    class Body(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"ok"
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        seen.append(dict(scheduler.active))
+        return httpx.Response(200, stream=Body())
+
+    transport = upstream.PriorityTransport(httpx.MockTransport(handle), scheduler)
+    async with httpx.AsyncClient(transport=transport) as client:
+        with upstream.priority(AGENT):
+            assert (await client.get("https://vlr.test/")).content == b"ok"
+        async with client.stream("GET", "https://vlr.test/") as response:
+            assert scheduler.active[INTERACTIVE] == 1
+            await response.aread()
+
+    assert seen == [{INTERACTIVE: 0, AGENT: 1}, {INTERACTIVE: 1, AGENT: 0}]
+    assert scheduler.free == 2 and scheduler.active == {INTERACTIVE: 0, AGENT: 0}
+
+
+@pytest.mark.asyncio
+async def test_transport_retries_server_errors_then_opens_the_breaker():
+    statuses = [503, 200, 502, 502, 502, 502, 200]
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(statuses.pop(0))
+
+    transport = upstream.ResilientTransport(httpx.MockTransport(handle))
+    with (
+        patch("app.constants.UPSTREAM_RETRY_BACKOFF", 0),
+        patch("app.constants.UPSTREAM_RETRIES", 1),
+        patch("app.constants.UPSTREAM_BREAKER_THRESHOLD", 2),
+    ):
+        async with httpx.AsyncClient(transport=transport) as client:
+            assert (await client.get("https://vlr.test/a")).status_code == 200
+            # Each of these fails even when retried, the second opening the circuit.
+            assert (await client.get("https://vlr.test/b")).status_code == 502
+            assert (await client.get("https://vlr.test/c")).status_code == 502
+            with pytest.raises(UpstreamUnavailableError) as exc:
+                await client.get("https://vlr.test/d")
+            assert exc.value.headers["Retry-After"] == "30"
+            assert len(calls) == 6
+
+            # Once the cooldown is over, one request probes the upstream and closes the circuit again.
+            transport.breakers["vlr.test"].opened_at -= 30
+            assert (await client.get("https://vlr.test/e")).status_code == 200
+            assert transport.breakers["vlr.test"].opened_at is None
+
+
+@pytest.mark.asyncio
+async def test_transport_hedges_requests_slower_than_the_p95():
+    started = []
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        started.append(len(started))
+        if len(started) == 1:
+            await asyncio.Event().wait()  # the first attempt hangs
+        return httpx.Response(200, text=str(len(started)))
+
+    transport = upstream.ResilientTransport(httpx.MockTransport(handle))
+    for _ in range(20):
+        transport.latencies["vlr.test"].add(0.01)
+    with patch("app.constants.UPSTREAM_HEDGE_MIN_DELAY", 0.01):
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await asyncio.wait_for(client.get("https://vlr.test/"), 1)
+
+    assert response.text == "2" and started == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_transport_times_requests_from_their_slot_and_doesnt_hedge_a_queued_lane():
+    scheduler = upstream.Scheduler(1, {INTERACTIVE: (8, 1)})
+    started = []
+    answer = asyncio.Event()
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        started.append(request.url.path)
+        await answer.wait()
+        return httpx.Response(200, text=request.url.path)
+
+    transport = upstream.ResilientTransport(
+        upstream.PriorityTransport(httpx.MockTransport(handle), scheduler), scheduler
+    )
+    for _ in range(20):
+        transport.latencies["vlr.test"].add(0.01)
+    with patch("app.constants.UPSTREAM_HEDGE_MIN_DELAY", 0.01):
+        async with httpx.AsyncClient(transport=transport) as client:
+            requests = [asyncio.create_task(client.get(f"https://vlr.test/{path}")) for path in ("a", "b")]
+            await asyncio.sleep(0.1)
+            # Both are slower than the p95, but /b is waiting for the only slot, so neither is duplicated.
+            assert started == ["/a"]
+            answer.set()
+            responses = await asyncio.wait_for(asyncio.gather(*requests), 1)
+
+    assert [response.text for response in responses] == ["/a", "/b"] and started == ["/a", "/b"]
+    # /b's time waiting for /a's slot isn't taken for VLR being slow.
+    assert transport.latencies["vlr.test"].samples[-1] < 0.05
+
+
+def test_only_requests_to_vlr_go_through_the_resilient_transport():
+    client = upstream.create_http_client()
+
+    assert isinstance(client._transport_for_url(httpx.URL("https://www.vlr.gg/team/2")), upstream.ResilientTransport)
+    # Webhook receivers can't open VLR's breaker or hold its slots.
+    assert isinstance(client._transport_for_url(httpx.URL("https://hooks.example.com/vlr")), httpx.AsyncHTTPTransport)
+
+
+def test_stale_copy_is_served_while_vlr_is_unavailable():
+    redis = FakeRedis()
+    app.dependency_overrides[deps.get_redis_client] = lambda: redis
+    try:
+        with (
+            patch("app.cache.cache.settings.ENABLE_CACHE", True),
+            patch("app.services.matches.match_list", AsyncMock(side_effect=UpstreamUnavailableError(retry_after=12))),
+            patch("app.cache.cache.time", Mock(time=Mock(side_effect=[1000, 1090]))),
+        ):
+            client = TestClient(app)
+            assert client.get("/api/v1/matches/").status_code == 503
+
+            data = schemas.MatchListAdapter.dump_json([upcoming_match("1", 10)])
+            asyncio.run(cache.set("matches", data, ttl=60, client=redis, stale_ttl=3600))
+            del redis.data["matches"]
+            response = client.get("/api/v1/matches/")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200 and response.headers["X-Stale-Age"] == "90"
+    assert [match["id"] for match in response.json()] == ["1"]
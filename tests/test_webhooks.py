@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from arq.worker import Retry
+
+from app import schemas
+from app.constants import WebhookEventType
+from app.services import events, webhooks
+from tests.conftest import FakeRedis, arq_pool, fake_redis
+
+MATCH_EVENTS = [
+    {"match_id": "1", "event_id": "10", "team_ids": ["2", "3"], "changes": {"status": "live"}},
+    {"match_id": "4", "event_id": "11", "team_ids": ["5", "6"], "changes": {"status": "completed"}},
+]
+
+
+class Receiver:
+    """A stand-in webhook endpoint that checks signatures, answering with the statuses it is given."""
+
+    def __init__(self, secret: str, *statuses: int):
+        self.secret = secret
+        self.statuses = list(statuses)
+        self.deliveries: list[dict] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = request.content
+        expected = hmac.new(
+            self.secret.encode(), request.headers["X-Webhook-Timestamp"].encode() + b"." + body, hashlib.sha256
+        )
+        assert request.headers["X-Webhook-Signature"] == "sha256=" + expected.hexdigest()
+        self.deliveries.append(json.loads(body))
+        return httpx.Response(self.statuses.pop(0))
+
+
+async def deliver(redis: FakeRedis, receiver: Receiver, webhook_id: str, job_try: int = 1) -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(receiver.handle))
+    with patch("app.core.connections.http_client", client):
+        await webhooks.deliver(
+            {"redis": redis, "job_try": job_try}, webhook_id, "match", MATCH_EVENTS[:1], "delivery-1"
+        )
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batches_the_subscribed_changes_per_webhook():
+    redis, pool = fake_redis(), arq_pool()
+    everything = await webhooks.create_webhook(redis, schemas.WebhookCreate(url="https://partner.test/all"))
+    team = await webhooks.create_webhook(redis, schemas.WebhookCreate(url="https://partner.test/t", team_ids=["5"]))
+    await webhooks.create_webhook(
+        redis, schemas.WebhookCreate(url="https://partner.test/events", types=[WebhookEventType.EVENT])
+    )
+
+    with patch("app.services.webhooks.ArqRedis", pool):
+        await webhooks.dispatch(redis, WebhookEventType.MATCH, MATCH_EVENTS)
+
+    queued = {call.args[1]: call.args[3] for call in pool.return_value.enqueue_job.await_args_list}
+    assert queued == {everything.id: MATCH_EVENTS, team.id: MATCH_EVENTS[1:]}
+
+
+@pytest.mark.asyncio
+async def test_deliver_signs_and_retries_with_backoff():
+    redis = FakeRedis()
+    webhook = await webhooks.create_webhook(redis, schemas.WebhookCreate(url="https://partner.test/hook"))
+    receiver = Receiver(webhook.secret, 503, 503, 200, 503, 400)
+
+    with pytest.raises(Retry) as first:
+        await deliver(redis, receiver, webhook.id)
+    with pytest.raises(Retry) as second:
+        await deliver(redis, receiver, webhook.id, job_try=2)
+    await deliver(redis, receiver, webhook.id, job_try=3)
+    assert (first.value.defer_score, second.value.defer_score) == (5000, 10000)
+    assert receiver.deliveries[-1] == {"id": "delivery-1", "type": "match", "events": MATCH_EVENTS[:1]}
+
+    # The last try gives up, and a rejected delivery isn't retried.
+    await deliver(redis, receiver, webhook.id, job_try=6)
+    await deliver(redis, receiver, webhook.id)
+    assert len(receiver.deliveries) == 5
+
+    # Nothing is sent to a webhook that was deleted since.
+    await webhooks.delete_webhook(redis, webhook.id)
+    await deliver(redis, receiver, webhook.id)
+    assert len(receiver.deliveries) == 5
+
+
+@pytest.mark.asyncio
+async def test_deliver_defers_rather_than_waits_for_a_busy_endpoint():
+    redis = FakeRedis()
+    webhook = await webhooks.create_webhook(redis, schemas.WebhookCreate(url="https://partner.test/hook"))
+    receiver = Receiver(webhook.secret, 200)
+    slot = webhooks._endpoint_slots[webhook.id]
+    for _ in range(webhooks.constants.WEBHOOK_CONCURRENCY):
+        await slot.acquire()
+
+    with pytest.raises(Retry) as busy:
+        await deliver(redis, receiver, webhook.id)
+    assert busy.value.defer_score == 5000 and receiver.deliveries == []
+
+    slot.release()
+    await deliver(redis, receiver, webhook.id, job_try=2)
+    assert len(receiver.deliveries) == 1
+
+
+def test_diff_event_lists_reports_status_changes():
+    def event(id: str, status: str) -> schemas.Event:
+        return schemas.Event(
+            id=id, title=f"Event {id}", status=status, prize="", dates="", location="", img="https://vlr.test/e.png"
+        )
+
+    previous = [event("1", "upcoming"), event("2", "ongoing")]
+    current = [event("1", "ongoing"), event("2", "ongoing"), event("3", "upcoming")]
+
+    assert events.diff_event_lists(previous, current) == [
+        {"event_id": "1", "title": "Event 1", "changes": {"status": "ongoing"}},
+        {"event_id": "3", "title": "Event 3", "changes": {"status": "upcoming"}},
+    ]